@@ -10,6 +10,8 @@ __all__ = [
     "GTMAgent",
     "SuccessProbabilityAgent",
     "CriticAgent",
+    "Stage",
+    "StageGraph",
 ]
 
 _MODULE_MAP = {
@@ -20,6 +22,8 @@ _MODULE_MAP = {
     "GTMAgent": "agents.strategy_agents",
     "SuccessProbabilityAgent": "agents.evaluation_agents",
     "CriticAgent": "agents.evaluation_agents",
+    "Stage": "agents.pipeline",
+    "StageGraph": "agents.pipeline",
 }
 
 
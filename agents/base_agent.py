@@ -1,38 +1,221 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence, Tuple
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
+from agents.llm_cache import llm_cache
+from agents.llm_clients import llm_clients
+from agents.pipeline import Stage, publish
+from agents.rate_limiter import call_priority, llm_rate_limiter
+from agents.streaming import SectionStreamParser
+from evaluation.metrics import get_evaluation_metrics
+from runtime.deadline import DeadlineExceeded, llm_call_policy
 
 load_dotenv()
 
+# Placeholder for sections a stage could not produce before the deadline
+DEGRADED_TEXT = "Not available: the analysis deadline was reached before this section was completed."
+
 
 class BaseAgent:
     """Base class for all agents"""
     
+    # Pipeline stage declaration: the context keys this agent consumes and produces
+    stage_name: str = ""
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    # Serve byte-identical prompts from the LLM response cache (LLM_CACHE_AGENTS overrides)
+    cache_responses: bool = False
+    # Only cache temperature-0 calls (_invoke(..., deterministic=True)); sampled drafts stay fresh
+    cache_deterministic_only: bool = False
+    # Rate limiter queue level: lower is served first (planners start new analyses, so they yield)
+    llm_priority: int = 0
+    
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
+        self.model_name = os.getenv("LLM_MODEL", "llama3-70b-8192")
+        self.temperature = float(os.getenv("LLM_TEMPERATURE", "0.7"))
         self.llm = self._initialize_llm()
+        # Temperature-0 client for extraction-style calls that should not vary between runs
+        self.deterministic_llm = self._initialize_llm(0.0)
+        # Stream completions so finished sections reach downstream stages early
+        self.streaming = os.getenv("LLM_STREAMING_ENABLED", "false").lower() == "true"
     
-    def _initialize_llm(self) -> ChatGroq:
-        """Initialize the Groq LLM"""
-        api_key = os.getenv("GROQ_API_KEY")
-        model = os.getenv("LLM_MODEL", "llama3-70b-8192")
-        temperature = float(os.getenv("LLM_TEMPERATURE", "0.7"))
-        
-        if not api_key:
-            raise ValueError("GROQ_API_KEY must be set in environment variables")
-        
-        return ChatGroq(
-            groq_api_key=api_key,
-            model_name=model,
-            temperature=temperature
-        )
+    def _initialize_llm(self, temperature: Optional[float] = None) -> ChatGroq:
+        """Get the shared Groq LLM client for this agent's model (and temperature unless given)"""
+        return llm_clients.get(self.model_name, self.temperature if temperature is None else temperature)
     
     async def execute(self, context: Dict[str, Any]) -> str:
         """Execute the agent's task - to be implemented by subclasses"""
         raise NotImplementedError("Subclasses must implement execute method")
     
+    async def run_stage(self, context: Dict[str, Any]) -> Any:
+        """
+        Run as a pipeline stage: execute and store the result under the first declared write
+        
+        Args:
+            context: Shared pipeline context
+            
+        Returns:
+            The result of execute()
+        """
+        result = await self.execute(context)
+        if self.writes:
+            context[self.writes[0]] = result
+        return result
+    
+    def fallback_outputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Outputs used for any declared write a stage could not produce in time
+        
+        Args:
+            context: Shared pipeline context (sections published so far are kept)
+            
+        Returns:
+            Context key -> placeholder value
+        """
+        return {key: DEGRADED_TEXT for key in self.writes}
+    
+    async def run_stage_within_deadline(self, context: Dict[str, Any]) -> Any:
+        """
+        Run as a pipeline stage, degrading instead of failing when time runs out
+        
+        If an LLM call times out or the request deadline passes, whatever the
+        stage already wrote (e.g. streamed sections) is kept and the remaining
+        writes are filled from fallback_outputs(), so downstream stages and the
+        report still complete.
+        
+        Args:
+            context: Shared pipeline context
+            
+        Returns:
+            The result of run_stage(), or the fallback for the first declared write
+        """
+        try:
+            return await self.run_stage(context)
+        except DeadlineExceeded as e:
+            name = self.stage_name or self.name.lower().replace(" ", "_")
+            print(f"  {self.name} degraded: {e}")
+            for key, value in self.fallback_outputs(context).items():
+                context.setdefault(key, value)
+            get_evaluation_metrics().add_degraded_stage(name, str(e))
+            return context.get(self.writes[0]) if self.writes else None
+    
+    def as_stage(self) -> Stage:
+        """Describe this agent as a pipeline stage"""
+        name = self.stage_name or self.name.lower().replace(" ", "_")
+        return Stage(name=name, run=self.run_stage_within_deadline, reads=self.reads, writes=self.writes)
+    
+    @property
+    def cache_enabled(self) -> bool:
+        """Whether this agent's completions go through the LLM response cache"""
+        return llm_cache.enabled_for(self.stage_name or self.name, self.cache_responses)
+    
+    def _should_cache(self, deterministic: bool) -> bool:
+        return self.cache_enabled and (deterministic or not self.cache_deterministic_only)
+    
+    def _cache_key(self, prompt: str, temperature: Optional[float] = None) -> str:
+        return llm_cache.key(self.model_name, self.temperature if temperature is None else temperature, prompt)
+    
+    async def _invoke(self, prompt: str, ttl_seconds: Optional[float] = None, deterministic: bool = False) -> str:
+        """
+        Get a completion, through the LLM response cache when enabled for this agent
+        
+        Args:
+            prompt: Prompt to send
+            ttl_seconds: Override the cache TTL for this prompt
+            deterministic: Use the temperature-0 client (for extraction and decisions)
+            
+        Returns:
+            The completion text
+        """
+        llm = self.deterministic_llm if deterministic else self.llm
+        if not self._should_cache(deterministic):
+            return await self._complete(prompt, llm)
+        
+        key = self._cache_key(prompt, 0.0 if deterministic else None)
+        cached = await llm_cache.get(self.name, key)
+        if cached is not None:
+            return cached
+        content = await self._complete(prompt, llm)
+        await llm_cache.set(self.name, key, content, ttl_seconds)
+        return content
+    
+    async def _complete(self, prompt: str, llm: Optional[ChatGroq] = None) -> str:
+        """
+        Call the LLM through the shared rate limiter, bounded by the call timeout
+        and request deadline, and hedged when a call outlives the agent's p95
+        """
+        llm = llm or self.llm
+        priority = call_priority(self.llm_priority)
+        response = await llm_call_policy.run(
+            self.name,
+            lambda: llm.ainvoke(prompt),
+            limiter=lambda call: llm_rate_limiter.call(call, priority=priority)
+        )
+        return response.content
+    
+    async def _generate_sections(
+        self,
+        prompt: str,
+        headers: Sequence[str],
+        publish_map: Optional[Dict[str, Tuple[str, ...]]] = None
+    ) -> str:
+        """
+        Generate a sectioned completion, publishing sections as they complete
+        
+        In streaming mode each ``HEADER:`` section is published to the running
+        pipeline under the context keys in ``publish_map`` as soon as the next
+        header arrives, so consumers of those keys can start early.
+        
+        Args:
+            prompt: Prompt to send
+            headers: Every section header the completion may contain
+            publish_map: Header -> context keys to publish the section under
+            
+        Returns:
+            The full completion text
+        """
+        if not self.streaming or not hasattr(self.llm, "astream"):
+            return await self._invoke(prompt)
+        
+        publish_map = publish_map or {}
+        parser = SectionStreamParser(headers)
+        
+        def publish_sections(sections):
+            for header, text in sections:
+                for key in publish_map.get(header, ()):
+                    publish(key, text)
+        
+        key = self._cache_key(prompt) if self._should_cache(False) else None
+        cached = await llm_cache.get(self.name, key) if key else None
+        if cached is not None:
+            publish_sections(parser.feed(cached))
+            publish_sections(parser.close())
+            return parser.text
+        
+        received = False
+        
+        async def stream():
+            nonlocal received
+            async for chunk in self.llm.astream(prompt):
+                received = True
+                publish_sections(parser.feed(chunk.content or ""))
+        
+        # Sections may already be published, so streams are never hedged and
+        # only failures before the first chunk are retried
+        priority = call_priority(self.llm_priority)
+        await llm_call_policy.run(
+            self.name,
+            stream,
+            hedge=False,
+            limiter=lambda call: llm_rate_limiter.call(call, priority=priority, retryable=lambda _error: not received)
+        )
+        publish_sections(parser.close())
+        if key:
+            await llm_cache.set(self.name, key, parser.text)
+        return parser.text
+    
     def _build_prompt(self, template: str, **kwargs) -> str:
         """Build a prompt from template and variables"""
         return template.format(**kwargs)
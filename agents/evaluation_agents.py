@@ -1,10 +1,67 @@
-from typing import Dict, Any
-from agents.base_agent import BaseAgent
+from typing import Dict, Any, Awaitable, Tuple
+import asyncio
+import os
+import time
+from agents.base_agent import DEGRADED_TEXT, BaseAgent
+from evaluation.metrics import get_evaluation_metrics
+
+
+# Shared by the separate and fused critic prompts
+REVENUE_CRITERIA = """Identify UNREALISTIC ASSUMPTIONS in these categories:
+
+1. PRICING ASSUMPTIONS:
+   - Is the pricing too optimistic?
+   - Are conversion rates realistic?
+   - Is willingness to pay validated?
+
+2. GROWTH ASSUMPTIONS:
+   - Are growth rates achievable?
+   - Is customer acquisition timeline realistic?
+   - Are scaling assumptions justified?
+
+3. MARKET SIZE ASSUMPTIONS:
+   - Is TAM/SAM/SOM realistic?
+   - Are market penetration rates achievable?"""
+
+REVENUE_FORMAT = """UNREALISTIC_ASSUMPTIONS: [YES/NO]
+SEVERITY: [LOW/MEDIUM/HIGH/CRITICAL]
+ISSUES: [comma-separated list of specific issues, or "NONE"]
+ADJUSTMENT_NEEDED: [percentage points to reduce success probability, 0-30]
+REASONING: [2-3 sentences explaining the issues]"""
+
+COMPETITION_CRITERIA = """Assess competition intensity based on:
+
+1. NUMBER OF COMPETITORS:
+   - How many direct competitors exist?
+   - Are there dominant players?
+
+2. MARKET SATURATION:
+   - Is the market crowded?
+   - Are there clear market leaders?
+
+3. BARRIERS TO ENTRY:
+   - How easy is it for new entrants?
+   - What competitive advantages exist?
+
+4. DIFFERENTIATION:
+   - Is the value proposition unique?
+   - Can competitors easily replicate?"""
+
+COMPETITION_FORMAT = """COMPETITION_LEVEL: [LOW/MEDIUM/HIGH/EXTREME]
+MARKET_SATURATION: [LOW/MEDIUM/HIGH]
+DIFFERENTIATION_STRENGTH: [WEAK/MODERATE/STRONG]
+RED_FLAGS: [comma-separated list of major concerns, or "NONE"]
+ADJUSTMENT_NEEDED: [percentage points to reduce success probability, 0-25]
+REASONING: [2-3 sentences explaining the assessment]"""
 
 
 class SuccessProbabilityAgent(BaseAgent):
     """Agent that calculates success probability"""
     
+    stage_name = "success_probability"
+    reads = ("idea", "market_analysis", "competition_analysis", "revenue_model", "cost_structure", "go_to_market")
+    writes = ("success_analysis", "success_probability", "best_location")
+    
     def __init__(self):
         super().__init__(
             name="Success Probability Analyst",
@@ -82,8 +139,7 @@ REASONING: [2-3 sentences explaining the score and location choice]""",
             gtm_strategy=gtm_strategy[:800]
         )
         
-        response = await self.llm.ainvoke(prompt)
-        content = response.content
+        content = await self._invoke(prompt)
         
         # Parse the response
         success_probability = 50.0  # default
@@ -105,16 +161,43 @@ REASONING: [2-3 sentences explaining the score and location choice]""",
             "best_location": best_location,
             "reasoning": content
         }
+    
+    async def run_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        result = await super().run_stage(context)
+        context["success_probability"] = result["success_probability"]
+        context["best_location"] = result["best_location"]
+        return result
+    
+    def fallback_outputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        best_location = context.get("target_market") or "global"
+        return {
+            "success_analysis": {
+                "success_probability": 50.0,
+                "best_location": best_location,
+                "reasoning": DEGRADED_TEXT
+            },
+            "success_probability": 50.0,
+            "best_location": best_location
+        }
 
 
 class CriticAgent(BaseAgent):
     """Enhanced critic agent that reviews, identifies issues, and adjusts success probability"""
     
+    stage_name = "critic"
+    reads = ("idea", "full_report")
+    writes = ("critique", "adjusted_success_probability", "probability_adjustment")
+    
     def __init__(self):
         super().__init__(
             name="Critic",
             role="Critical reviewer and quality assurance expert"
         )
+        # "concurrent": revenue and competition reviews as two parallel calls
+        # "fused": both reviews from a single structured call
+        self.mode = os.getenv("CRITIC_MODE", "concurrent").lower()
+        if self.mode not in ("concurrent", "fused"):
+            raise ValueError(f"Unknown CRITIC_MODE '{self.mode}', expected 'concurrent' or 'fused'")
     
     async def _analyze_revenue_assumptions(self, revenue_model: str, market_analysis: str) -> Dict[str, Any]:
         """
@@ -135,32 +218,15 @@ Revenue Model:
 Market Context:
 {market_analysis[:1000]}
 
-Identify UNREALISTIC ASSUMPTIONS in these categories:
-
-1. PRICING ASSUMPTIONS:
-   - Is the pricing too optimistic?
-   - Are conversion rates realistic?
-   - Is willingness to pay validated?
-
-2. GROWTH ASSUMPTIONS:
-   - Are growth rates achievable?
-   - Is customer acquisition timeline realistic?
-   - Are scaling assumptions justified?
-
-3. MARKET SIZE ASSUMPTIONS:
-   - Is TAM/SAM/SOM realistic?
-   - Are market penetration rates achievable?
+{REVENUE_CRITERIA}
 
 Respond in this EXACT format:
-UNREALISTIC_ASSUMPTIONS: [YES/NO]
-SEVERITY: [LOW/MEDIUM/HIGH/CRITICAL]
-ISSUES: [comma-separated list of specific issues, or "NONE"]
-ADJUSTMENT_NEEDED: [percentage points to reduce success probability, 0-30]
-REASONING: [2-3 sentences explaining the issues]"""
+{REVENUE_FORMAT}"""
 
-        response = await self.llm.ainvoke(prompt)
-        content = response.content
-        
+        return self._parse_revenue_analysis(await self._invoke(prompt))
+    
+    def _parse_revenue_analysis(self, content: str) -> Dict[str, Any]:
+        """Parse a revenue assumptions review"""
         has_issues = False
         severity = "LOW"
         issues = []
@@ -216,35 +282,15 @@ Competition Analysis:
 Market Analysis:
 {market_analysis[:1000]}
 
-Assess competition intensity based on:
-
-1. NUMBER OF COMPETITORS:
-   - How many direct competitors exist?
-   - Are there dominant players?
-
-2. MARKET SATURATION:
-   - Is the market crowded?
-   - Are there clear market leaders?
-
-3. BARRIERS TO ENTRY:
-   - How easy is it for new entrants?
-   - What competitive advantages exist?
-
-4. DIFFERENTIATION:
-   - Is the value proposition unique?
-   - Can competitors easily replicate?
+{COMPETITION_CRITERIA}
 
 Respond in this EXACT format:
-COMPETITION_LEVEL: [LOW/MEDIUM/HIGH/EXTREME]
-MARKET_SATURATION: [LOW/MEDIUM/HIGH]
-DIFFERENTIATION_STRENGTH: [WEAK/MODERATE/STRONG]
-RED_FLAGS: [comma-separated list of major concerns, or "NONE"]
-ADJUSTMENT_NEEDED: [percentage points to reduce success probability, 0-25]
-REASONING: [2-3 sentences explaining the assessment]"""
+{COMPETITION_FORMAT}"""
 
-        response = await self.llm.ainvoke(prompt)
-        content = response.content
-        
+        return self._parse_competition_analysis(await self._invoke(prompt))
+    
+    def _parse_competition_analysis(self, content: str) -> Dict[str, Any]:
+        """Parse a competition intensity review"""
         competition_level = "MEDIUM"
         saturation = "MEDIUM"
         differentiation = "MODERATE"
@@ -285,6 +331,60 @@ REASONING: [2-3 sentences explaining the assessment]"""
             "reasoning": reasoning
         }
     
+    async def _analyze_revenue_and_competition(
+        self,
+        revenue_model: str,
+        competition_analysis: str,
+        market_analysis: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Review revenue assumptions and competition intensity in a single LLM call
+        
+        Args:
+            revenue_model: Revenue model analysis
+            competition_analysis: Competition analysis
+            market_analysis: Market analysis
+            
+        Returns:
+            (revenue_analysis, competition_analysis) in the same shape as the separate reviews
+        """
+        prompt = f"""You are a revenue model and competitive intelligence expert. Review this startup's revenue model for unrealistic assumptions and assess its competition intensity.
+
+Revenue Model:
+{revenue_model[:1500]}
+
+Competition Analysis:
+{competition_analysis[:1500]}
+
+Market Context:
+{market_analysis[:1000]}
+
+PART 1 - REVENUE ASSUMPTIONS. {REVENUE_CRITERIA}
+
+PART 2 - COMPETITION. {COMPETITION_CRITERIA}
+
+Respond in this EXACT format, with both blocks:
+REVENUE_REVIEW:
+{REVENUE_FORMAT}
+COMPETITION_REVIEW:
+{COMPETITION_FORMAT}"""
+
+        content = await self._invoke(prompt)
+        
+        # Both blocks use ADJUSTMENT_NEEDED/REASONING, so parse each half on its own
+        revenue_part, _, competition_part = content.partition("COMPETITION_REVIEW:")
+        return self._parse_revenue_analysis(revenue_part), self._parse_competition_analysis(competition_part)
+    
+    async def _timed(self, call: str, awaitable: Awaitable[Any], started: float) -> Any:
+        """Await a sub-call and record its timing in the evaluation metrics"""
+        begin = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            get_evaluation_metrics().add_subcall_metrics(
+                self.name, call, (time.perf_counter() - begin) * 1000, (begin - started) * 1000
+            )
+    
     async def execute(self, context: Dict[str, Any]) -> str:
         """
         Review the complete feasibility report, identify issues, and adjust success probability
@@ -298,20 +398,40 @@ REASONING: [2-3 sentences explaining the assessment]"""
         idea = context.get("idea", "")
         report = context.get("full_report", {})
         original_probability = report.get("success_probability", 50.0)
+        started = time.perf_counter()
         
-        # Step 1: Analyze revenue assumptions
-        print("  Analyzing revenue assumptions...")
-        revenue_analysis = await self._analyze_revenue_assumptions(
-            report.get("revenue_model", ""),
-            report.get("market_analysis", "")
-        )
-        
-        # Step 2: Analyze competition intensity
-        print("  Analyzing competition intensity...")
-        competition_analysis = await self._analyze_competition_intensity(
-            report.get("competition_analysis", ""),
-            report.get("market_analysis", "")
-        )
+        # Steps 1-2: Analyze revenue assumptions and competition intensity (independent reviews)
+        if self.mode == "fused":
+            print("  Analyzing revenue assumptions and competition intensity (single call)...")
+            revenue_analysis, competition_analysis = await self._timed(
+                "revenue_and_competition",
+                self._analyze_revenue_and_competition(
+                    report.get("revenue_model", ""),
+                    report.get("competition_analysis", ""),
+                    report.get("market_analysis", "")
+                ),
+                started
+            )
+        else:
+            print("  Analyzing revenue assumptions and competition intensity concurrently...")
+            revenue_analysis, competition_analysis = await asyncio.gather(
+                self._timed(
+                    "revenue_assumptions",
+                    self._analyze_revenue_assumptions(
+                        report.get("revenue_model", ""),
+                        report.get("market_analysis", "")
+                    ),
+                    started
+                ),
+                self._timed(
+                    "competition_intensity",
+                    self._analyze_competition_intensity(
+                        report.get("competition_analysis", ""),
+                        report.get("market_analysis", "")
+                    ),
+                    started
+                )
+            )
         
         # Step 3: Calculate total adjustment
         total_adjustment = revenue_analysis["adjustment"] + competition_analysis["adjustment"]
@@ -429,7 +549,7 @@ Be constructive but brutally honest. Focus on actionable insights.""",
             competition_reasoning=competition_analysis["reasoning"]
         )
         
-        response = await self.llm.ainvoke(prompt)
+        critique = await self._timed("critique", self._invoke(prompt), started)
         
         # Build final critique with metadata
         critique_report = f"""CRITICAL REVIEW AND ADJUSTMENTS
@@ -451,7 +571,16 @@ COMPETITION INTENSITY REVIEW:
 - {competition_analysis['reasoning']}
 
 DETAILED CRITIQUE:
-{response.content}
+{critique}
 """
         
         return critique_report
+    
+    def fallback_outputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Keep an adjustment already computed from the reviews, otherwise leave the score as is
+        original_probability = context.get("full_report", {}).get("success_probability", 50.0)
+        return {
+            "critique": DEGRADED_TEXT,
+            "adjusted_success_probability": original_probability,
+            "probability_adjustment": 0
+        }
@@ -1,11 +1,15 @@
 from typing import Any, Dict
 
-from agents.base_agent import BaseAgent
+from agents.base_agent import DEGRADED_TEXT, BaseAgent
 
 
 class FinancialStrategyAgent(BaseAgent):
     """Unified agent for revenue model and cost structure."""
 
+    stage_name = "financial_strategy"
+    reads = ("idea", "plan", "market_trends", "industry", "target_market", "similar_ideas_context")
+    writes = ("financial_strategy", "revenue_model", "cost_structure")
+
     def __init__(self):
         super().__init__(
             name="Financial Strategist",
@@ -44,8 +48,11 @@ Keep numbers realistic and concise.""",
             similar_context=similar_context[:600],
         )
 
-        response = await self.llm.ainvoke(prompt)
-        content = response.content
+        content = await self._generate_sections(
+            prompt,
+            ["REVENUE_MODEL", "COST_STRUCTURE", "SUMMARY"],
+            {"REVENUE_MODEL": ("revenue_model",), "COST_STRUCTURE": ("cost_structure",)},
+        )
 
         return {
             "revenue_model_summary": self._extract_section(content, "REVENUE_MODEL"),
@@ -54,6 +61,26 @@ Keep numbers realistic and concise.""",
             "full_output": content,
         }
 
+    async def run_stage(self, context: Dict[str, Any]) -> Dict[str, str]:
+        result = await super().run_stage(context)
+        # Flat keys consumed by downstream agents and the response schema
+        context["revenue_model"] = result.get("revenue_model_summary") or result.get("full_output", "")
+        context["cost_structure"] = result.get("cost_structure_summary", "")
+        return result
+
+    def fallback_outputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Keep any sections that streamed in before the deadline
+        flat = {key: context.get(key) or DEGRADED_TEXT for key in self.writes[1:]}
+        return {
+            "financial_strategy": {
+                "revenue_model_summary": flat["revenue_model"],
+                "cost_structure_summary": flat["cost_structure"],
+                "summary": DEGRADED_TEXT,
+                "full_output": "",
+            },
+            **flat,
+        }
+
     @staticmethod
     def _extract_section(content: str, header: str) -> str:
         marker = f"{header}:"
@@ -0,0 +1,304 @@
+"""
+Content-addressed cache for LLM completions
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from runtime.offload import run_io
+
+load_dotenv()
+
+
+class LLMCacheBackend:
+    """Interface for completion storage; values are completion texts"""
+
+    # Whether get/set block on I/O and should run on the offload pool
+    blocking = True
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryLLMCacheBackend(LLMCacheBackend):
+    """Process-local LRU with per-entry expiry"""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 2000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteLLMCacheBackend(LLMCacheBackend):
+    """SQLite store shared by every worker process on the host"""
+
+    def __init__(self, path: str, max_entries: int = 20000, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self._clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed_idx ON llm_cache (accessed_at)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = self._clock()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        now = self._clock()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now),
+            )
+            count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisLLMCacheBackend(LLMCacheBackend):
+    """
+    Store shared across hosts through any Redis-compatible server
+
+    The client only needs ``get``, ``set(key, value, ex=seconds)`` and
+    ``close``, so a local stand-in (Valkey, KeyDB, or an in-process fake) can
+    take Redis's place.
+    """
+
+    def __init__(self, client: Any, prefix: str = "llm_cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "llm_cache:") -> "RedisLLMCacheBackend":
+        """
+        Connect with the ``redis`` package
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("LLM_CACHE_BACKEND=redis requires the 'redis' package") from e
+        return cls(redis.Redis.from_url(url), prefix=prefix)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl_seconds)))
+
+    def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+class LLMResponseCache:
+    """
+    Completion cache keyed by a hash of (model, temperature, prompt)
+
+    Agents opt in with ``BaseAgent.cache_responses``; ``agents`` (from
+    LLM_CACHE_AGENTS) overrides those defaults with an explicit list of stage
+    names, or "*" for every agent. Lookup failures are treated as misses so a
+    cache outage never fails an analysis.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[LLMCacheBackend],
+        ttl_seconds: float = 7 * 24 * 3600,
+        agents: Optional[Set[str]] = None,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.agents = agents
+        # agent name -> [hits, misses]
+        self._counts: Dict[str, list] = {}
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        """Build a cache from LLM_CACHE_* environment variables"""
+        kind = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+        if kind == "none":
+            backend = None
+        elif kind == "memory":
+            backend = MemoryLLMCacheBackend(max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000")))
+        elif kind == "sqlite":
+            backend = SQLiteLLMCacheBackend(
+                os.getenv("LLM_CACHE_PATH", os.path.join(os.getcwd(), "llm_cache.sqlite3")),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")),
+            )
+        elif kind == "redis":
+            backend = RedisLLMCacheBackend.from_url(os.getenv("LLM_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            raise ValueError(f"Unknown LLM_CACHE_BACKEND '{kind}', expected 'memory', 'sqlite', 'redis' or 'none'")
+
+        agents_env = os.getenv("LLM_CACHE_AGENTS", "").strip()
+        agents = {name.strip() for name in agents_env.split(",") if name.strip()} if agents_env else None
+        return cls(
+            backend=backend,
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            agents=agents,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def enabled_for(self, stage_name: str, default: bool) -> bool:
+        """Whether an agent's completions are cached"""
+        if not self.enabled:
+            return False
+        if self.agents is None:
+            return default
+        return "*" in self.agents or stage_name in self.agents
+
+    @staticmethod
+    def key(model: str, temperature: float, prompt: str) -> str:
+        """Content address of a completion request"""
+        payload = json.dumps([model, temperature, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _call(self, fn: Callable, *args):
+        if self.backend.blocking:
+            return await run_io(fn, *args)
+        return fn(*args)
+
+    async def get(self, agent: str, key: str) -> Optional[str]:
+        """
+        Look up a completion
+
+        Args:
+            agent: Agent name (for per-agent hit rates)
+            key: Result of ``key()``
+
+        Returns:
+            The cached completion text, or None
+        """
+        counts = self._counts.setdefault(agent, [0, 0])
+        try:
+            value = await self._call(self.backend.get, key)
+        except Exception as e:
+            self.errors += 1
+            print(f"LLM cache lookup failed: {e}")
+            value = None
+        counts[0 if value is not None else 1] += 1
+        return value
+
+    async def set(self, agent: str, key: str, value: str, ttl_seconds: Optional[float] = None):
+        """
+        Store a completion
+
+        Args:
+            agent: Agent name
+            key: Result of ``key()``
+            value: Completion text
+            ttl_seconds: Override the default TTL
+        """
+        try:
+            await self._call(self.backend.set, key, value, ttl_seconds or self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            print(f"LLM cache store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for this process"""
+        hits = sum(c[0] for c in self._counts.values())
+        lookups = hits + sum(c[1] for c in self._counts.values())
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": hits,
+            "misses": lookups - hits,
+            "errors": self.errors,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "agents": {
+                agent: {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else 0.0}
+                for agent, (h, m) in self._counts.items()
+            },
+        }
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+
+# Global instance
+llm_cache = LLMResponseCache.from_env()
@@ -0,0 +1,201 @@
+"""
+Process-wide registry of pooled LLM clients
+"""
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_groq import ChatGroq
+
+from agents.rate_limiter import LLMRateLimiter, llm_rate_limiter
+
+load_dotenv()
+
+
+class LLMClientRegistry:
+    """
+    Shares one ChatGroq per (model, temperature) and one HTTP pool across agents
+
+    Every client draws from a single keep-alive ``httpx.AsyncClient``, so
+    connections and TLS sessions to the LLM API are reused across agents and
+    requests instead of being set up per agent. HTTP/2 is negotiated when the
+    ``h2`` package is installed. The pool reaches ChatGroq through a
+    ``groq.AsyncGroq`` passed as its ``async_client`` field, which every
+    langchain-groq release (including the pinned 0.0.1) keeps when preset.
+    If httpx or the groq SDK is unavailable, the ChatGroq instances are still
+    shared but each keeps its SDK's default pool.
+
+    The SDK's own retries are disabled (``max_retries=0``) so 429s and 5xx
+    reach ``rate_limiter``, which owns backoff and the AIMD window, and every
+    response on the pool (successful ones included) feeds its rate-limit
+    headers to the limiter.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 60.0,
+        rate_limiter: Optional[LLMRateLimiter] = None,
+        transport: Optional[Any] = None,
+        base_url: str = "https://api.groq.com",
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip("/")
+        self._transport = transport
+        self._clients: Dict[Tuple[str, float], ChatGroq] = {}
+        self._http_client: Optional[Any] = None
+        # Clients whose async calls go through the shared pool
+        self._pooled = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMClientRegistry":
+        """Build a registry from LLM_HTTP_* environment variables"""
+        return cls(
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")),
+            http2=os.getenv("LLM_HTTP2_ENABLED", "true").lower() == "true",
+            timeout=float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60")),
+            rate_limiter=llm_rate_limiter,
+            base_url=os.getenv("GROQ_BASE_URL", "https://api.groq.com"),
+        )
+
+    def _shared_http_client(self) -> Optional[Any]:
+        if self._http_client is None:
+            try:
+                import httpx
+            except ImportError:
+                print("httpx not installed; LLM clients use their default connection pools")
+                return None
+            self._http_client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                event_hooks={"response": [self._observe_response]},
+                transport=self._transport,
+            )
+        return self._http_client
+
+    async def _observe_response(self, response: Any):
+        """Let the rate limiter see x-ratelimit-* / Retry-After on every response"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe_headers(response.headers)
+
+    def _async_completions(self, api_key: str) -> Optional[Any]:
+        """Groq SDK async completions resource on the shared pool, or None without one"""
+        try:
+            import groq
+        except ImportError:
+            print("groq SDK not installed; LLM clients use their default connection pools")
+            return None
+        http_client = self._shared_http_client()
+        if http_client is None:
+            return None
+        return groq.AsyncGroq(
+            api_key=api_key, http_client=http_client, timeout=self.timeout, max_retries=0
+        ).chat.completions
+
+    async def warm_up(self) -> bool:
+        """
+        Open a connection on the shared pool with a cheap authenticated request
+
+        Lists the provider's models, so DNS, TLS (and HTTP/2) setup and the API
+        key check happen before the first analysis rather than during it.
+
+        Returns:
+            True once a pooled connection is open, False if there is no shared pool
+
+        Raises:
+            ValueError: If GROQ_API_KEY is not set
+            httpx.HTTPStatusError: If the provider rejects the request
+        """
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise ValueError("GROQ_API_KEY must be set in environment variables")
+        http_client = self._shared_http_client()
+        if http_client is None:
+            return False
+        response = await http_client.get(
+            f"{self.base_url}/openai/v1/models", headers={"Authorization": f"Bearer {api_key}"}
+        )
+        response.raise_for_status()
+        return True
+
+    def get(self, model: str, temperature: float) -> ChatGroq:
+        """
+        Get the shared client for a model and temperature
+
+        Args:
+            model: Groq model name
+            temperature: Sampling temperature
+
+        Returns:
+            A ChatGroq instance shared by every agent with the same settings
+
+        Raises:
+            ValueError: If GROQ_API_KEY is not set
+        """
+        key = (model, temperature)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                return client
+
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                raise ValueError("GROQ_API_KEY must be set in environment variables")
+
+            # Retries belong to the rate limiter, not the SDK
+            kwargs: Dict[str, Any] = {
+                "groq_api_key": api_key, "model_name": model, "temperature": temperature, "max_retries": 0
+            }
+            completions = self._async_completions(api_key)
+            if completions is not None:
+                kwargs["async_client"] = completions
+            client = ChatGroq(**kwargs)
+            if completions is not None:
+                if getattr(client, "async_client", None) is completions:
+                    self._pooled += 1
+                else:
+                    print("ChatGroq replaced the pooled async client; it uses its SDK's default pool")
+            self._clients[key] = client
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        """Get registry and connection pool settings"""
+        return {
+            "clients": [f"{model}@{temperature}" for model, temperature in self._clients],
+            "shared_http_pool": self._http_client is not None,
+            "pooled_clients": self._pooled,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+        }
+
+    async def aclose(self):
+        """Close the shared connection pool and forget cached clients"""
+        with self._lock:
+            http_client, self._http_client = self._http_client, None
+            self._clients.clear()
+            self._pooled = 0
+        if http_client is not None:
+            await http_client.aclose()
+
+
+# Global instance
+llm_clients = LLMClientRegistry.from_env()
@@ -1,11 +1,18 @@
 from typing import Any, Dict
 
-from agents.base_agent import BaseAgent
+from agents.base_agent import DEGRADED_TEXT, BaseAgent
 
 
 class MarketIntelligenceAgent(BaseAgent):
     """Unified agent for market demand, audience, and competition insights."""
 
+    stage_name = "market_intelligence"
+    reads = ("idea", "plan", "market_trends", "similar_ideas_context")
+    writes = (
+        "market_intelligence", "market_analysis", "target_audience",
+        "competition_analysis", "audience_profile", "competition_landscape",
+    )
+
     def __init__(self):
         super().__init__(
             name="Market Intelligence Analyst",
@@ -39,8 +46,15 @@ Use practical assumptions and avoid filler.""",
             similar_context=similar_context[:1200],
         )
 
-        response = await self.llm.ainvoke(prompt)
-        content = response.content
+        content = await self._generate_sections(
+            prompt,
+            ["MARKET_DEMAND", "AUDIENCE_PROFILE", "COMPETITION_LANDSCAPE", "SUMMARY"],
+            {
+                "MARKET_DEMAND": ("market_analysis",),
+                "AUDIENCE_PROFILE": ("target_audience", "audience_profile"),
+                "COMPETITION_LANDSCAPE": ("competition_analysis", "competition_landscape"),
+            },
+        )
 
         return {
             "market_demand": self._extract_section(content, "MARKET_DEMAND"),
@@ -50,6 +64,30 @@ Use practical assumptions and avoid filler.""",
             "full_output": content,
         }
 
+    async def run_stage(self, context: Dict[str, Any]) -> Dict[str, str]:
+        result = await super().run_stage(context)
+        # Flat keys consumed by downstream agents and the response schema
+        context["market_analysis"] = result.get("market_demand") or result.get("full_output", "")
+        context["target_audience"] = result.get("audience_profile", "")
+        context["competition_analysis"] = result.get("competition_landscape", "")
+        context["audience_profile"] = context["target_audience"]
+        context["competition_landscape"] = context["competition_analysis"]
+        return result
+
+    def fallback_outputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Keep any sections that streamed in before the deadline
+        flat = {key: context.get(key) or DEGRADED_TEXT for key in self.writes[1:]}
+        return {
+            "market_intelligence": {
+                "market_demand": flat["market_analysis"],
+                "audience_profile": flat["audience_profile"],
+                "competition_landscape": flat["competition_landscape"],
+                "summary": DEGRADED_TEXT,
+                "full_output": "",
+            },
+            **flat,
+        }
+
     @staticmethod
     def _extract_section(content: str, header: str) -> str:
         marker = f"{header}:"
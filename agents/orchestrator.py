@@ -1,8 +1,9 @@
-from typing import Dict, Any, Tuple
-import asyncio
+from typing import Dict, Any, Callable, List, Optional, Union
+import os
 import time
 
 from agents import (
+    BaseAgent,
     PlannerAgent,
     MarketIntelligenceAgent,
     FinancialStrategyAgent,
@@ -10,13 +11,34 @@ from agents import (
     SuccessProbabilityAgent,
     CriticAgent,
 )
+from agents.pipeline import Stage, StageGraph
+from agents.rate_limiter import analysis_scope
 from rag.retrieval import rag_service
+from rag.semantic_cache import semantic_cache, METADATA_KEY
+from runtime.deadline import deadline_scope
 from models.schemas import FeasibilityReport, FeasibilityResponse
-from evaluation.metrics import evaluation_tracker
+from evaluation.metrics import EvaluationMetrics, evaluation_context
 from evaluation.confidence import ConfidenceScorer
 from evaluation.hallucination import HallucinationDetector
 
 
+# Context keys available before the first stage runs
+INITIAL_CONTEXT_KEYS = ("idea", "industry", "target_market", "similar_ideas_context", "similar_ideas")
+
+# on_event(event, payload)
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def _emit(on_event: Optional[EventCallback], event: str, payload: Dict[str, Any]):
+    """Deliver a progress event, never letting a listener break the analysis"""
+    if on_event is None:
+        return
+    try:
+        on_event(event, payload)
+    except Exception as e:
+        print(f"Progress listener error on {event}: {e}")
+
+
 class AgentOrchestrator:
     """Orchestrates the multi-agent workflow for feasibility analysis with evaluation tracking"""
 
@@ -27,28 +49,230 @@ class AgentOrchestrator:
         self.gtm_strategist = GTMAgent()
         self.success_analyst = SuccessProbabilityAgent()
         self.critic = CriticAgent()
+        self.extra_stages: List[Stage] = []
+        # Default time budget for one analysis (0 disables the deadline)
+        self.deadline_seconds = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "120"))
+
+    @property
+    def agents(self) -> List[BaseAgent]:
+        """All agents managed by the orchestrator"""
+        return [
+            self.planner,
+            self.market_intelligence_agent,
+            self.financial_strategy_agent,
+            self.gtm_strategist,
+            self.success_analyst,
+            self.critic,
+        ]
+
+    def register_stage(self, stage: Union[Stage, BaseAgent]):
+        """
+        Add a stage to the analysis pipeline
+        
+        The stage runs as soon as the stages writing its ``reads`` have finished;
+        its ``writes`` become available to stages registered later.
+        
+        Args:
+            stage: A Stage, or an agent declaring reads/writes
+            
+        Raises:
+            ValueError: If the resulting graph is invalid
+        """
+        stage = stage.as_stage() if isinstance(stage, BaseAgent) else stage
+        self.extra_stages.append(stage)
+        try:
+            self.build_graph().validate(INITIAL_CONTEXT_KEYS)
+        except ValueError:
+            self.extra_stages.pop()
+            raise
+
+    def build_graph(self) -> StageGraph:
+        """Build the stage graph from the built-in agents and registered stages"""
+        return StageGraph([
+            self.planner.as_stage(),
+            self.market_intelligence_agent.as_stage(),
+            self.financial_strategy_agent.as_stage(),
+            self.gtm_strategist.as_stage(),
+            self.success_analyst.as_stage(),
+            Stage(
+                name="report_assembly",
+                run=self._assemble_report,
+                reads=(
+                    "market_intelligence", "financial_strategy", "go_to_market", "market_analysis",
+                    "target_audience", "competition_analysis", "revenue_model", "cost_structure",
+                    "success_probability", "best_location",
+                ),
+                writes=("full_report",),
+            ),
+            self.critic.as_stage(),
+            *self.extra_stages,
+        ])
+
+    @staticmethod
+    async def _assemble_report(context: Dict[str, Any]):
+        """Combine the agent outputs into the report reviewed by the critic"""
+        context["full_report"] = {
+            "market_intelligence": context["market_intelligence"],
+            "financial_strategy": context["financial_strategy"],
+            "go_to_market": context["go_to_market"],
+            "critique": "",
+            # legacy keys consumed by critic internals
+            "market_analysis": context["market_analysis"],
+            "target_audience": context["target_audience"],
+            "competition_analysis": context["competition_analysis"],
+            "revenue_model": context["revenue_model"],
+            "cost_structure": context["cost_structure"],
+            "success_probability": context["success_probability"],
+            "best_location": context["best_location"],
+        }
+
+    def _record_stage_metrics(
+        self,
+        metrics: EvaluationMetrics,
+        stage: Stage,
+        context: Dict[str, Any],
+        duration_ms: float,
+    ) -> Optional[Dict[str, Any]]:
+        """Record token, timing and confidence metrics for a finished stage"""
+        name = stage.name
+
+        if name == "report_assembly":
+            return None
+
+        if name == "planner":
+            label, output = "Planner", context["plan"]
+            confidence = ConfidenceScorer.calculate_planner_confidence(
+                output,
+                industry_extracted=context.get("extracted_industry") is not None,
+                location_extracted=context.get("extracted_location") is not None,
+                search_performed=context.get("search_decision", {}).get("search_needed", False),
+                search_results_count=len(context.get("search_results", [])),
+            )
+        elif name == "critic":
+            label, output = "Critic", context["critique"]
+            confidence = ConfidenceScorer.calculate_critic_confidence(
+                output,
+                revenue_issues_found=context.get("probability_adjustment", 0) > 0,
+                competition_issues_found=context.get("probability_adjustment", 0) > 0,
+                adjustment_made=context.get("adjusted_success_probability") is not None,
+            )
+        else:
+            if name == "success_probability":
+                label, output = "Success Probability Analyst", context["success_analysis"]["reasoning"]
+            else:
+                result = context.get(stage.writes[0]) if stage.writes else ""
+                output = result["full_output"] if isinstance(result, dict) and "full_output" in result else str(result)
+                label = name.replace("_", " ").title()
+            confidence = ConfidenceScorer.calculate_analysis_confidence(
+                output,
+                plan_available=True,
+                market_trends_available=bool(context.get("market_trends")),
+                similar_ideas_count=len(context.get("similar_ideas", [])),
+            )
 
-    async def _timed_execute(self, label: str, coro) -> Tuple[str, Any, float]:
-        start = time.time()
-        result = await coro
-        duration_ms = (time.time() - start) * 1000
-        return label, result, duration_ms
+        tokens = ConfidenceScorer.estimate_tokens(output)
+        metrics.add_agent_metrics(label, tokens, duration_ms, confidence)
+        return {"agent": label, "tokens": tokens, "confidence": round(confidence, 3)}
 
     async def analyze_startup_idea(
         self,
         idea: str,
         industry: str = "general",
-        target_market: str = "global"
+        target_market: str = "global",
+        force_refresh: bool = False,
+        on_event: Optional[EventCallback] = None,
+        deadline_seconds: Optional[float] = None
     ) -> FeasibilityResponse:
-        evaluation_tracker.reset()
-        evaluation_tracker.start_tracking()
+        """
+        Run the full analysis for an idea
+        
+        Args:
+            idea: The startup idea
+            industry: Industry sector
+            target_market: Target market or geography
+            force_refresh: Bypass the semantic result cache
+            on_event: Called as on_event(event, payload) as the analysis progresses
+                (retrieval, cache_hit, stage_started, partial, stage_completed, result)
+            deadline_seconds: Time budget for the analysis (defaults to ANALYSIS_DEADLINE_SECONDS);
+                stages still running when it passes return partial results
+            
+        Returns:
+            The feasibility response
+        """
+        # Each analysis gets its own tracker so concurrent requests on the
+        # same worker never overwrite each other's metrics. Its LLM calls are
+        # prioritised by when it started, so in-progress analyses finish first.
+        if deadline_seconds is None:
+            deadline_seconds = self.deadline_seconds
+        with evaluation_context() as metrics, analysis_scope(), deadline_scope(deadline_seconds):
+            return await self._run_analysis(metrics, idea, industry, target_market, force_refresh, on_event)
+
+    def _cached_response(
+        self,
+        metrics: EvaluationMetrics,
+        idea: str,
+        cached_row: Dict[str, Any],
+        similar_ideas: List[Dict[str, Any]],
+    ) -> FeasibilityResponse:
+        """Build a response from a stored near-duplicate analysis"""
+        stored_report = cached_row["report"]
+        metadata = stored_report.get(METADATA_KEY, {})
+        report = FeasibilityReport(**{k: v for k, v in stored_report.items() if k != METADATA_KEY})
+
+        metrics.set_result_cache_metrics(
+            cache_hit=True,
+            source_row=cached_row,
+            age_seconds=semantic_cache.clock() - float(metadata.get("analyzed_at", 0)),
+        )
+        metrics.overall_confidence = metadata.get("overall_confidence", 0.0)
+        metrics.hallucination_risk = metadata.get("hallucination_risk", "LOW")
+        metrics.end_tracking()
+        metrics.print_summary()
+
+        print(f"Analysis served from result cache (stored idea {cached_row.get('id')})")
+        return FeasibilityResponse(
+            idea=idea,
+            report=report,
+            similar_ideas=[item.get("idea", "")[:100] + "..." for item in similar_ideas[:3]],
+            sources_used=metadata.get("sources_used", []),
+            critique=metadata.get("critique"),
+            evaluation_metrics=metrics.get_summary(),
+            hallucination_report=metadata.get("hallucination_report"),
+        )
+
+    async def _run_analysis(
+        self,
+        metrics: EvaluationMetrics,
+        idea: str,
+        industry: str,
+        target_market: str,
+        force_refresh: bool = False,
+        on_event: Optional[EventCallback] = None,
+    ) -> FeasibilityResponse:
+        metrics.start_tracking()
 
         print("Retrieving similar ideas from database...")
         retrieval_start = time.time()
-        similar_ideas = await rag_service.retrieve_similar_ideas(idea)
+        # Embed once; the same vector is reused for retrieval and storage
+        idea_embedding = await rag_service.embed_idea(idea)
+        similar_ideas = await rag_service.retrieve_similar_ideas(idea, embedding=idea_embedding)
         retrieval_time_ms = (time.time() - retrieval_start) * 1000
         similar_context = rag_service.build_context_from_similar_ideas(similar_ideas)
-        evaluation_tracker.set_retrieval_metrics(similar_ideas, retrieval_time_ms)
+        metrics.set_retrieval_metrics(similar_ideas, retrieval_time_ms)
+        _emit(on_event, "retrieval", {
+            "similar_ideas_count": len(similar_ideas),
+            "top_similarity": similar_ideas[0].get("similarity", 0.0) if similar_ideas else 0.0,
+            "duration_ms": round(retrieval_time_ms, 2),
+        })
+
+        # Near-duplicate of a fresh stored analysis: skip the LLM pipeline
+        cached_row = semantic_cache.lookup(similar_ideas, industry, target_market, force_refresh=force_refresh)
+        if cached_row is not None:
+            _emit(on_event, "cache_hit", {"source_id": cached_row.get("id"), "similarity": cached_row.get("similarity")})
+            response = self._cached_response(metrics, idea, cached_row, similar_ideas)
+            _emit(on_event, "result", response.model_dump())
+            return response
+        metrics.set_result_cache_metrics(cache_hit=False, force_refresh=force_refresh)
 
         context: Dict[str, Any] = {
             "idea": idea,
@@ -58,120 +282,33 @@ class AgentOrchestrator:
             "similar_ideas": similar_ideas,
         }
 
-        print("Planning analysis strategy...")
-        planner_start = time.time()
-        context["plan"] = await self.planner.execute(context)
-        planner_time_ms = (time.time() - planner_start) * 1000
+        print("Running analysis pipeline...")
+        graph = self.build_graph()
 
-        planner_confidence = ConfidenceScorer.calculate_planner_confidence(
-            context["plan"],
-            industry_extracted=context.get("extracted_industry") is not None,
-            location_extracted=context.get("extracted_location") is not None,
-            search_performed=context.get("search_decision", {}).get("search_needed", False),
-            search_results_count=len(context.get("search_results", [])),
-        )
-        evaluation_tracker.add_agent_metrics(
-            "Planner",
-            ConfidenceScorer.estimate_tokens(context["plan"]),
-            planner_time_ms,
-            planner_confidence,
-        )
+        def on_stage_event(event: str, name: str, payload: Dict[str, Any]):
+            if event == "stage_completed":
+                stage = graph.stages[name]
+                agent_metrics = self._record_stage_metrics(metrics, stage, context, payload["duration_ms"])
+                outputs = {key: context[key] for key in stage.writes if isinstance(context.get(key), (str, int, float))}
+                _emit(on_event, "stage_completed", {"stage": name, **payload, "metrics": agent_metrics, "outputs": outputs})
+            elif event == "section":
+                _emit(on_event, "partial", {"stage": name, **payload})
+            else:
+                _emit(on_event, event, {"stage": name, **payload})
+
+        pipeline_run = await graph.run(context, listener=on_stage_event)
+        metrics.set_pipeline_metrics(pipeline_run)
+        print(f"Pipeline critical path: {' -> '.join(pipeline_run.critical_path)} ({pipeline_run.total_ms:.0f}ms)")
 
         search_decision = context.get("search_decision", {})
-        evaluation_tracker.set_search_metrics(
+        metrics.set_search_metrics(
             search_performed=search_decision.get("search_needed", False),
             queries=search_decision.get("queries", []),
             results=context.get("search_results", []),
-            search_time_ms=planner_time_ms * 0.3,
+            search_time_ms=context.get("search_time_ms", 0.0),
         )
 
-        print("Running core agents in parallel...")
-        parallel_results = await asyncio.gather(
-            self._timed_execute("market_intelligence", self.market_intelligence_agent.execute(context)),
-            self._timed_execute("financial_strategy", self.financial_strategy_agent.execute(context)),
-            self._timed_execute("go_to_market", self.gtm_strategist.execute(context)),
-        )
-
-        for label, result, duration in parallel_results:
-            context[label] = result
-            confidence = ConfidenceScorer.calculate_analysis_confidence(
-                result["full_output"] if isinstance(result, dict) and "full_output" in result else str(result),
-                plan_available=True,
-                market_trends_available=bool(context.get("market_trends")),
-                similar_ideas_count=len(similar_ideas),
-            )
-            tokens = ConfidenceScorer.estimate_tokens(
-                result["full_output"] if isinstance(result, dict) and "full_output" in result else str(result)
-            )
-            evaluation_tracker.add_agent_metrics(label.replace("_", " ").title(), tokens, duration, confidence)
-
-        market_intelligence = context["market_intelligence"]
-        financial_strategy = context["financial_strategy"]
-
-        # Keep legacy fields for downstream compatibility and response schema
-        context["market_analysis"] = market_intelligence.get("market_demand") or market_intelligence.get("full_output", "")
-        context["target_audience"] = market_intelligence.get("audience_profile", "")
-        context["competition_analysis"] = market_intelligence.get("competition_landscape", "")
-        context["revenue_model"] = financial_strategy.get("revenue_model_summary") or financial_strategy.get("full_output", "")
-        context["cost_structure"] = financial_strategy.get("cost_structure_summary", "")
-        context["go_to_market"] = context["go_to_market"] if isinstance(context["go_to_market"], str) else str(context["go_to_market"])
-
-        # Feed richer context after market intelligence exists
-        context["financial_strategy"] = financial_strategy.get("full_output", "")
-        context["audience_profile"] = context["target_audience"]
-        context["competition_landscape"] = context["competition_analysis"]
-
-        print("Calculating success probability...")
-        success_start = time.time()
-        success_data = await self.success_analyst.execute(context)
-        success_time_ms = (time.time() - success_start) * 1000
-        context["success_probability"] = success_data["success_probability"]
-        context["best_location"] = success_data["best_location"]
-        evaluation_tracker.add_agent_metrics(
-            "Success Probability Analyst",
-            ConfidenceScorer.estimate_tokens(success_data["reasoning"]),
-            success_time_ms,
-            ConfidenceScorer.calculate_analysis_confidence(
-                success_data["reasoning"],
-                plan_available=True,
-                market_trends_available=bool(context.get("market_trends")),
-                similar_ideas_count=len(similar_ideas),
-            ),
-        )
-
-        combined_report = {
-            "market_intelligence": market_intelligence,
-            "financial_strategy": financial_strategy,
-            "go_to_market": context["go_to_market"],
-            "critique": "",
-            # legacy keys consumed by critic internals
-            "market_analysis": context["market_analysis"],
-            "target_audience": context["target_audience"],
-            "competition_analysis": context["competition_analysis"],
-            "revenue_model": context["revenue_model"],
-            "cost_structure": context["cost_structure"],
-            "success_probability": context["success_probability"],
-            "best_location": context["best_location"],
-        }
-
-        print("Reviewing report quality...")
-        critic_start = time.time()
-        context["full_report"] = combined_report
-        critique = await self.critic.execute(context)
-        critic_time_ms = (time.time() - critic_start) * 1000
-        combined_report["critique"] = critique
-
-        evaluation_tracker.add_agent_metrics(
-            "Critic",
-            ConfidenceScorer.estimate_tokens(critique),
-            critic_time_ms,
-            ConfidenceScorer.calculate_critic_confidence(
-                critique,
-                revenue_issues_found=context.get("probability_adjustment", 0) > 0,
-                competition_issues_found=context.get("probability_adjustment", 0) > 0,
-                adjustment_made=context.get("adjusted_success_probability") is not None,
-            ),
-        )
+        critique = context["critique"]
 
         if context.get("adjusted_success_probability") is not None:
             context["success_probability"] = context["adjusted_success_probability"]
@@ -188,29 +325,27 @@ class AgentOrchestrator:
         )
 
         print("Calculating evaluation metrics...")
-        _ = evaluation_tracker.calculate_overall_confidence()
-        _ = evaluation_tracker.assess_hallucination_risk()
+        _ = metrics.calculate_overall_confidence()
+        _ = metrics.assess_hallucination_risk()
 
         hallucination_report = HallucinationDetector.generate_hallucination_report(
             search_performed=context.get("search_decision", {}).get("search_needed", False),
             search_results_count=len(context.get("search_results", [])),
             similar_ideas_count=len(similar_ideas),
-            top_similarity_score=evaluation_tracker.retrieval_metrics.top_similarity_score if evaluation_tracker.retrieval_metrics else 0.0,
+            top_similarity_score=metrics.retrieval_metrics.top_similarity_score if metrics.retrieval_metrics else 0.0,
             market_analysis=context.get("market_analysis", ""),
             competition_analysis=context.get("competition_analysis", ""),
             revenue_model=context.get("revenue_model", ""),
         )
 
-        evaluation_tracker.end_tracking()
-
-        print("Storing report in database...")
-        await rag_service.store_idea_with_report(idea, report.model_dump())
+        metrics.end_tracking()
 
         sources_used = [r["query"] for r in context.get("search_results", [])] if context.get("search_results") else []
+
         similar_idea_descriptions = [item.get("idea", "")[:100] + "..." for item in similar_ideas[:3]]
-        evaluation_summary = evaluation_tracker.get_summary()
+        evaluation_summary = metrics.get_summary()
 
-        evaluation_tracker.print_summary()
+        metrics.print_summary()
         HallucinationDetector.print_hallucination_report(hallucination_report)
 
         response = FeasibilityResponse(
@@ -222,6 +357,31 @@ class AgentOrchestrator:
             evaluation_metrics=evaluation_summary,
             hallucination_report=hallucination_report,
         )
+        # Streaming clients get the report before the database write
+        _emit(on_event, "result", response.model_dump())
+
+        # Reports with placeholder sections must not be served to later near-duplicates
+        if metrics.degraded_stages:
+            print(f"Skipping storage of partial report (degraded: {', '.join(metrics.degraded_stages)})")
+            return response
+
+        print("Storing report in database...")
+        stored_report = report.model_dump()
+        stored_report[METADATA_KEY] = semantic_cache.build_metadata(
+            industry,
+            target_market,
+            critique=critique,
+            sources_used=sources_used,
+            hallucination_report=hallucination_report,
+            overall_confidence=metrics.overall_confidence,
+            hallucination_risk=metrics.hallucination_risk,
+        )
+        try:
+            # Queued for the background writer when it is running
+            await rag_service.store_idea_with_report(idea, stored_report, embedding=idea_embedding)
+        except Exception as e:
+            # The analysis is finished; a storage failure must not fail the request
+            print(f"Error storing report: {e}")
 
         print("Analysis complete!")
         return response
@@ -0,0 +1,257 @@
+"""
+Declarative stage graph for the analysis pipeline
+
+Each stage declares the context keys it reads and writes. The graph derives
+the dependencies from those declarations and starts every stage as soon as
+the stages producing its inputs have finished, or as soon as a running
+stage publishes those inputs early.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass
+class Stage:
+    """A unit of work in the pipeline"""
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageTiming:
+    """When a stage ran, relative to the start of the pipeline"""
+    name: str
+    start_ms: float
+    end_ms: float
+
+    @property
+    def duration_ms(self) -> float:
+        return self.end_ms - self.start_ms
+
+
+@dataclass
+class PipelineRun:
+    """Timings and critical path of one pipeline execution"""
+    timings: Dict[str, StageTiming] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    total_ms: float = 0.0
+
+
+# listener(event, stage_name, payload)
+StageListener = Callable[[str, str, Dict[str, Any]], None]
+
+
+class StageGraph:
+    """
+    Dependency-aware scheduler for pipeline stages
+
+    A stage depends on every stage that writes one of the keys it reads.
+    Keys no stage writes must be present in the initial context. Two stages
+    may not write the same key, and the graph must be acyclic.
+    """
+
+    def __init__(self, stages: Optional[Iterable[Stage]] = None):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: Stage):
+        """
+        Add a stage to the graph
+
+        Args:
+            stage: Stage to add
+
+        Raises:
+            ValueError: If the name is taken or a written key already has a producer
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage name '{stage.name}'")
+        producers = self.producers()
+        for key in stage.writes:
+            if key in producers:
+                raise ValueError(f"Stages '{producers[key]}' and '{stage.name}' both write '{key}'")
+        self.stages[stage.name] = stage
+
+    def producers(self) -> Dict[str, str]:
+        """Map each written context key to the stage that writes it"""
+        return {key: stage.name for stage in self.stages.values() for key in stage.writes}
+
+    def dependencies(self) -> Dict[str, Set[str]]:
+        """Map each stage to the stages it waits for"""
+        producers = self.producers()
+        return {
+            stage.name: {producers[key] for key in stage.reads if key in producers and producers[key] != stage.name}
+            for stage in self.stages.values()
+        }
+
+    def validate(self, initial_keys: Iterable[str]) -> List[str]:
+        """
+        Check that every input is available and the graph is acyclic
+
+        Args:
+            initial_keys: Context keys present before the pipeline starts
+
+        Returns:
+            Stage names in a valid execution order
+
+        Raises:
+            ValueError: On a missing input or a dependency cycle
+        """
+        available = set(initial_keys) | set(self.producers())
+        for stage in self.stages.values():
+            missing = [key for key in stage.reads if key not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' reads {missing}, which no stage writes")
+
+        deps = self.dependencies()
+        order: List[str] = []
+        remaining = {name: set(d) for name, d in deps.items()}
+        while remaining:
+            ready = sorted(name for name, d in remaining.items() if not d)
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for d in remaining.values():
+                d.difference_update(ready)
+        return order
+
+    async def run(self, context: Dict[str, Any], listener: Optional[StageListener] = None) -> PipelineRun:
+        """
+        Run every stage as soon as its inputs are available
+
+        An input is available once its producer finishes, or earlier if the
+        producer publishes it mid-run (see ``publish``).
+
+        Args:
+            context: Shared context; stages read from and write to it
+            listener: Called as listener(event, stage_name, payload) for
+                "stage_started", "section" (a published key) and "stage_completed"
+
+        Returns:
+            Per-stage timings and the measured critical path
+
+        Raises:
+            Exception: The first stage failure (remaining stages are cancelled)
+        """
+        self.validate(context.keys())
+        producers = self.producers()
+        run = PipelineRun()
+        start = time.perf_counter()
+        # Initial keys are ready unless a stage rewrites them
+        ready_keys: Dict[str, float] = {key: 0.0 for key in context if key not in producers}
+        gated_by: Dict[str, Optional[str]] = {}
+        done: Set[str] = set()
+        running: Dict[asyncio.Task, str] = {}
+
+        def elapsed_ms() -> float:
+            return (time.perf_counter() - start) * 1000
+
+        def notify(event: str, name: str, payload: Dict[str, Any]):
+            if listener is None:
+                return
+            try:
+                listener(event, name, payload)
+            except Exception as e:
+                print(f"Pipeline listener error on {event} for '{name}': {e}")
+
+        def inputs_ready(stage: Stage) -> bool:
+            return all(key in ready_keys for key in stage.reads if producers.get(key) != stage.name)
+
+        def launch_ready():
+            for name, stage in self.stages.items():
+                if name not in run.timings and inputs_ready(stage):
+                    gating = [key for key in stage.reads if producers.get(key) not in (None, name)]
+                    last_key = max(gating, key=lambda key: ready_keys[key], default=None)
+                    gated_by[name] = producers[last_key] if last_key else None
+                    run.timings[name] = StageTiming(name, elapsed_ms(), 0.0)
+                    running[asyncio.create_task(execute(stage))] = name
+                    notify("stage_started", name, {"start_ms": run.timings[name].start_ms, "waited_for": gated_by[name]})
+
+        def publish_key(stage: Stage, key: str, value: Any):
+            if key not in stage.writes:
+                raise ValueError(f"Stage '{stage.name}' published '{key}', which it does not declare in writes")
+            context[key] = value
+            notify("section", stage.name, {"key": key, "value": value})
+            if key not in ready_keys:
+                ready_keys[key] = elapsed_ms()
+                launch_ready()
+
+        async def execute(stage: Stage):
+            token = _publisher.set(lambda key, value: publish_key(stage, key, value))
+            try:
+                await stage.run(context)
+            finally:
+                _publisher.reset(token)
+            timing = run.timings[stage.name]
+            timing.end_ms = elapsed_ms()
+            missing = [key for key in stage.writes if key not in context]
+            if missing:
+                print(f"Warning: stage '{stage.name}' did not write {missing}")
+            notify("stage_completed", stage.name, {
+                "start_ms": timing.start_ms,
+                "end_ms": timing.end_ms,
+                "duration_ms": timing.duration_ms,
+            })
+
+        try:
+            launch_ready()
+            while running:
+                finished, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    task.result()
+                    done.add(name)
+                    for key in self.stages[name].writes:
+                        ready_keys.setdefault(key, run.timings[name].end_ms)
+                launch_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        run.total_ms = elapsed_ms()
+        run.critical_path = self._critical_path(run.timings, gated_by)
+        return run
+
+    @staticmethod
+    def _critical_path(timings: Dict[str, StageTiming], gated_by: Dict[str, Optional[str]]) -> List[str]:
+        """Walk back from the last stage to finish through the stage whose output it waited for last"""
+        if not timings:
+            return []
+        path = [max(timings.values(), key=lambda t: t.end_ms).name]
+        while gated_by.get(path[-1]):
+            path.append(gated_by[path[-1]])
+        return list(reversed(path))
+
+
+_publisher: ContextVar[Optional[Callable[[str, Any], None]]] = ContextVar("stage_publisher", default=None)
+
+
+def publish(key: str, value: Any) -> bool:
+    """
+    Publish a declared output before the current stage finishes
+
+    Stages waiting only on already-published keys start immediately. Outside
+    a pipeline run this is a no-op.
+
+    Args:
+        key: Context key (must be in the stage's writes)
+        value: Value to store in the context
+
+    Returns:
+        True if the value was published to a running pipeline
+    """
+    publisher = _publisher.get()
+    if publisher is None:
+        return False
+    publisher(key, value)
+    return True
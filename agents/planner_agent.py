@@ -1,5 +1,8 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import os
 import re
+import time
 from agents.base_agent import BaseAgent
 from tools.web_search import web_search_tool
 
@@ -7,11 +10,29 @@ from tools.web_search import web_search_tool
 class PlannerAgent(BaseAgent):
     """Enhanced planner agent with intelligent extraction and conditional web search"""
     
+    stage_name = "planner"
+    reads = ("idea", "industry", "target_market", "similar_ideas_context")
+    writes = (
+        "plan", "extracted_industry", "extracted_location", "market_trends", "search_results",
+        "structured_context", "search_decision", "search_time_ms", "industry", "target_market",
+    )
+    # Extraction and search decisions depend only on the idea, so repeat ideas reuse them;
+    # the sampled plan draft is never served from the cache
+    cache_responses = True
+    cache_deterministic_only = True
+    # Queue behind analyses that are already past planning
+    llm_priority = 1
+    
     def __init__(self):
         super().__init__(
             name="Planner",
             role="Strategic planner and orchestrator"
         )
+        # "fast": one extraction + search decision call, web search overlapped with plan drafting
+        # "sequential": separate extraction, decision, search and plan steps
+        self.mode = os.getenv("PLANNER_MODE", "fast").lower()
+        if self.mode not in ("fast", "sequential"):
+            raise ValueError(f"Unknown PLANNER_MODE '{self.mode}', expected 'fast' or 'sequential'")
     
     async def _extract_industry_and_location(self, idea: str, industry: Optional[str], target_market: Optional[str]) -> Dict[str, str]:
         """
@@ -42,10 +63,10 @@ If the industry is unclear, categorize it based on the core business model.
 
 Be specific and concise. One or two words for industry, one region for location."""
 
-        response = await self.llm.ainvoke(extraction_prompt)
-        content = response.content
-        
-        # Parse the response
+        return self._parse_extraction(await self._invoke(extraction_prompt, deterministic=True), industry, target_market)
+    
+    def _parse_extraction(self, content: str, industry: Optional[str], target_market: Optional[str]) -> Dict[str, str]:
+        """Parse INDUSTRY/LOCATION lines, falling back to the provided values"""
         extracted_industry = industry if industry and industry != "general" else "general"
         extracted_location = target_market if target_market and target_market != "global" else "global"
         
@@ -94,9 +115,10 @@ SEARCH_NEEDED: [YES/NO]
 REASON: [one sentence explaining why]
 SEARCH_QUERIES: [comma-separated list of 2-3 specific search queries, or "NONE"]"""
 
-        response = await self.llm.ainvoke(decision_prompt)
-        content = response.content
-        
+        return self._parse_search_decision(await self._invoke(decision_prompt, deterministic=True))
+    
+    def _parse_search_decision(self, content: str) -> Dict[str, Any]:
+        """Parse SEARCH_NEEDED/REASON/SEARCH_QUERIES lines (defaults to searching)"""
         # Default to performing search
         search_needed = True
         reason = "Market research required"
@@ -122,76 +144,117 @@ SEARCH_QUERIES: [comma-separated list of 2-3 specific search queries, or "NONE"]
             "queries": search_queries
         }
     
-    async def execute(self, context: Dict[str, Any]) -> str:
+    async def _extract_and_decide(
+        self,
+        idea: str,
+        industry: Optional[str],
+        target_market: Optional[str],
+        similar_context: str
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
         """
-        Create an analysis plan with intelligent extraction and conditional web search
+        Extract industry/location and decide on web search in a single LLM call
         
         Args:
-            context: Dictionary containing 'idea', 'industry', 'target_market', 'similar_ideas_context'
+            idea: The startup idea
+            industry: Provided industry (if any)
+            target_market: Provided target market (if any)
+            similar_context: Context from similar ideas
             
         Returns:
-            Analysis plan and structured context
+            (extraction, search_decision) in the same shape as
+            _extract_industry_and_location and _decide_web_search
         """
-        idea = context.get("idea", "")
-        industry = context.get("industry", "general")
-        target_market = context.get("target_market", "global")
-        similar_context = context.get("similar_ideas_context", "")
-        
-        # Step 1: Extract industry and location if not provided or generic
-        print("  Extracting industry and location...")
-        extraction = await self._extract_industry_and_location(idea, industry, target_market)
-        extracted_industry = extraction["industry"]
-        extracted_location = extraction["location"]
-        
-        # Update context with extracted information
-        context["extracted_industry"] = extracted_industry
-        context["extracted_location"] = extracted_location
+        provided = bool(industry and industry != "general" and target_market and target_market != "global")
+        combined_prompt = f"""You are a research strategist preparing a startup feasibility analysis.
+
+Startup Idea: {idea}
+Provided Industry: {industry or "general"}
+Provided Target Market: {target_market or "global"}
+
+Similar Ideas Context Available: {"Yes" if similar_context else "No"}
+
+1. Extract the industry and geographic market. Keep the provided values unless they are generic
+   ("general" / "global"); otherwise infer the most likely ones from the idea.
+2. Decide if live web search is NECESSARY based on:
+   - Is this a rapidly evolving industry? (AI, crypto, emerging tech = YES)
+   - Are market trends critical to validation? (market-dependent ideas = YES)
+   - Is the idea time-sensitive or trend-based? (YES)
+   - Do we have sufficient similar context? (If yes = MAYBE NO)
+
+Respond in this EXACT format:
+INDUSTRY: [specific industry/sector, e.g., "fintech", "healthtech", "e-commerce", "SaaS", "edtech"]
+LOCATION: [geographic market, e.g., "United States", "Europe", "Southeast Asia", "Global"]
+SEARCH_NEEDED: [YES/NO]
+REASON: [one sentence explaining why]
+SEARCH_QUERIES: [comma-separated list of 2-3 specific search queries, or "NONE"]"""
+
+        content = await self._invoke(combined_prompt, deterministic=True)
         
-        print(f"  Industry: {extracted_industry} | Location: {extracted_location}")
+        if provided:
+            extraction = {"industry": industry, "location": target_market}
+        else:
+            extraction = self._parse_extraction(content, industry, target_market)
+        return extraction, self._parse_search_decision(content)
+    
+    async def _run_web_search(
+        self,
+        idea: str,
+        industry: str,
+        location: str,
+        search_decision: Dict[str, Any],
+        context: Dict[str, Any]
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Run the searches chosen by the search decision
         
-        # Step 2: Decide whether to perform web search
-        print("  Deciding on web search necessity...")
-        search_decision = await self._decide_web_search(idea, extracted_industry, similar_context)
+        Args:
+            idea: The startup idea
+            industry: Extracted industry
+            location: Extracted location
+            search_decision: Output of the search decision
+            context: Pipeline context (receives search_time_ms)
+            
+        Returns:
+            (market_trends, search_results)
+        """
+        if not search_decision["search_needed"]:
+            print(f"  Skipping web search: {search_decision['reason']}")
+            return "Web search skipped - sufficient context from similar ideas.", []
         
-        market_trends = ""
-        search_results = []
+        print(f"  Web search needed: {search_decision['reason']}")
         
-        if search_decision["search_needed"]:
-            print(f"  Web search needed: {search_decision['reason']}")
-            
-            # Use LLM-suggested queries or fall back to defaults
-            if search_decision["queries"]:
-                search_queries = search_decision["queries"]
-            else:
-                search_queries = [
-                    f"{extracted_industry} market trends 2026",
-                    f"{idea[:100]} market analysis",
-                    f"startup opportunities in {extracted_location}"
-                ]
-            
-            print(f"  Performing {len(search_queries)} searches...")
-            search_results = web_search_tool.multi_search(search_queries)
-            
-            # Compile search results
-            market_trends = "\n\n".join([
-                f"Query: {r['query']}\nResults: {r['results'][:500]}"
-                for r in search_results if r.get('results')
-            ])
+        # Use LLM-suggested queries or fall back to defaults
+        if search_decision["queries"]:
+            search_queries = search_decision["queries"]
         else:
-            print(f"  Skipping web search: {search_decision['reason']}")
-            market_trends = "Web search skipped - sufficient context from similar ideas."
+            search_queries = [
+                f"{industry} market trends 2026",
+                f"{idea[:100]} market analysis",
+                f"startup opportunities in {location}"
+            ]
         
-        # Step 3: Create structured context for execution agents
-        structured_context = {
-            "industry_type": extracted_industry,
-            "geographic_location": extracted_location,
-            "market_trends_available": bool(market_trends),
-            "similar_ideas_available": bool(similar_context),
-            "web_search_performed": search_decision["search_needed"],
-            "key_focus_areas": []
-        }
+        print(f"  Performing {len(search_queries)} searches concurrently...")
+        search_start = time.time()
+        search_results = await web_search_tool.amulti_search(search_queries)
+        context["search_time_ms"] = (time.time() - search_start) * 1000
         
-        # Step 4: Generate comprehensive analysis plan
+        # Compile search results
+        market_trends = "\n\n".join([
+            f"Query: {r['query']}\nResults: {r['results'][:500]}"
+            for r in search_results if r.get('results')
+        ])
+        return market_trends, search_results
+    
+    async def _draft_plan(
+        self,
+        idea: str,
+        industry: str,
+        location: str,
+        search_decision: Dict[str, Any],
+        similar_context: str,
+        market_trends_section: str
+    ) -> str:
+        """Generate the analysis plan that guides the execution agents"""
         prompt = self._build_prompt(
             """You are a strategic planner for startup feasibility analysis.
 
@@ -236,14 +299,85 @@ Create a comprehensive analysis plan that provides STRUCTURED GUIDANCE for execu
 
 Provide a structured, actionable plan that will guide the specialized agents.""",
             idea=idea,
-            industry=extracted_industry,
-            location=extracted_location,
+            industry=industry,
+            location=location,
             web_search="Yes" if search_decision["search_needed"] else "No",
             similar_context=similar_context if similar_context else "No similar ideas found.",
-            market_trends_section=f"LATEST MARKET TRENDS:\n{market_trends}" if market_trends else ""
+            market_trends_section=market_trends_section
         )
         
-        response = await self.llm.ainvoke(prompt)
+        return await self._invoke(prompt)
+    
+    async def execute(self, context: Dict[str, Any]) -> str:
+        """
+        Create an analysis plan with intelligent extraction and conditional web search
+        
+        In fast mode (PLANNER_MODE=fast) extraction and the search decision come
+        from one LLM call, and the plan is drafted while the web search runs; the
+        search results reach the execution agents through ``market_trends``.
+        
+        Args:
+            context: Dictionary containing 'idea', 'industry', 'target_market', 'similar_ideas_context'
+            
+        Returns:
+            Analysis plan and structured context
+        """
+        idea = context.get("idea", "")
+        industry = context.get("industry", "general")
+        target_market = context.get("target_market", "global")
+        similar_context = context.get("similar_ideas_context", "")
+        context["search_time_ms"] = 0.0
+        
+        # Step 1: Extract industry and location, and decide whether to perform web search
+        if self.mode == "fast":
+            print("  Extracting industry/location and deciding on web search...")
+            extraction, search_decision = await self._extract_and_decide(idea, industry, target_market, similar_context)
+        else:
+            print("  Extracting industry and location...")
+            extraction = await self._extract_industry_and_location(idea, industry, target_market)
+            search_decision = None
+        extracted_industry = extraction["industry"]
+        extracted_location = extraction["location"]
+        
+        # Update context with extracted information
+        context["extracted_industry"] = extracted_industry
+        context["extracted_location"] = extracted_location
+        
+        print(f"  Industry: {extracted_industry} | Location: {extracted_location}")
+        
+        if search_decision is None:
+            print("  Deciding on web search necessity...")
+            search_decision = await self._decide_web_search(idea, extracted_industry, similar_context)
+        
+        # Step 2: Web search and plan
+        if self.mode == "fast" and search_decision["search_needed"]:
+            # The plan only needs to know research is happening; agents get the results directly
+            plan, (market_trends, search_results) = await asyncio.gather(
+                self._draft_plan(
+                    idea, extracted_industry, extracted_location, search_decision, similar_context,
+                    "LATEST MARKET TRENDS: live web research is running alongside this plan "
+                    "and is passed to the execution agents directly."
+                ),
+                self._run_web_search(idea, extracted_industry, extracted_location, search_decision, context)
+            )
+        else:
+            market_trends, search_results = await self._run_web_search(
+                idea, extracted_industry, extracted_location, search_decision, context
+            )
+            plan = await self._draft_plan(
+                idea, extracted_industry, extracted_location, search_decision, similar_context,
+                f"LATEST MARKET TRENDS:\n{market_trends}" if market_trends else ""
+            )
+        
+        # Step 3: Create structured context for execution agents
+        structured_context = {
+            "industry_type": extracted_industry,
+            "geographic_location": extracted_location,
+            "market_trends_available": bool(market_trends),
+            "similar_ideas_available": bool(similar_context),
+            "web_search_performed": search_decision["search_needed"],
+            "key_focus_areas": []
+        }
         
         # Store all context for other agents
         context["market_trends"] = market_trends
@@ -255,4 +389,29 @@ Provide a structured, actionable plan that will guide the specialized agents."""
         context["industry"] = extracted_industry
         context["target_market"] = extracted_location
         
-        return response.content
+        return plan
+    
+    def fallback_outputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Proceed without a plan or web research, using the request's industry and market"""
+        industry = context.get("extracted_industry") or context.get("industry") or "general"
+        location = context.get("extracted_location") or context.get("target_market") or "global"
+        return {
+            "plan": "",
+            "extracted_industry": industry,
+            "extracted_location": location,
+            "market_trends": "",
+            "search_results": [],
+            "structured_context": {
+                "industry_type": industry,
+                "geographic_location": location,
+                "market_trends_available": False,
+                "similar_ideas_available": bool(context.get("similar_ideas_context")),
+                "web_search_performed": False,
+                "key_focus_areas": []
+            },
+            "search_decision": {"search_needed": False, "reason": "Skipped: deadline reached", "queries": []},
+            "search_time_ms": 0.0,
+            "industry": industry,
+            "target_market": location
+        }
+
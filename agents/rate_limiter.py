@@ -0,0 +1,355 @@
+"""
+Adaptive, priority-aware limiter for LLM API calls
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+TRANSIENT_STATUS_CODES = (500, 502, 503, 504)
+
+_analysis_started: ContextVar[Optional[float]] = ContextVar("analysis_started", default=None)
+
+
+@contextmanager
+def analysis_scope() -> Iterator[None]:
+    """
+    Mark the start of an analysis for call prioritisation
+
+    LLM calls made inside the block (including from tasks it spawns) are
+    ordered by this start time, so analyses already in progress are served
+    before ones that arrived later.
+    """
+    token = _analysis_started.set(time.monotonic())
+    try:
+        yield
+    finally:
+        _analysis_started.reset(token)
+
+
+def call_priority(level: int = 0) -> Tuple[int, float]:
+    """
+    Priority key for an LLM call (lower is served first)
+
+    Args:
+        level: Agent priority level (e.g. 1 for planners, 0 for everything else)
+    """
+    started = _analysis_started.get()
+    return level, started if started is not None else time.monotonic()
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse a rate-limit reset value ("1.5", "7.66s", "2m59.56s", "120ms") into seconds"""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _headers_of(error: BaseException) -> Mapping[str, str]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    Whether an exception is the provider rejecting a call with 429
+
+    Decided by the status code, or by the SDK's ``RateLimitError`` type
+    (e.g. ``groq.RateLimitError``) when no status is attached, never by the
+    message text, which can contain "429" in ids or token counts.
+    """
+    if _status_of(error) == 429:
+        return True
+    return any(cls.__name__ == "RateLimitError" for cls in type(error).__mro__)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an exception is worth retrying (429, 5xx, timeouts, dropped connections)"""
+    if is_rate_limited(error) or _status_of(error) in TRANSIENT_STATUS_CODES:
+        return True
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+class LLMRateLimiter:
+    """
+    Token bucket + AIMD concurrency window + priority queue for LLM calls
+
+    Calls wait in a priority queue until a concurrency slot and a token are
+    both available. The concurrency window grows by roughly one slot per
+    window of successful calls and halves on every 429 (AIMD), so it settles
+    just under whatever the provider currently accepts. ``Retry-After`` and
+    ``x-ratelimit-*`` headers pause dispatch until the provider's window
+    resets. Transient failures are retried with full-jitter exponential
+    backoff.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0.0,
+        burst: Optional[int] = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        max_retries: int = 4,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max_concurrency)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.enabled = enabled
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._last_refill = clock()
+        self._waiters: List[Tuple[Any, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.calls = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.failures = 0
+        self.header_pauses = 0
+        self.peak_queue_depth = 0
+        self.total_wait_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LLMRateLimiter":
+        """Build a limiter from LLM_RATE_LIMIT_* / LLM_*_CONCURRENCY / LLM_RETRY_* environment variables"""
+        burst = os.getenv("LLM_RATE_LIMIT_BURST")
+        return cls(
+            requests_per_minute=float(os.getenv("LLM_RATE_LIMIT_RPM", "0")),
+            burst=int(burst) if burst else None,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            min_concurrency=int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+            base_backoff=float(os.getenv("LLM_RETRY_BASE_SECONDS", "1.0")),
+            max_backoff=float(os.getenv("LLM_RETRY_MAX_SECONDS", "30")),
+            enabled=os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true",
+        )
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _schedule(self, delay: float):
+        loop = asyncio.get_running_loop()
+        when = loop.time() + max(delay, 0.001)
+        if self._timer is not None:
+            if self._timer_loop is loop and self._timer.when() <= when:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._on_timer)
+        self._timer_loop = loop
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant slots to waiters in priority order while capacity allows"""
+        now = self._clock()
+        self._refill(now)
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= int(self.limit):
+                return
+            if now < self.blocked_until:
+                self._schedule(self.blocked_until - now)
+                return
+            if self.rate > 0 and self.tokens < 1:
+                self._schedule((1 - self.tokens) / self.rate)
+                return
+            heapq.heappop(self._waiters)
+            if self.rate > 0:
+                self.tokens -= 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self, priority: Any = (0,)):
+        """
+        Wait for a concurrency slot and a rate token
+
+        Args:
+            priority: Sort key; lower values are served first
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.peak_queue_depth = max(self.peak_queue_depth, len(self._waiters))
+        self._dispatch()
+        start = self._clock()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation landed
+                self.release()
+            raise
+        self.total_wait_ms += (self._clock() - start) * 1000
+
+    def release(self, success: bool = False, rate_limited: bool = False, retry_after: Optional[float] = None):
+        """
+        Return a slot and adapt the concurrency window
+
+        Args:
+            success: The call completed (additive increase)
+            rate_limited: The call got a 429 (multiplicative decrease)
+            retry_after: Seconds the provider asked us to wait
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        if rate_limited:
+            self.rate_limited += 1
+            self.limit = max(float(self.min_concurrency), self.limit / 2)
+        elif success:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, self._clock() + retry_after)
+        self._dispatch()
+
+    def observe_headers(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Pause dispatch according to provider rate-limit headers
+
+        Called with the headers of failed calls and, through the shared LLM
+        HTTP pool, of every successful response too.
+
+        Args:
+            headers: Response headers (Retry-After, x-ratelimit-remaining-*, x-ratelimit-reset-*)
+
+        Returns:
+            Seconds until the provider's window resets, if the headers say to wait
+        """
+        headers = {k.lower(): v for k, v in dict(headers).items()}
+        wait = _parse_duration(headers.get("retry-after", ""))
+        for kind in ("requests", "tokens"):
+            if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+                if reset is not None:
+                    wait = max(wait or 0.0, reset)
+        if wait:
+            self.header_pauses += 1
+            self.blocked_until = max(self.blocked_until, self._clock() + wait)
+        return wait
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return self._rng() * min(self.max_backoff, self.base_backoff * (2 ** attempt))
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        priority: Any = (0,),
+        retryable: Optional[Callable[[BaseException], bool]] = None,
+    ) -> T:
+        """
+        Run an LLM call under the limiter, retrying transient failures
+
+        Args:
+            fn: Zero-argument coroutine function making the call
+            priority: Sort key; lower values are served first
+            retryable: Extra check that must also pass before a failure is retried
+
+        Returns:
+            The call's result
+
+        Raises:
+            Exception: The last failure once retries are exhausted, or any non-transient failure
+        """
+        if not self.enabled:
+            return await fn()
+
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            self.calls += 1
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self.release()
+                raise
+            except Exception as e:
+                limited = is_rate_limited(e)
+                retry_after = self.observe_headers(_headers_of(e))
+                self.release(rate_limited=limited, retry_after=retry_after)
+                if attempt >= self.max_retries or not is_transient(e) or (retryable and not retryable(e)):
+                    self.failures += 1
+                    raise
+                delay = max(retry_after or 0.0, self._backoff(attempt))
+                attempt += 1
+                self.retries += 1
+                print(f"LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await self._sleep(delay)
+                continue
+            self.release(success=True)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter state and counters"""
+        granted = self.calls
+        return {
+            "enabled": self.enabled,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "peak_queue_depth": self.peak_queue_depth,
+            "requests_per_minute": round(self.rate * 60, 2),
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "failures": self.failures,
+            "header_pauses": self.header_pauses,
+            "avg_wait_ms": round(self.total_wait_ms / granted, 2) if granted else 0.0,
+        }
+
+
+# Global instance
+llm_rate_limiter = LLMRateLimiter.from_env()
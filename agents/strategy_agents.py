@@ -6,6 +6,11 @@ from agents.base_agent import BaseAgent
 class GTMAgent(BaseAgent):
     """Agent specialized in go-to-market strategy"""
 
+    stage_name = "go_to_market"
+    # Waits for market intelligence and financial strategy sections instead of racing them
+    reads = ("idea", "audience_profile", "competition_landscape", "revenue_model", "cost_structure")
+    writes = ("go_to_market",)
+
     def __init__(self):
         super().__init__(
             name="GTM Strategist",
@@ -17,7 +22,9 @@ class GTMAgent(BaseAgent):
         idea = context.get("idea", "")
         audience = context.get("audience_profile", context.get("target_audience", ""))
         competition = context.get("competition_landscape", context.get("competition_analysis", ""))
-        finance = context.get("financial_strategy", context.get("revenue_model", ""))
+        finance = "\n".join(
+            part for part in (context.get("revenue_model", ""), context.get("cost_structure", "")) if part
+        )
 
         prompt = self._build_prompt(
             """You are a startup GTM expert.
@@ -41,5 +48,4 @@ Keep it actionable and short.""",
             finance=finance[:900],
         )
 
-        response = await self.llm.ainvoke(prompt)
-        return response.content
+        return await self._invoke(prompt)
@@ -0,0 +1,78 @@
+"""
+Incremental section parsing for streamed LLM output
+"""
+from typing import List, Optional, Sequence, Tuple
+
+
+class SectionStreamParser:
+    """
+    Splits a streamed completion into ``HEADER:`` sections as chunks arrive
+
+    A section is complete as soon as the next known header has fully arrived,
+    so it can be used before the rest of the completion is generated. Section
+    boundaries match the agents' ``_extract_section`` (text after ``HEADER:``
+    up to the next header, stripped).
+    """
+
+    def __init__(self, headers: Sequence[str]):
+        self.markers = {f"{header}:": header for header in headers}
+        self._longest_marker = max((len(marker) for marker in self.markers), default=0)
+        self._buffer = ""
+        self._scan_from = 0
+        self._current: Optional[str] = None
+        self._section_start = 0
+        self.emitted: List[str] = []
+
+    def _next_marker(self) -> Optional[Tuple[int, str]]:
+        found = None
+        for marker in self.markers:
+            position = self._buffer.find(marker, self._scan_from)
+            if position != -1 and (found is None or position < found[0]):
+                found = (position, marker)
+        return found
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Add a chunk of streamed text
+
+        Args:
+            chunk: Newly generated text
+
+        Returns:
+            (header, text) for every section completed by this chunk
+        """
+        self._buffer += chunk
+        completed = []
+        while True:
+            found = self._next_marker()
+            if found is None:
+                # A marker may straddle the next chunk boundary; rescan only that tail
+                self._scan_from = max(self._scan_from, len(self._buffer) - self._longest_marker + 1)
+                return completed
+            position, marker = found
+            if self._current is not None:
+                completed.append(self._close(self._buffer[self._section_start:position]))
+            self._current = self.markers[marker]
+            self._section_start = position + len(marker)
+            self._scan_from = self._section_start
+
+    def close(self) -> List[Tuple[str, str]]:
+        """
+        Finish the stream
+
+        Returns:
+            The last open section, if any
+        """
+        if self._current is None:
+            return []
+        return [self._close(self._buffer[self._section_start:])]
+
+    def _close(self, text: str) -> Tuple[str, str]:
+        header, self._current = self._current, None
+        self.emitted.append(header)
+        return header, text.strip()
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return self._buffer
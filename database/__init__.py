@@ -1,10 +1,23 @@
 """Database package for Supabase and vector operations"""
 from database.supabase_client import SupabaseClient, get_supabase_client
-from database.vector_db import VectorDB, vector_db
+from database.async_client import AsyncPostgrestClient, PostgrestError, async_db
+from database.vector_store import VectorStore
+from database.vector_db import VectorDB, create_vector_store, vector_db
+from database.local_store import LocalVectorStore
+from database.write_behind import ReportJournal, ReportWriteBehind, report_writer
 
 __all__ = [
     "SupabaseClient",
     "get_supabase_client",
+    "AsyncPostgrestClient",
+    "PostgrestError",
+    "async_db",
+    "VectorStore",
     "VectorDB",
-    "vector_db"
+    "LocalVectorStore",
+    "create_vector_store",
+    "vector_db",
+    "ReportJournal",
+    "ReportWriteBehind",
+    "report_writer"
 ]
@@ -0,0 +1,340 @@
+"""
+In-process approximate nearest-neighbour index mirroring startup_reports
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+
+class LocalVectorIndex:
+    """
+    IVF-Flat cosine index over a float16/float32 embedding matrix
+
+    Vectors are L2-normalised so cosine similarity is a dot product. Below
+    ``min_train_rows`` every query is an exact scan (already sub-millisecond
+    at that size); above it a k-means coarse quantiser with ~sqrt(N) lists is
+    trained and each query scans only the ``nprobe`` closest lists. Training
+    runs on a snapshot outside the lock, so searches keep using the previous
+    quantiser until the new one is swapped in.
+
+    The matrix, ids and trained quantiser (centroids and list assignments) are
+    persisted as .npy files. On load the matrix is memory-mapped and the
+    quantiser is read back rather than retrained, so a restarted worker serves
+    queries while reading only the probed lists' pages; the first insert copies
+    the matrix into a growable in-memory buffer. Supabase stays the source of
+    truth; this is a read-through mirror.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        dtype: str = "float16",
+        nprobe: int = 8,
+        min_train_rows: int = 2048,
+        path: Optional[str] = None,
+    ):
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        self.nprobe = max(1, nprobe)
+        self.min_train_rows = min_train_rows
+        self.path = path
+
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.ndarray] = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._size = 0
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_at_size = 0
+        self._training = False
+        # Bumped by load() and clear() so a training run over stale data is discarded
+        self._generation = 0
+
+    @classmethod
+    def from_env(cls) -> "LocalVectorIndex":
+        """Build an index from VECTOR_INDEX_* environment variables"""
+        return cls(
+            dtype=os.getenv("VECTOR_INDEX_DTYPE", "float16"),
+            nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+            min_train_rows=int(os.getenv("VECTOR_INDEX_MIN_TRAIN_ROWS", "2048")),
+            path=os.getenv("VECTOR_INDEX_PATH", os.path.join(os.getcwd(), "vector_index")),
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, row_id: int) -> bool:
+        return int(row_id) in self._rows
+
+    @property
+    def max_id(self) -> int:
+        """Highest mirrored row id (0 when empty)"""
+        return int(self._ids[:self._size].max()) if self._size else 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def _ensure_capacity(self, extra: int):
+        needed = self._size + extra
+        if self._vectors is not None and needed <= self._vectors.shape[0] and self._vectors.flags.writeable:
+            return
+        capacity = max(needed, 2 * (self._vectors.shape[0] if self._vectors is not None else 0), 1024)
+        vectors = np.zeros((capacity, self.dimension), dtype=self.dtype)
+        ids = np.zeros(capacity, dtype=np.int64)
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        if self._size:
+            vectors[:self._size] = self._vectors[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+            assignments[:self._size] = self._assignments[:self._size]
+        self._vectors, self._ids, self._assignments = vectors, ids, assignments
+
+    def add(self, rows: List[Dict[str, Any]]):
+        """
+        Add rows to the index
+
+        Args:
+            rows: Dicts with 'id', 'idea', 'report' and 'embedding' keys
+        """
+        with self._lock:
+            rows = [r for r in rows if r.get("embedding") is not None and int(r["id"]) not in self._rows]
+            if not rows:
+                return
+
+            matrix = np.asarray([r["embedding"] for r in rows], dtype=np.float32)
+            if self.dimension is None:
+                self.dimension = matrix.shape[1]
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dimension}"
+                )
+
+            matrix = self._normalize(matrix)
+            self._ensure_capacity(len(rows))
+            start, end = self._size, self._size + len(rows)
+            self._vectors[start:end] = matrix.astype(self.dtype)
+            self._ids[start:end] = [int(r["id"]) for r in rows]
+            for row in rows:
+                self._rows[int(row["id"])] = {"idea": row.get("idea", ""), "report": row.get("report") or {}}
+
+            if self._centroids is not None:
+                self._assignments[start:end] = np.argmax(matrix @ self._centroids.T, axis=1)
+            self._size = end
+
+            # Retrain once the index has doubled since the last training run
+            retrain = (
+                not self._training
+                and self._size >= self.min_train_rows
+                and self._size >= 2 * self._trained_at_size
+            )
+            if retrain:
+                self._training = True
+        if retrain:
+            self._train()
+
+    def _train(self, iterations: int = 10, sample_size: int = 50_000):
+        """
+        Train the k-means coarse quantiser and assign every row to a list
+
+        Works on a snapshot of the first ``size`` rows (which are never
+        rewritten) without holding the lock, then swaps the result in and
+        assigns any rows added meanwhile.
+        """
+        with self._lock:
+            self._training = True
+            vectors, size, generation = self._vectors, self._size, self._generation
+        try:
+            nlist = max(1, int(np.sqrt(size)))
+            rng = np.random.default_rng(0)
+            picks = np.sort(rng.choice(size, size=min(sample_size, size), replace=False))
+            sample = vectors[picks].astype(np.float32)
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for k in range(nlist):
+                    members = sample[labels == k]
+                    if len(members):
+                        centroids[k] = members.mean(axis=0)
+                centroids = self._normalize(centroids)
+
+            assignments = self._assign(vectors, 0, size, centroids)
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._assignments[:size] = assignments
+                self._assignments[size:self._size] = self._assign(self._vectors, size, self._size, centroids)
+                self._centroids = centroids
+                self._trained_at_size = self._size
+        finally:
+            with self._lock:
+                self._training = False
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, start: int, end: int, centroids: np.ndarray, chunk: int = 65_536) -> np.ndarray:
+        """Nearest list for rows [start, end), converting to float32 a chunk at a time"""
+        labels = np.empty(end - start, dtype=np.int32)
+        for i in range(start, end, chunk):
+            j = min(end, i + chunk)
+            labels[i - start:j - start] = np.argmax(vectors[i:j].astype(np.float32) @ centroids.T, axis=1)
+        return labels
+
+    def search(self, embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the most similar rows
+
+        Args:
+            embedding: Query embedding
+            top_k: Number of results
+
+        Returns:
+            Rows shaped like the search_similar_ideas RPC: id, idea, report, similarity
+        """
+        with self._lock:
+            if not self._size:
+                return []
+
+            query = np.asarray(embedding, dtype=np.float32)
+            if query.shape[0] != self.dimension:
+                raise ValueError(
+                    f"Query dimension {query.shape[0]} does not match index dimension {self.dimension}"
+                )
+            query = self._normalize(query)
+
+            if self._centroids is not None:
+                probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+                candidates = np.nonzero(np.isin(self._assignments[:self._size], probe))[0]
+            else:
+                candidates = np.arange(self._size)
+
+            scores = self._vectors[candidates].astype(np.float32) @ query
+            k = min(top_k, len(candidates))
+            if k == 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+
+            results = []
+            for position in best:
+                row_id = int(self._ids[candidates[position]])
+                row = self._rows[row_id]
+                results.append({
+                    "id": row_id,
+                    "idea": row["idea"],
+                    "report": row["report"],
+                    "similarity": float(scores[position]),
+                })
+            return results
+
+    def save(self):
+        """Persist the index atomically (vectors and ids as .npy for mmap loading)"""
+        if not self.path or self.dimension is None:
+            return
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            self._atomic_write(os.path.join(self.path, "vectors.npy"), self._vectors[:self._size])
+            self._atomic_write(os.path.join(self.path, "ids.npy"), self._ids[:self._size])
+            if self._centroids is not None:
+                self._atomic_write(os.path.join(self.path, "centroids.npy"), self._centroids)
+                self._atomic_write(os.path.join(self.path, "assignments.npy"), self._assignments[:self._size])
+            else:
+                self._remove_files("centroids.npy", "assignments.npy")
+            rows_path = os.path.join(self.path, "rows.json")
+            with open(rows_path + ".tmp", "w") as f:
+                json.dump({str(k): v for k, v in self._rows.items()}, f)
+            os.replace(rows_path + ".tmp", rows_path)
+            meta_path = os.path.join(self.path, "meta.json")
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump({
+                    "dimension": self.dimension,
+                    "dtype": self.dtype.name,
+                    "size": self._size,
+                    "trained_at_size": self._trained_at_size,
+                }, f)
+            os.replace(meta_path + ".tmp", meta_path)
+
+    @staticmethod
+    def _atomic_write(path: str, array: np.ndarray):
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+
+    def _remove_files(self, *names: str):
+        for name in names:
+            file_path = os.path.join(self.path, name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def load(self) -> bool:
+        """
+        Load a persisted index, memory-mapping the embedding matrix
+
+        The saved quantiser is reused when it covers every row; older
+        snapshots without one are retrained.
+
+        Returns:
+            True if an index was found and loaded
+        """
+        if not self.path or not os.path.exists(os.path.join(self.path, "meta.json")):
+            return False
+        with self._lock:
+            self._generation += 1
+            with open(os.path.join(self.path, "meta.json")) as f:
+                meta = json.load(f)
+            with open(os.path.join(self.path, "rows.json")) as f:
+                self._rows = {int(k): v for k, v in json.load(f).items()}
+            self.dimension = meta["dimension"]
+            self.dtype = np.dtype(meta["dtype"])
+            self._vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+            self._ids = np.load(os.path.join(self.path, "ids.npy"))
+            self._size = len(self._ids)
+            self._assignments = np.full(self._size, -1, dtype=np.int32)
+            self._centroids = None
+            self._trained_at_size = 0
+            centroids_path = os.path.join(self.path, "centroids.npy")
+            assignments_path = os.path.join(self.path, "assignments.npy")
+            if os.path.exists(centroids_path) and os.path.exists(assignments_path):
+                assignments = np.load(assignments_path)
+                if len(assignments) == self._size:
+                    self._centroids = np.load(centroids_path)
+                    self._assignments = assignments.astype(np.int32)
+                    self._trained_at_size = meta.get("trained_at_size", self._size)
+            retrain = self._centroids is None and self._size >= self.min_train_rows
+        if retrain:
+            self._train()
+        return True
+
+    def clear(self):
+        """Drop every row and the persisted files (e.g. after the embedding model changes)"""
+        with self._lock:
+            self._generation += 1
+            self.dimension = None
+            self._vectors = None
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._rows = {}
+            self._size = 0
+            self._centroids = None
+            self._assignments = np.zeros(0, dtype=np.int32)
+            self._trained_at_size = 0
+            if self.path:
+                self._remove_files("meta.json", "rows.json", "vectors.npy", "ids.npy", "centroids.npy", "assignments.npy")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index size and configuration"""
+        return {
+            "rows": self._size,
+            "dimension": self.dimension,
+            "dtype": self.dtype.name,
+            "lists": 0 if self._centroids is None else len(self._centroids),
+            "nprobe": self.nprobe,
+            "max_id": self.max_id,
+        }
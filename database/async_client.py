@@ -0,0 +1,247 @@
+"""
+Async PostgREST client for Supabase on a pooled HTTP connection
+"""
+import importlib.util
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+TABLE = "startup_reports"
+
+
+class PostgrestError(Exception):
+    """Raised when PostgREST answers with an error status"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AsyncPostgrestClient:
+    """
+    Non-blocking access to the Supabase REST API (PostgREST)
+
+    All calls share one keep-alive ``httpx.AsyncClient`` with a bounded pool,
+    so database round trips run concurrently on the event loop instead of
+    occupying offload threads. HTTP/2 is negotiated when the ``h2`` package is
+    installed. Every method accepts a per-call ``timeout``.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        key: Optional[str],
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = (url or "").rstrip("/")
+        self.key = key
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.timeout = timeout
+        self._transport = transport
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.total_time_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AsyncPostgrestClient":
+        """Build a client from SUPABASE_URL / SUPABASE_KEY and SUPABASE_HTTP_* environment variables"""
+        return cls(
+            url=os.getenv("SUPABASE_URL"),
+            key=os.getenv("SUPABASE_KEY"),
+            max_connections=int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "50")),
+            max_keepalive_connections=int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")),
+            http2=os.getenv("SUPABASE_HTTP2_ENABLED", "true").lower() == "true",
+            timeout=float(os.getenv("SUPABASE_HTTP_TIMEOUT_SECONDS", "10")),
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            if not self.url or not self.key:
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
+            self._http_client = httpx.AsyncClient(
+                base_url=f"{self.url}/rest/v1",
+                headers={"apikey": self.key, "Authorization": f"Bearer {self.key}"},
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                transport=self._transport,
+            )
+        return self._http_client
+
+    async def _request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Send one request and decode the JSON body
+
+        Raises:
+            PostgrestError: If the response status is 4xx/5xx
+            httpx.HTTPError: On connection failures and timeouts
+        """
+        client = self._client()
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            response = await client.request(
+                method, path, timeout=timeout if timeout is not None else self.timeout, **kwargs
+            )
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.total_time_ms += (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            self.errors += 1
+            raise PostgrestError(f"{method} {path} failed ({response.status_code}): {response.text}", response.status_code)
+        return response.json() if response.content else None
+
+    async def insert_ideas(self, rows: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[int]:
+        """
+        Insert several ideas in one multi-row request
+
+        Args:
+            rows: Dicts with 'idea', 'embedding', 'report' and optionally 'embedding_model'
+            timeout: Seconds for this call (defaults to the client timeout)
+
+        Returns:
+            IDs of the inserted rows, in order
+        """
+        payload = []
+        for row in rows:
+            record = {"idea": row["idea"], "embedding": row["embedding"], "report": row["report"]}
+            if row.get("embedding_model"):
+                record["embedding_model"] = row["embedding_model"]
+            payload.append(record)
+        data = await self._request(
+            "POST",
+            f"/{TABLE}",
+            timeout=timeout,
+            params={"select": "id"},
+            headers={"Prefer": "return=representation"},
+            json=payload,
+        )
+        if not data or len(data) != len(rows):
+            raise PostgrestError("Failed to insert idea - no data returned")
+        return [inserted["id"] for inserted in data]
+
+    async def insert_idea(
+        self,
+        idea: str,
+        embedding: List[float],
+        report: dict,
+        embedding_model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """Insert a new startup idea with its embedding and report"""
+        ids = await self.insert_ideas(
+            [{"idea": idea, "embedding": embedding, "report": report, "embedding_model": embedding_model}],
+            timeout=timeout,
+        )
+        return ids[0]
+
+    async def search_similar_ideas(
+        self,
+        embedding: List[float],
+        top_k: int = 5,
+        embedding_model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Search for similar ideas with the search_similar_ideas RPC function
+
+        Args:
+            embedding: Query embedding
+            top_k: Number of results
+            embedding_model: Only match rows embedded by this model
+            timeout: Seconds for this call (defaults to the client timeout)
+        """
+        body: Dict[str, Any] = {"query_embedding": embedding, "match_count": top_k}
+        if embedding_model:
+            body["query_model"] = embedding_model
+        try:
+            data = await self._request(
+                "POST",
+                "/rpc/search_similar_ideas",
+                timeout=timeout,
+                json=body,
+            )
+            return data or []
+        except Exception as e:
+            print(f"Error searching similar ideas: {e}")
+            if "different vector dimensions" in str(e):
+                print(f"Query embeddings ({len(embedding)} dims) do not match the stored ones; "
+                      "check EMBEDDING_MODEL or migrate with scripts/reembed.py")
+            # Return empty list if search fails (e.g., no data in database yet)
+            return []
+
+    async def get_idea_by_id(
+        self, idea_id: int, include_embedding: bool = False, timeout: Optional[float] = None
+    ) -> Optional[Dict]:
+        """
+        Retrieve a specific idea by ID
+
+        Args:
+            idea_id: ID of the stored idea
+            include_embedding: Also return the stored embedding (as PostgREST serialises it)
+            timeout: Seconds for this call (defaults to the client timeout)
+
+        Returns:
+            Idea row, or None if not found
+        """
+        columns = "id,idea,report,created_at,embedding" if include_embedding else "id,idea,report,created_at"
+        try:
+            data = await self._request(
+                "GET", f"/{TABLE}", timeout=timeout, params={"select": columns, "id": f"eq.{idea_id}"}
+            )
+            return data[0] if data else None
+        except Exception as e:
+            print(f"Error retrieving idea by ID: {e}")
+            return None
+
+    async def health_check(self, timeout: Optional[float] = None) -> bool:
+        """Check that the database answers a minimal query"""
+        try:
+            await self._request("GET", f"/{TABLE}", timeout=timeout, params={"select": "id", "limit": "1"})
+            return True
+        except Exception as e:
+            print(f"Database health check failed: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get request counters and pool settings"""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_request_ms": round(self.total_time_ms / self.requests, 2) if self.requests else 0.0,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+        }
+
+    async def aclose(self):
+        """Close the connection pool"""
+        http_client, self._http_client = self._http_client, None
+        if http_client is not None:
+            await http_client.aclose()
+
+
+# Global instance
+async_db = AsyncPostgrestClient.from_env()
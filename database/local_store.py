@@ -0,0 +1,265 @@
+"""
+Self-contained vector store on SQLite and an in-process embedding matrix
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from database.ann_index import LocalVectorIndex
+from database.vector_store import VectorStore
+from runtime.offload import run_cpu
+
+load_dotenv(override=True)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Vector store that needs no database server
+
+    Ideas and reports live in a SQLite table (embeddings as float32 blobs)
+    and searches run against a LocalVectorIndex: an L2-normalised embedding
+    matrix, memory-mapped from disk when persisted, scored with one
+    vectorised dot product per query (IVF lists once the table is large).
+    Meant for CI performance runs, load tests and small deployments.
+    """
+
+    backend = "local"
+
+    def __init__(self, path: str, index: Optional[LocalVectorIndex] = None):
+        self.path = path
+        self._index = index or LocalVectorIndex(dtype="float32", path=os.path.join(path, "index"))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    @classmethod
+    def from_env(cls) -> "LocalVectorStore":
+        """Build a store from LOCAL_STORE_PATH and VECTOR_INDEX_* environment variables"""
+        path = os.getenv("LOCAL_STORE_PATH", os.path.join(os.getcwd(), "local_store"))
+        return cls(path, index=LocalVectorIndex(
+            dtype=os.getenv("VECTOR_INDEX_DTYPE", "float32"),
+            nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+            min_train_rows=int(os.getenv("VECTOR_INDEX_MIN_TRAIN_ROWS", "2048")),
+            path=os.path.join(path, "index"),
+        ))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._conn = sqlite3.connect(
+                os.path.join(self.path, "startup_reports.sqlite3"), check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS startup_reports ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, idea TEXT NOT NULL, embedding BLOB, report TEXT, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+            # Re-embedding columns, added in place to stores created before they existed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(startup_reports)")}
+            for column, column_type in (("embedding_model", "TEXT"), ("embedding_next", "BLOB"), ("embedding_next_model", "TEXT")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE startup_reports ADD COLUMN {column} {column_type}")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+        return self._conn
+
+    def _ensure_loaded(self):
+        """Load the persisted matrix and add rows written since it was saved"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._index.load()
+            self._index_rows_after(self._index, self._index.max_id)
+            self._loaded = True
+
+    def _index_rows_after(self, index: LocalVectorIndex, after_id: int):
+        cursor = self._connection().execute(
+            "SELECT id, idea, report, embedding FROM startup_reports WHERE id > ? ORDER BY id", (after_id,)
+        )
+        while True:
+            batch = cursor.fetchmany(1000)
+            if not batch:
+                break
+            index.add([self._decode(row) for row in batch])
+
+    @property
+    def embedding_model(self) -> str:
+        """Model of the live embeddings (set by cutover_embeddings, else EMBEDDING_MODEL)"""
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM store_meta WHERE key = 'embedding_model'").fetchone()
+        return row[0] if row else os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+    @staticmethod
+    def _decode(row) -> Dict[str, Any]:
+        row_id, idea, report, embedding = row
+        return {
+            "id": row_id,
+            "idea": idea,
+            "report": json.loads(report) if report else {},
+            "embedding": np.frombuffer(embedding, dtype=np.float32).tolist() if embedding is not None else None,
+        }
+
+    def initialize_schema(self):
+        """Create the SQLite table (no manual setup needed)"""
+        self._connection()
+
+    def insert_ideas(self, rows: List[Dict]) -> List[int]:
+        """
+        Insert several ideas in one transaction
+
+        Args:
+            rows: Dicts with 'idea', 'embedding', 'report' and optionally 'embedding_model'
+
+        Returns:
+            IDs of the inserted rows, in order
+
+        Raises:
+            ValueError: If a row was embedded by a model other than the store's live one
+        """
+        self._ensure_loaded()
+        model = self.embedding_model
+        stale = {row.get('embedding_model') for row in rows} - {None, model}
+        if stale:
+            raise ValueError(
+                f"Rows embedded with {', '.join(sorted(stale))} cannot join a store embedded with {model}"
+            )
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                ids = [
+                    conn.execute(
+                        "INSERT INTO startup_reports (idea, embedding, report, embedding_model) VALUES (?, ?, ?, ?)",
+                        (row['idea'], np.asarray(row['embedding'], dtype=np.float32).tobytes(), json.dumps(row['report']), model),
+                    ).lastrowid
+                    for row in rows
+                ]
+                self._index.add([{**row, 'id': idea_id} for idea_id, row in zip(ids, rows)])
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return ids
+
+    def search_similar_ideas(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
+        """Exact (or IVF, once large) cosine top-k over the embedding matrix"""
+        self._ensure_loaded()
+        try:
+            return self._index.search(embedding, top_k=top_k)
+        except Exception as e:
+            print(f"Error searching similar ideas: {e}")
+            return []
+
+    def get_idea_by_id(self, idea_id: int, include_embedding: bool = False) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id, idea, report, embedding, created_at FROM startup_reports WHERE id = ?", (idea_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        result = self._decode(row[:4])
+        result['created_at'] = row[4]
+        if not include_embedding:
+            del result['embedding']
+        return result
+
+    def count_ideas(self, after_id: int = 0) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM startup_reports WHERE id > ?", (after_id,)
+            ).fetchone()[0]
+
+    def fetch_ideas_page(self, after_id: int, limit: int) -> List[Dict]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, idea FROM startup_reports WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+        return [{"id": row_id, "idea": idea} for row_id, idea in rows]
+
+    def write_shadow_embeddings(self, rows: List[Dict], model: str) -> int:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                updated = sum(
+                    conn.execute(
+                        "UPDATE startup_reports SET embedding_next = ?, embedding_next_model = ? WHERE id = ?",
+                        (np.asarray(row['embedding'], dtype=np.float32).tobytes(), model, row['id']),
+                    ).rowcount
+                    for row in rows
+                )
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return updated
+
+    def cutover_embeddings(self, model: str) -> int:
+        """
+        Swap in the shadow embeddings in one transaction and rebuild the index
+
+        Raises:
+            ValueError: If a row has no shadow embedding from ``model`` or the dimensions differ
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                missing = conn.execute(
+                    "SELECT COUNT(*) FROM startup_reports "
+                    "WHERE embedding_next IS NULL OR embedding_next_model IS NOT ?", (model,)
+                ).fetchone()[0]
+                if missing:
+                    raise ValueError(f"{missing} row(s) have no {model} embedding yet")
+                sizes = [row[0] for row in conn.execute("SELECT DISTINCT length(embedding_next) FROM startup_reports")]
+                if len(sizes) > 1:
+                    raise ValueError(f"Shadow embeddings have mixed dimensions: {sorted(size // 4 for size in sizes)}")
+                migrated = conn.execute(
+                    "UPDATE startup_reports SET embedding = embedding_next, embedding_model = embedding_next_model, "
+                    "embedding_next = NULL, embedding_next_model = NULL"
+                ).rowcount
+                conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('embedding_model', ?)", (model,))
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+            # Searches keep using the old matrix until the rebuilt one is swapped in
+            old_index = self._index
+            index = LocalVectorIndex(
+                dtype=old_index.dtype.name, nprobe=old_index.nprobe,
+                min_train_rows=old_index.min_train_rows, path=old_index.path,
+            )
+            self._index_rows_after(index, 0)
+            self._index = index
+            self._loaded = True
+            old_index.clear()
+            index.save()
+        return migrated
+
+    async def asearch_similar_ideas(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
+        # Scoring is numpy work, so it runs on the CPU pool rather than the I/O pool
+        return await run_cpu(self.search_similar_ideas, embedding, top_k)
+
+    def close(self):
+        """Persist the embedding matrix and close the database"""
+        with self._lock:
+            if self._loaded:
+                try:
+                    self._index.save()
+                except Exception as e:
+                    print(f"Error saving vector index: {e}")
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._loaded = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "path": self.path, "index": self._index.stats()}
@@ -5,13 +5,18 @@
 CREATE EXTENSION IF NOT EXISTS vector;
 
 -- Step 2: Create startup_reports table
+-- 384 dimensions fits the default all-MiniLM-L6-v2 model; to switch models,
+-- migrate with scripts/reembed.py (Step 6) rather than editing this column
 CREATE TABLE IF NOT EXISTS startup_reports (
     id SERIAL PRIMARY KEY,
     idea TEXT NOT NULL,
     embedding vector(384),
     report JSONB,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    embedding_model TEXT DEFAULT 'sentence-transformers/all-MiniLM-L6-v2',
+    embedding_next vector,
+    embedding_next_model TEXT
 );
 
 -- Step 3: Create index for vector similarity search
@@ -21,9 +26,15 @@ USING ivfflat (embedding vector_cosine_ops)
 WITH (lists = 100);
 
 -- Step 4: Create RPC function for similarity search
+-- query_embedding is untyped so the function keeps working after
+-- cutover_embeddings re-types the column for another model; query_model
+-- restricts matches to rows embedded by the caller's model, so rows written
+-- by a worker still on the previous model never mix into the results
+DROP FUNCTION IF EXISTS search_similar_ideas(vector, int);
 CREATE OR REPLACE FUNCTION search_similar_ideas(
-    query_embedding vector(384),
-    match_count int DEFAULT 5
+    query_embedding vector,
+    match_count int DEFAULT 5,
+    query_model text DEFAULT NULL
 )
 RETURNS TABLE (
     id int,
@@ -42,6 +53,7 @@ BEGIN
         1 - (startup_reports.embedding <=> query_embedding) as similarity
     FROM startup_reports
     WHERE startup_reports.embedding IS NOT NULL
+      AND (query_model IS NULL OR startup_reports.embedding_model = query_model)
     ORDER BY startup_reports.embedding <=> query_embedding
     LIMIT match_count;
 END;
@@ -51,6 +63,118 @@ $$;
 -- GRANT ALL ON startup_reports TO authenticated;
 -- GRANT EXECUTE ON FUNCTION search_similar_ideas TO authenticated;
 
+-- Step 6: Re-embedding support (scripts/reembed.py)
+-- embedding_model records which model produced each row's embedding (the app
+-- sets it on every insert; the default only labels rows from other writers);
+-- embedding_next is an untyped shadow column filled while the live one keeps serving
+ALTER TABLE startup_reports ADD COLUMN IF NOT EXISTS embedding_model TEXT DEFAULT 'sentence-transformers/all-MiniLM-L6-v2';
+ALTER TABLE startup_reports ADD COLUMN IF NOT EXISTS embedding_next vector;
+ALTER TABLE startup_reports ADD COLUMN IF NOT EXISTS embedding_next_model TEXT;
+
+CREATE OR REPLACE FUNCTION write_shadow_embeddings(
+    shadow_rows jsonb,
+    target_model text
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated int;
+BEGIN
+    UPDATE startup_reports
+    SET embedding_next = shadow.embedding::vector,
+        embedding_next_model = target_model
+    FROM jsonb_to_recordset(shadow_rows) AS shadow(id int, embedding text)
+    WHERE startup_reports.id = shadow.id;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$;
+
+-- Swaps the shadow column in for every row in one transaction, re-typing it and
+-- the search_similar_ideas RPC for the new dimension. Fails without changing
+-- anything if any row (e.g. one inserted during the backfill) has no embedding
+-- from target_model yet. Reads block while the IVFFlat index rebuilds.
+CREATE OR REPLACE FUNCTION cutover_embeddings(
+    target_model text
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    missing int;
+    dims int;
+    migrated int;
+BEGIN
+    LOCK TABLE startup_reports IN ACCESS EXCLUSIVE MODE;
+
+    SELECT count(*) INTO missing
+    FROM startup_reports
+    WHERE embedding_next IS NULL OR embedding_next_model IS DISTINCT FROM target_model;
+    IF missing > 0 THEN
+        RAISE EXCEPTION 'cutover_embeddings: % row(s) have no % embedding yet', missing, target_model;
+    END IF;
+
+    SELECT vector_dims(embedding_next) INTO dims FROM startup_reports LIMIT 1;
+    IF EXISTS (SELECT 1 FROM startup_reports WHERE vector_dims(embedding_next) <> dims) THEN
+        RAISE EXCEPTION 'cutover_embeddings: shadow embeddings have mixed dimensions';
+    END IF;
+
+    DROP INDEX IF EXISTS startup_reports_embedding_idx;
+    ALTER TABLE startup_reports DROP COLUMN embedding;
+    ALTER TABLE startup_reports RENAME COLUMN embedding_next TO embedding;
+    IF dims IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE startup_reports ALTER COLUMN embedding TYPE vector(%s)', dims);
+    END IF;
+    ALTER TABLE startup_reports ADD COLUMN embedding_next vector;
+
+    UPDATE startup_reports SET embedding_model = target_model, embedding_next_model = NULL;
+    GET DIAGNOSTICS migrated = ROW_COUNT;
+    -- Only for writers that do not label their rows; the app sets embedding_model
+    -- itself, so late writes from workers still on the old model keep their label
+    -- and are excluded from searches made with target_model
+    EXECUTE format('ALTER TABLE startup_reports ALTER COLUMN embedding_model SET DEFAULT %L', target_model);
+
+    CREATE INDEX startup_reports_embedding_idx
+    ON startup_reports
+    USING ivfflat (embedding vector_cosine_ops)
+    WITH (lists = 100);
+
+    -- Older deployments declare query_embedding vector(384) and no query_model;
+    -- redeclare the RPC as in Step 4 so it accepts the new dimension
+    DROP FUNCTION IF EXISTS search_similar_ideas(vector, int);
+    CREATE OR REPLACE FUNCTION search_similar_ideas(
+        query_embedding vector,
+        match_count int DEFAULT 5,
+        query_model text DEFAULT NULL
+    )
+    RETURNS TABLE (
+        id int,
+        idea text,
+        report jsonb,
+        similarity float
+    )
+    LANGUAGE plpgsql
+    AS $search$
+    BEGIN
+        RETURN QUERY
+        SELECT
+            startup_reports.id,
+            startup_reports.idea,
+            startup_reports.report,
+            1 - (startup_reports.embedding <=> query_embedding) as similarity
+        FROM startup_reports
+        WHERE startup_reports.embedding IS NOT NULL
+          AND (query_model IS NULL OR startup_reports.embedding_model = query_model)
+        ORDER BY startup_reports.embedding <=> query_embedding
+        LIMIT match_count;
+    END;
+    $search$;
+    RETURN migrated;
+END;
+$$;
+
 -- Verification queries:
 -- SELECT * FROM startup_reports LIMIT 5;
--- SELECT search_similar_ideas(ARRAY[0.1, 0.2, ...]::vector(384), 5);
+-- SELECT embedding_model, count(*) FROM startup_reports GROUP BY embedding_model;
+-- SELECT search_similar_ideas(ARRAY[0.1, 0.2, ...]::vector, 5);
@@ -2,6 +2,7 @@ import os
 from typing import Optional
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from runtime.offload import run_io
 
 load_dotenv(override=True)
 
@@ -38,7 +39,8 @@ class SupabaseClient:
         """Check if database connection is healthy"""
         try:
             # Try to query a simple table or perform a basic operation
-            result = self._client.table('startup_reports').select("id").limit(1).execute()
+            query = self._client.table('startup_reports').select("id").limit(1)
+            await run_io(query.execute)
             return True
         except Exception as e:
             print(f"Database health check failed: {e}")
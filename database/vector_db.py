@@ -1,25 +1,136 @@
 import os
+import json
 from typing import Optional, List, Dict
 from database.supabase_client import SupabaseClient
+from database.async_client import async_db
+from database.ann_index import LocalVectorIndex
+from database.vector_store import VectorStore
+from runtime.offload import run_cpu
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
 
-class VectorDB:
+class VectorDB(VectorStore):
     """Supabase-based vector database using REST API and RPC functions"""
     
+    backend = "supabase"
+    
     def __init__(self):
         self.supabase_client = SupabaseClient()
         self.client = self.supabase_client.client
+        # Pooled non-blocking client used by the request path (a-prefixed methods)
+        self.async_client = async_db
+        # Optional in-process mirror of startup_reports; Supabase stays the source of truth
+        self.index: Optional[LocalVectorIndex] = None
+        self.index_ready = False
+        if os.getenv("VECTOR_INDEX_ENABLED", "false").lower() == "true":
+            self.index = LocalVectorIndex.from_env()
+        # Ids below the mirror's max id that are re-checked on every sync (see sync_index)
+        self.sync_overlap = int(os.getenv("VECTOR_INDEX_SYNC_OVERLAP", "5000"))
+        # Model this process embeds with: stamped on inserted rows and required of search matches
+        self.embedding_model = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     
     def connect(self):
         """Connection is handled by Supabase client - no-op for compatibility"""
         pass
     
     def close(self):
-        """Connection is handled by Supabase client - no-op for compatibility"""
-        pass
+        """Persist the local vector index; the Supabase connection needs no cleanup"""
+        if self.index is not None and self.index_ready:
+            try:
+                self.index.save()
+            except Exception as e:
+                print(f"Error saving vector index: {e}")
+    
+    def bootstrap_index(self, page_size: int = 1000) -> int:
+        """
+        Load the persisted index and catch up with rows added since it was saved
+        
+        Args:
+            page_size: Rows fetched per request while catching up
+            
+        Returns:
+            Number of rows in the index
+        """
+        if self.index is None:
+            return 0
+        
+        if self.index.load():
+            print(f"Loaded vector index with {len(self.index)} rows from {self.index.path}")
+        
+        added = self.sync_index(page_size=page_size)
+        if added:
+            self.index.save()
+        self.index_ready = True
+        print(f"Vector index ready: {len(self.index)} rows ({added} fetched from Supabase)")
+        return len(self.index)
+    
+    def sync_index(self, page_size: int = 1000) -> int:
+        """
+        Mirror rows with an id above the index's highest id (keyset pagination)
+        
+        SERIAL ids are allocated before commit, so a concurrent batch can land
+        below an id that was already mirrored. The last ``sync_overlap`` ids
+        are therefore re-listed (ids only) and any that are missing fetched.
+        
+        Args:
+            page_size: Rows fetched per request
+            
+        Returns:
+            Number of rows added
+        """
+        if self.index is None:
+            return 0
+        
+        added = 0
+        last_id = self.index.max_id
+        if last_id and self.sync_overlap > 0:
+            added += self._sync_late_rows(max(0, last_id - self.sync_overlap), last_id, page_size)
+        while True:
+            result = self.client.table('startup_reports').select(
+                'id, idea, report, embedding, embedding_model'
+            ).gt('id', last_id).order('id').limit(page_size).execute()
+            rows = result.data or []
+            if not rows:
+                break
+            added += self._mirror(rows)
+            last_id = rows[-1]['id']
+            if len(rows) < page_size:
+                break
+        return added
+    
+    def _mirror(self, rows: List[Dict]) -> int:
+        """Add fetched rows to the index, skipping ones embedded by another model"""
+        rows = [row for row in rows if row.get('embedding_model') in (None, self.embedding_model)]
+        for row in rows:
+            row['embedding'] = self.parse_embedding(row.get('embedding'))
+        self.index.add(rows)
+        return len(rows)
+    
+    def _sync_late_rows(self, low_id: int, high_id: int, page_size: int) -> int:
+        """Fetch rows in (low_id, high_id] that committed after the mirror passed their id"""
+        missing = []
+        last_id = low_id
+        while True:
+            result = self.client.table('startup_reports').select(
+                'id'
+            ).gt('id', last_id).lte('id', high_id).order('id').limit(page_size).execute()
+            rows = result.data or []
+            if not rows:
+                break
+            missing.extend(row['id'] for row in rows if row['id'] not in self.index)
+            last_id = rows[-1]['id']
+            if len(rows) < page_size:
+                break
+        
+        added = 0
+        for start in range(0, len(missing), page_size):
+            result = self.client.table('startup_reports').select(
+                'id, idea, report, embedding, embedding_model'
+            ).in_('id', missing[start:start + page_size]).execute()
+            added += self._mirror(result.data or [])
+        return added
     
     def initialize_schema(self):
         """
@@ -31,13 +142,17 @@ class VectorDB:
         CREATE EXTENSION IF NOT EXISTS vector;
         
         -- Create startup_reports table
+        -- (384 dims fits the default model; switch models with scripts/reembed.py)
         CREATE TABLE IF NOT EXISTS startup_reports (
             id SERIAL PRIMARY KEY,
             idea TEXT NOT NULL,
             embedding vector(384),
             report JSONB,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            embedding_model TEXT DEFAULT 'sentence-transformers/all-MiniLM-L6-v2',
+            embedding_next vector,
+            embedding_next_model TEXT
         );
         
         -- Create index for vector similarity search
@@ -47,9 +162,13 @@ class VectorDB:
         WITH (lists = 100);
         
         -- Create RPC function for similarity search
+        -- (query_embedding is untyped so it survives cutover_embeddings;
+        -- query_model limits matches to rows embedded by the caller's model)
+        DROP FUNCTION IF EXISTS search_similar_ideas(vector, int);
         CREATE OR REPLACE FUNCTION search_similar_ideas(
-            query_embedding vector(384),
-            match_count int DEFAULT 5
+            query_embedding vector,
+            match_count int DEFAULT 5,
+            query_model text DEFAULT NULL
         )
         RETURNS TABLE (
             id int,
@@ -68,40 +187,135 @@ class VectorDB:
                 1 - (startup_reports.embedding <=> query_embedding) as similarity
             FROM startup_reports
             WHERE startup_reports.embedding IS NOT NULL
+              AND (query_model IS NULL OR startup_reports.embedding_model = query_model)
             ORDER BY startup_reports.embedding <=> query_embedding
             LIMIT match_count;
         END;
         $$;
+        
+        -- Re-embedding RPCs (write_shadow_embeddings, cutover_embeddings), which
+        -- migrate the column to another model's dimension:
+        -- see Step 6 of database/setup_supabase.sql
         """
         print("Schema initialization should be done manually in Supabase SQL Editor.")
         print("See the docstring in initialize_schema() for the SQL commands.")
     
-    def insert_idea(self, idea: str, embedding: List[float], report: dict) -> int:
-        """Insert a new startup idea with its embedding and report"""
+    def insert_ideas(self, rows: List[Dict]) -> List[int]:
+        """
+        Insert several ideas in one multi-row request
+        
+        Args:
+            rows: Dicts with 'idea', 'embedding', 'report' and optionally 'embedding_model'
+                (defaults to this process's EMBEDDING_MODEL)
+            
+        Returns:
+            IDs of the inserted rows, in order
+        """
+        rows = self._labelled(rows)
         try:
-            result = self.client.table('startup_reports').insert({
-                'idea': idea,
-                'embedding': embedding,
-                'report': report
-            }).execute()
+            result = self.client.table('startup_reports').insert([
+                {
+                    'idea': row['idea'],
+                    'embedding': row['embedding'],
+                    'report': row['report'],
+                    'embedding_model': row['embedding_model'],
+                }
+                for row in rows
+            ]).execute()
             
-            if result.data and len(result.data) > 0:
-                return result.data[0]['id']
+            if result.data and len(result.data) == len(rows):
+                ids = [inserted['id'] for inserted in result.data]
+                if self.index_ready:
+                    self._index_insert(ids, rows)
+                return ids
             else:
                 raise Exception("Failed to insert idea - no data returned")
         except Exception as e:
             print(f"Error inserting idea: {e}")
             raise
     
+    def count_ideas(self, after_id: int = 0) -> int:
+        """Number of rows with an id above after_id"""
+        result = self.client.table('startup_reports').select(
+            'id', count='exact'
+        ).gt('id', after_id).limit(1).execute()
+        return result.count or 0
+    
+    def fetch_ideas_page(self, after_id: int, limit: int) -> List[Dict]:
+        """Rows with an id above after_id, in id order (keyset pagination)"""
+        result = self.client.table('startup_reports').select(
+            'id, idea'
+        ).gt('id', after_id).order('id').limit(limit).execute()
+        return result.data or []
+    
+    def write_shadow_embeddings(self, rows: List[Dict], model: str) -> int:
+        """
+        Write re-embedded vectors to the embedding_next shadow column
+        
+        Args:
+            rows: Dicts with 'id' and 'embedding'
+            model: Model that produced the embeddings (stored per row)
+            
+        Returns:
+            Number of rows updated
+        """
+        result = self.client.rpc(
+            'write_shadow_embeddings',
+            {
+                'shadow_rows': [{'id': row['id'], 'embedding': row['embedding']} for row in rows],
+                'target_model': model
+            }
+        ).execute()
+        return result.data or 0
+    
+    def cutover_embeddings(self, model: str) -> int:
+        """
+        Promote the shadow embeddings to the live column in one transaction
+        
+        The cutover_embeddings RPC (see setup_supabase.sql) fails without
+        changing anything if a row has no embedding from this model yet.
+        
+        Returns:
+            Number of rows migrated
+        """
+        result = self.client.rpc('cutover_embeddings', {'target_model': model}).execute()
+        if self.index is not None:
+            # The mirrored vectors come from the old model; rebuild on the next bootstrap
+            self.index.clear()
+            self.index_ready = False
+        return result.data or 0
+    
+    def _labelled(self, rows: List[Dict]) -> List[Dict]:
+        """Rows with an explicit embedding_model, so the column default never labels them"""
+        return [{**row, 'embedding_model': row.get('embedding_model') or self.embedding_model} for row in rows]
+    
+    def _index_insert(self, ids: List[int], rows: List[Dict]):
+        """Mirror freshly inserted rows into the local index in one batch (best effort)"""
+        try:
+            self.index.add([
+                {'id': idea_id, 'idea': row['idea'], 'embedding': row['embedding'], 'report': row['report']}
+                for idea_id, row in zip(ids, rows)
+                if row['embedding_model'] == self.embedding_model
+            ])
+        except Exception as e:
+            print(f"Error updating vector index: {e}")
+    
     def search_similar_ideas(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
-        """Search for similar ideas using RPC function"""
+        """Search for similar ideas, using the local index when it is ready, else the RPC function"""
+        if self.index_ready:
+            try:
+                return self.index.search(embedding, top_k=top_k)
+            except Exception as e:
+                print(f"Vector index search failed, falling back to RPC: {e}")
+        
         try:
             # Call the RPC function for similarity search
             result = self.client.rpc(
                 'search_similar_ideas',
                 {
                     'query_embedding': embedding,
-                    'match_count': top_k
+                    'match_count': top_k,
+                    'query_model': self.embedding_model
                 }
             ).execute()
             
@@ -111,24 +325,102 @@ class VectorDB:
                 return []
         except Exception as e:
             print(f"Error searching similar ideas: {e}")
+            if "different vector dimensions" in str(e):
+                print(f"Query embeddings ({len(embedding)} dims) do not match the stored ones; "
+                      "check EMBEDDING_MODEL or migrate with scripts/reembed.py")
             # Return empty list if search fails (e.g., no data in database yet)
             return []
     
-    def get_idea_by_id(self, idea_id: int) -> Optional[Dict]:
-        """Retrieve a specific idea by ID"""
+    def get_idea_by_id(self, idea_id: int, include_embedding: bool = False) -> Optional[Dict]:
+        """
+        Retrieve a specific idea by ID
+        
+        Args:
+            idea_id: ID of the stored idea
+            include_embedding: Also return the stored embedding as a list of floats
+            
+        Returns:
+            Idea row, or None if not found
+        """
+        columns = 'id, idea, report, created_at, embedding' if include_embedding else 'id, idea, report, created_at'
         try:
             result = self.client.table('startup_reports').select(
-                'id, idea, report, created_at'
+                columns
             ).eq('id', idea_id).execute()
             
             if result.data and len(result.data) > 0:
-                return result.data[0]
+                row = result.data[0]
+                if include_embedding:
+                    row['embedding'] = self.parse_embedding(row.get('embedding'))
+                return row
             else:
                 return None
         except Exception as e:
             print(f"Error retrieving idea by ID: {e}")
             return None
+    
+    async def ainsert_ideas(self, rows: List[Dict]) -> List[int]:
+        """Async insert_ideas over the pooled HTTP client"""
+        rows = self._labelled(rows)
+        try:
+            ids = await self.async_client.insert_ideas(rows)
+        except Exception as e:
+            print(f"Error inserting idea: {e}")
+            raise
+        if self.index_ready:
+            # Adding normalizes and copies vectors under the index lock, so keep it off the event loop
+            await run_cpu(self._index_insert, ids, rows)
+        return ids
+    
+    async def asearch_similar_ideas(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
+        """Async search_similar_ideas: local index when ready, else the RPC function over HTTP"""
+        if self.index_ready:
+            try:
+                return await run_cpu(self.index.search, embedding, top_k)
+            except Exception as e:
+                print(f"Vector index search failed, falling back to RPC: {e}")
+        
+        return await self.async_client.search_similar_ideas(embedding, top_k, embedding_model=self.embedding_model)
+    
+    async def aget_idea_by_id(self, idea_id: int, include_embedding: bool = False) -> Optional[Dict]:
+        """Async get_idea_by_id over the pooled HTTP client"""
+        row = await self.async_client.get_idea_by_id(idea_id, include_embedding=include_embedding)
+        if row is not None and include_embedding:
+            row['embedding'] = self.parse_embedding(row.get('embedding'))
+        return row
+    
+    async def health_check(self, timeout: Optional[float] = None) -> bool:
+        """Check the database round trip over the pooled HTTP client"""
+        return await self.async_client.health_check(timeout=timeout)
+    
+    @staticmethod
+    def parse_embedding(value) -> Optional[List[float]]:
+        """Parse a pgvector value (PostgREST returns it as a '[...]' string)"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = json.loads(value)
+        return [float(x) for x in value]
+
+
+def create_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """
+    Create the vector store selected by VECTOR_STORE
+    
+    Args:
+        backend: "supabase" or "local" (defaults to VECTOR_STORE)
+        
+    Returns:
+        A VectorStore instance
+    """
+    backend = backend or os.getenv("VECTOR_STORE", "supabase")
+    if backend == "supabase":
+        return VectorDB()
+    if backend == "local":
+        from database.local_store import LocalVectorStore
+        return LocalVectorStore.from_env()
+    raise ValueError(f"Unknown VECTOR_STORE '{backend}', expected 'supabase' or 'local'")
 
 
 # Global instance
-vector_db = VectorDB()
+vector_db = create_vector_store()
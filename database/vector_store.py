@@ -0,0 +1,109 @@
+"""
+Vector store interface shared by the Supabase and local backends
+"""
+from typing import Any, Dict, List, Optional
+
+from runtime.offload import run_io
+
+
+class VectorStore:
+    """
+    Interface for storing ideas with their reports and searching them by embedding
+
+    Backends implement the blocking methods; the ``a``-prefixed coroutines
+    used on the request path default to running those on the I/O pool and
+    can be overridden with natively async versions.
+    ``search_similar_ideas`` returns rows shaped like the Supabase RPC:
+    ``id``, ``idea``, ``report`` and ``similarity``.
+
+    Re-embedding under a new model (scripts/reembed.py) writes into a shadow
+    embedding column, tagged with the model, and ``cutover_embeddings`` swaps
+    it in for every row at once. Inserted rows may carry an
+    ``embedding_model``, the model that produced their embedding; backends
+    store it with the row (defaulting to ``embedding_model``) so a writer
+    still on the previous model is never labelled with the new one.
+    """
+
+    backend = "base"
+
+    # Optional local mirror of a remote store (see VectorDB)
+    index = None
+    index_ready = False
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def initialize_schema(self):
+        raise NotImplementedError
+
+    def insert_ideas(self, rows: List[Dict]) -> List[int]:
+        raise NotImplementedError
+
+    def insert_idea(self, idea: str, embedding: List[float], report: dict, embedding_model: Optional[str] = None) -> int:
+        """Insert a new startup idea with its embedding and report"""
+        return self.insert_ideas([
+            {'idea': idea, 'embedding': embedding, 'report': report, 'embedding_model': embedding_model}
+        ])[0]
+
+    def search_similar_ideas(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
+        raise NotImplementedError
+
+    def get_idea_by_id(self, idea_id: int, include_embedding: bool = False) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def count_ideas(self, after_id: int = 0) -> int:
+        """Number of rows with an id above ``after_id``"""
+        raise NotImplementedError
+
+    def fetch_ideas_page(self, after_id: int, limit: int) -> List[Dict]:
+        """Rows with an id above ``after_id`` (``id`` and ``idea``), in id order"""
+        raise NotImplementedError
+
+    def write_shadow_embeddings(self, rows: List[Dict], model: str) -> int:
+        """Store ``rows`` (``id`` and ``embedding``) in the shadow column, tagged with ``model``"""
+        raise NotImplementedError
+
+    def cutover_embeddings(self, model: str) -> int:
+        """Atomically promote the shadow embeddings of ``model`` to the live column"""
+        raise NotImplementedError
+
+    def bootstrap_index(self, page_size: int = 1000) -> int:
+        return 0
+
+    def sync_index(self, page_size: int = 1000) -> int:
+        return 0
+
+    async def ainsert_ideas(self, rows: List[Dict]) -> List[int]:
+        return await run_io(self.insert_ideas, rows)
+
+    async def ainsert_idea(
+        self, idea: str, embedding: List[float], report: dict, embedding_model: Optional[str] = None
+    ) -> int:
+        return (await self.ainsert_ideas([
+            {'idea': idea, 'embedding': embedding, 'report': report, 'embedding_model': embedding_model}
+        ]))[0]
+
+    async def asearch_similar_ideas(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
+        return await run_io(self.search_similar_ideas, embedding, top_k)
+
+    async def aget_idea_by_id(self, idea_id: int, include_embedding: bool = False) -> Optional[Dict]:
+        return await run_io(self.get_idea_by_id, idea_id, include_embedding)
+
+    async def afetch_ideas_page(self, after_id: int, limit: int) -> List[Dict]:
+        return await run_io(self.fetch_ideas_page, after_id, limit)
+
+    async def awrite_shadow_embeddings(self, rows: List[Dict], model: str) -> int:
+        return await run_io(self.write_shadow_embeddings, rows, model)
+
+    async def health_check(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the backend name and index statistics"""
+        return {
+            "backend": self.backend,
+            "index": self.index.stats() if self.index is not None else None,
+        }
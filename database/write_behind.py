@@ -0,0 +1,433 @@
+"""
+Write-behind persistence of analysis reports
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+from runtime.offload import run_io
+
+load_dotenv()
+
+# writer(rows) -> ids of the inserted rows; rows are {"idea", "embedding", "report"}
+BatchWriter = Callable[[List[Dict[str, Any]]], Union[List[int], Awaitable[List[int]]]]
+
+
+class ReportJournal:
+    """
+    Local SQLite spill file for reports that could not be written to the database
+
+    Rows are appended when the database is unreachable (or the queue is full)
+    and replayed in order once writes succeed again, so a report survives a
+    Supabase outage and a process restart. Replaying processes claim rows in
+    a transaction before writing them, so workers sharing the file never
+    insert the same row twice; a claim lapses after ``claim_seconds`` in case
+    its process died mid-replay.
+    """
+
+    def __init__(self, path: str, claim_seconds: float = 300.0):
+        self.path = path
+        self.claim_seconds = claim_seconds
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._claims = 0
+        # Row count kept alongside the file, so stats never query SQLite
+        self._pending = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS report_journal ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT NOT NULL, claimed_by TEXT, claimed_at REAL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(report_journal)")}
+            # Journals written before claims existed
+            if "claimed_by" not in columns:
+                self._conn.execute("ALTER TABLE report_journal ADD COLUMN claimed_by TEXT")
+                self._conn.execute("ALTER TABLE report_journal ADD COLUMN claimed_at REAL")
+            self._pending = self._conn.execute("SELECT COUNT(*) FROM report_journal").fetchone()[0]
+        return self._conn
+
+    def append(self, rows: List[Dict[str, Any]]):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO report_journal (row) VALUES (?)",
+                [(json.dumps(row, default=str),) for row in rows],
+            )
+            conn.execute("COMMIT")
+            self._pending += len(rows)
+
+    def claim(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Claim the oldest unclaimed (or lapsed) rows for this process
+
+        Returns:
+            (journal id, row) pairs to write, then delete() or release()
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            self._claims += 1
+            token = f"{self._owner}:{self._claims}"
+            # IMMEDIATE takes the write lock up front, so concurrent claims serialize
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE report_journal SET claimed_by = ?, claimed_at = ? WHERE id IN ("
+                    "SELECT id FROM report_journal WHERE claimed_by IS NULL OR claimed_at < ? ORDER BY id LIMIT ?)",
+                    (token, now, now - self.claim_seconds, limit),
+                )
+                rows = conn.execute(
+                    "SELECT id, row FROM report_journal WHERE claimed_by = ? ORDER BY id", (token,)
+                ).fetchall()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [(journal_id, json.loads(row)) for journal_id, row in rows]
+
+    def release(self, journal_ids: List[int]):
+        """Give claimed rows back for a later replay"""
+        if not journal_ids:
+            return
+        placeholders = ", ".join("?" for _ in journal_ids)
+        with self._lock:
+            self._connection().execute(
+                f"UPDATE report_journal SET claimed_by = NULL, claimed_at = NULL WHERE id IN ({placeholders})",
+                journal_ids,
+            )
+
+    def delete(self, journal_ids: List[int]):
+        if not journal_ids:
+            return
+        placeholders = ", ".join("?" for _ in journal_ids)
+        with self._lock:
+            deleted = self._connection().execute(
+                f"DELETE FROM report_journal WHERE id IN ({placeholders})", journal_ids
+            ).rowcount
+            self._pending = max(0, self._pending - deleted)
+
+    @property
+    def pending(self) -> int:
+        """
+        Journaled rows as last seen by this process, without touching SQLite
+
+        Rows appended or replayed by other processes sharing the file are
+        picked up the next time the file is reopened.
+        """
+        return self._pending
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM report_journal").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ReportWriteBehind:
+    """
+    Background writer that batches report inserts off the response path
+
+    ``enqueue`` returns immediately. A single worker task groups queued rows
+    into multi-row inserts of up to ``batch_size`` (waiting ``flush_interval``
+    for concurrent analyses to join a partial batch), retries failed batches
+    with jittered exponential backoff, and spills them to the journal once
+    retries are exhausted. Journaled rows are replayed after the next
+    successful write and every ``replay_interval`` seconds while idle. A
+    failing iteration (e.g. a journal error) is logged and retried after a
+    backoff, putting its rows back at the head of the queue, so the worker
+    never dies with reports still queued. ``stop`` drains the queue on shutdown; anything that still cannot be
+    written goes to the journal.
+    """
+
+    def __init__(
+        self,
+        journal: ReportJournal,
+        batch_size: int = 20,
+        flush_interval: float = 0.5,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        base_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        replay_interval: float = 30.0,
+        enabled: bool = True,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.journal = journal
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.replay_interval = replay_interval
+        self.enabled = enabled
+        self._rng = rng
+        self.writer: Optional[BatchWriter] = None
+
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._in_flight: List[Dict[str, Any]] = []
+        # Journal ids already written to the database but not yet deleted from the journal
+        self._replayed_ids: List[int] = []
+        self._overflow: List[Dict[str, Any]] = []
+        self._spill_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.worker_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ReportWriteBehind":
+        """Build a writer from REPORT_WRITE_* / REPORT_JOURNAL_* environment variables"""
+        return cls(
+            journal=ReportJournal(
+                os.getenv("REPORT_JOURNAL_PATH", os.path.join(os.getcwd(), "report_journal.sqlite3")),
+                claim_seconds=float(os.getenv("REPORT_JOURNAL_CLAIM_SECONDS", "300")),
+            ),
+            batch_size=int(os.getenv("REPORT_WRITE_BATCH_SIZE", "20")),
+            flush_interval=float(os.getenv("REPORT_WRITE_FLUSH_SECONDS", "0.5")),
+            max_pending=int(os.getenv("REPORT_WRITE_QUEUE_SIZE", "1000")),
+            max_retries=int(os.getenv("REPORT_WRITE_MAX_RETRIES", "3")),
+            replay_interval=float(os.getenv("REPORT_JOURNAL_REPLAY_SECONDS", "30")),
+            enabled=os.getenv("REPORT_WRITE_BEHIND_ENABLED", "true").lower() == "true",
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def start(self, writer: BatchWriter):
+        """
+        Start the background worker
+
+        Args:
+            writer: Multi-row insert; coroutine functions are awaited, blocking ones run on the I/O pool
+        """
+        if not self.enabled or self._task is not None:
+            return
+        self.writer = writer
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(
+        self, idea: str, embedding: List[float], report: Dict[str, Any], embedding_model: Optional[str] = None
+    ):
+        """
+        Queue a report for writing without waiting for the database
+
+        Args:
+            idea: The startup idea
+            embedding: Its embedding
+            report: The feasibility report
+            embedding_model: Model that produced the embedding, kept with the row
+                (and its journal entry) so a late write is labelled correctly
+
+        Raises:
+            RuntimeError: If the writer is not running
+        """
+        if not self.running:
+            raise RuntimeError("Report writer is not running")
+        row = {"idea": idea, "embedding": list(embedding), "report": report}
+        if embedding_model:
+            row["embedding_model"] = embedding_model
+        self.enqueued += 1
+        if len(self._pending) >= self.max_pending:
+            # Overloaded: keep the report durable rather than holding it in memory,
+            # journaling it on the I/O pool so the event loop never waits on SQLite
+            self._overflow.append(row)
+            if self._spill_task is None or self._spill_task.done():
+                self._spill_task = asyncio.create_task(self._spill_overflow())
+            return
+        self._pending.append(row)
+        self._wakeup.set()
+
+    async def _spill_overflow(self):
+        """Journal rows turned away by the full queue"""
+        while self._overflow:
+            rows, self._overflow = self._overflow, []
+            try:
+                await run_io(self.journal.append, rows)
+            except Exception as e:
+                # Keep them for the next spill (or stop) rather than dropping them
+                print(f"Report journal write failed: {e}")
+                self._overflow[:0] = rows
+                return
+            self.spilled += len(rows)
+
+    async def _run(self):
+        failures = 0
+        replay_due = True
+        while True:
+            try:
+                if replay_due:
+                    await self.replay()
+                    replay_due = False
+                if not await self._step():
+                    return
+                failures = 0
+            except Exception as e:
+                failures += 1
+                self.worker_errors += 1
+                print(f"Report writer iteration failed: {e}")
+                if self._in_flight:
+                    self._pending.extendleft(reversed(self._in_flight))
+                    self._in_flight = []
+                await asyncio.sleep(self._rng() * min(self.max_backoff, self.base_backoff * (2 ** failures)))
+
+    async def _step(self) -> bool:
+        """One worker iteration; False once stopping with nothing left to write"""
+        if not self._pending:
+            if self._stopping:
+                return False
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.replay_interval)
+            except asyncio.TimeoutError:
+                await self.replay()
+                return True
+            if not self._pending:
+                return True
+        if len(self._pending) < self.batch_size and not self._stopping:
+            # Let concurrent analyses join this batch
+            await asyncio.sleep(self.flush_interval)
+        count = min(self.batch_size, len(self._pending))
+        self._in_flight = [self._pending.popleft() for _ in range(count)]
+        if await self._write(self._in_flight, retries=0 if self._stopping else self.max_retries):
+            self._in_flight = []
+            await self.replay()
+        else:
+            await run_io(self.journal.append, self._in_flight)
+            self.spilled += len(self._in_flight)
+            self._in_flight = []
+        return True
+
+    async def _write(self, rows: List[Dict[str, Any]], retries: int) -> bool:
+        """Insert one batch, retrying with full-jitter backoff"""
+        for attempt in range(retries + 1):
+            try:
+                if asyncio.iscoroutinefunction(self.writer):
+                    await self.writer(rows)
+                else:
+                    await run_io(self.writer, rows)
+            except Exception as e:
+                if attempt == retries:
+                    print(f"Report write failed after {attempt + 1} attempt(s): {e}")
+                    return False
+                self.retries += 1
+                await asyncio.sleep(self._rng() * min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+                continue
+            self.batches += 1
+            self.written += len(rows)
+            return True
+        return False
+
+    async def replay(self) -> int:
+        """
+        Write journaled rows back to the database, oldest first
+
+        Stops at the first failed batch; the rest stays journaled.
+        Rows are claimed before writing, so concurrent replays (e.g. from
+        other workers sharing the journal) never insert the same row twice.
+
+        Returns:
+            Number of rows replayed
+        """
+        replayed = 0
+        if self._replayed_ids:
+            # A delete failed after its rows were written; finish it before claiming more
+            await run_io(self.journal.delete, self._replayed_ids)
+            self._replayed_ids = []
+        while True:
+            entries = await run_io(self.journal.claim, self.batch_size)
+            if not entries:
+                break
+            journal_ids = [journal_id for journal_id, _ in entries]
+            if not await self._write([row for _, row in entries], retries=0):
+                await run_io(self.journal.release, journal_ids)
+                break
+            self._replayed_ids = journal_ids
+            await run_io(self.journal.delete, journal_ids)
+            self._replayed_ids = []
+            replayed += len(entries)
+        if replayed:
+            self.replayed += replayed
+            print(f"Replayed {replayed} journaled report(s)")
+        return replayed
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Flush queued reports and stop the worker
+
+        Args:
+            timeout: Seconds to wait for the flush; rows still unwritten are journaled
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        leftover: List[Dict[str, Any]] = []
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except (asyncio.TimeoutError, Exception) as e:
+            print(f"Report writer did not drain cleanly: {e!r}")
+            self._task.cancel()
+            leftover = self._in_flight + list(self._pending)
+            self._pending.clear()
+            self._in_flight = []
+        if self._spill_task is not None:
+            await self._spill_task
+            self._spill_task = None
+        leftover += self._overflow
+        self._overflow = []
+        if leftover:
+            await run_io(self.journal.append, leftover)
+            self.spilled += len(leftover)
+        self._task = None
+        self.journal.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, write counters and journal backlog"""
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "pending": len(self._pending) + len(self._in_flight) + len(self._overflow),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "worker_errors": self.worker_errors,
+            "journal_pending": self.journal.pending,
+        }
+
+
+# Global instance
+report_writer = ReportWriteBehind.from_env()
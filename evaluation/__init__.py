@@ -1,11 +1,18 @@
 """Evaluation package for tracking metrics and quality assessment"""
-from evaluation.metrics import EvaluationMetrics, evaluation_tracker
+from evaluation.metrics import (
+    EvaluationMetrics,
+    evaluation_tracker,
+    evaluation_context,
+    get_evaluation_metrics
+)
 from evaluation.confidence import ConfidenceScorer
 from evaluation.hallucination import HallucinationDetector
 
 __all__ = [
     "EvaluationMetrics",
     "evaluation_tracker",
+    "evaluation_context",
+    "get_evaluation_metrics",
     "ConfidenceScorer",
     "HallucinationDetector"
 ]
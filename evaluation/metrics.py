@@ -1,7 +1,9 @@
 """
 Token usage tracking and evaluation metrics
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
@@ -34,6 +36,35 @@ class SearchMetrics:
     queries_count: int = 0
     results_found: int = 0
     search_time_ms: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+@dataclass
+class ResultCacheMetrics:
+    """Metrics for the semantic result cache"""
+    cache_hit: bool = False
+    force_refresh: bool = False
+    source_id: Optional[int] = None
+    similarity: float = 0.0
+    age_seconds: float = 0.0
+
+
+@dataclass
+class PipelineMetrics:
+    """Metrics for the stage graph execution"""
+    total_time_ms: float = 0.0
+    stage_timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SubcallMetrics:
+    """Timing of one LLM call made inside an agent"""
+    agent_name: str
+    call: str
+    execution_time_ms: float = 0.0
+    start_offset_ms: float = 0.0
 
 
 class EvaluationMetrics:
@@ -48,8 +79,12 @@ class EvaluationMetrics:
         """Reset all metrics"""
         self.total_tokens: int = 0
         self.agent_metrics: List[AgentMetrics] = []
+        self.subcall_metrics: List[SubcallMetrics] = []
+        self.degraded_stages: Dict[str, str] = {}
         self.retrieval_metrics: Optional[RetrievalMetrics] = None
         self.search_metrics: Optional[SearchMetrics] = None
+        self.result_cache_metrics: Optional[ResultCacheMetrics] = None
+        self.pipeline_metrics: Optional[PipelineMetrics] = None
         self.overall_confidence: float = 0.0
         self.hallucination_risk: str = "LOW"
         self.hallucination_flags: List[str] = []
@@ -119,12 +154,81 @@ class EvaluationMetrics:
             search_time_ms: Search time in milliseconds
         """
         results_count = sum(1 for r in results if r.get('results'))
+        cache_hits = sum(1 for r in results if r.get('cache') in ("hit", "stale"))
+        cache_misses = sum(1 for r in results if r.get('cache') == "miss")
         
         self.search_metrics = SearchMetrics(
             search_performed=search_performed,
             queries_count=len(queries),
             results_found=results_count,
-            search_time_ms=search_time_ms
+            search_time_ms=search_time_ms,
+            cache_hits=cache_hits,
+            cache_misses=cache_misses
+        )
+    
+    def set_result_cache_metrics(self, cache_hit: bool, force_refresh: bool = False, source_row: Optional[Dict] = None, age_seconds: float = 0.0):
+        """
+        Record whether the semantic result cache served this analysis
+        
+        Args:
+            cache_hit: Whether a stored report was returned
+            force_refresh: Whether the caller bypassed the cache
+            source_row: The matching stored row on a hit
+            age_seconds: Age of the stored report on a hit
+        """
+        self.result_cache_metrics = ResultCacheMetrics(
+            cache_hit=cache_hit,
+            force_refresh=force_refresh,
+            source_id=source_row.get('id') if source_row else None,
+            similarity=source_row.get('similarity', 0.0) if source_row else 0.0,
+            age_seconds=age_seconds
+        )
+    
+    def add_subcall_metrics(self, agent_name: str, call: str, execution_time_ms: float, start_offset_ms: float = 0.0):
+        """
+        Add timing for an LLM call made inside an agent
+        
+        Args:
+            agent_name: Name of the agent making the call
+            call: Name of the sub-call (e.g. "revenue_assumptions")
+            execution_time_ms: Call duration in milliseconds
+            start_offset_ms: When the call started, relative to the start of the agent's execute
+        """
+        self.subcall_metrics.append(SubcallMetrics(
+            agent_name=agent_name,
+            call=call,
+            execution_time_ms=execution_time_ms,
+            start_offset_ms=start_offset_ms
+        ))
+    
+    def add_degraded_stage(self, stage_name: str, reason: str):
+        """
+        Record a stage that returned placeholder output because time ran out
+        
+        Args:
+            stage_name: Pipeline stage name
+            reason: Why the stage degraded (e.g. the timeout message)
+        """
+        self.degraded_stages[stage_name] = reason
+    
+    def set_pipeline_metrics(self, pipeline_run: Any):
+        """
+        Set stage graph metrics
+        
+        Args:
+            pipeline_run: PipelineRun with per-stage timings and the critical path
+        """
+        self.pipeline_metrics = PipelineMetrics(
+            total_time_ms=pipeline_run.total_ms,
+            stage_timings={
+                name: {
+                    "start_ms": round(timing.start_ms, 2),
+                    "end_ms": round(timing.end_ms, 2),
+                    "duration_ms": round(timing.duration_ms, 2)
+                }
+                for name, timing in pipeline_run.timings.items()
+            },
+            critical_path=list(pipeline_run.critical_path)
         )
     
     def calculate_overall_confidence(self) -> float:
@@ -231,6 +335,16 @@ class EvaluationMetrics:
                 }
                 for m in self.agent_metrics
             ],
+            "subcall_metrics": [
+                {
+                    "agent": m.agent_name,
+                    "call": m.call,
+                    "execution_time_ms": round(m.execution_time_ms, 2),
+                    "start_offset_ms": round(m.start_offset_ms, 2)
+                }
+                for m in self.subcall_metrics
+            ],
+            "degraded_stages": dict(self.degraded_stages),
             "retrieval_metrics": {
                 "similar_ideas_count": self.retrieval_metrics.similar_ideas_count,
                 "top_similarity": round(self.retrieval_metrics.top_similarity_score, 3),
@@ -241,8 +355,23 @@ class EvaluationMetrics:
                 "search_performed": self.search_metrics.search_performed,
                 "queries_count": self.search_metrics.queries_count,
                 "results_found": self.search_metrics.results_found,
-                "search_time_ms": round(self.search_metrics.search_time_ms, 2)
-            } if self.search_metrics else None
+                "search_time_ms": round(self.search_metrics.search_time_ms, 2),
+                "cache_hits": self.search_metrics.cache_hits,
+                "cache_misses": self.search_metrics.cache_misses
+            } if self.search_metrics else None,
+            "pipeline": {
+                "total_time_ms": round(self.pipeline_metrics.total_time_ms, 2),
+                "critical_path": self.pipeline_metrics.critical_path,
+                "stages": self.pipeline_metrics.stage_timings
+            } if self.pipeline_metrics else None,
+            "cache_hit": bool(self.result_cache_metrics and self.result_cache_metrics.cache_hit),
+            "result_cache": {
+                "cache_hit": self.result_cache_metrics.cache_hit,
+                "force_refresh": self.result_cache_metrics.force_refresh,
+                "source_id": self.result_cache_metrics.source_id,
+                "similarity": round(self.result_cache_metrics.similarity, 4),
+                "age_seconds": round(self.result_cache_metrics.age_seconds, 1)
+            } if self.result_cache_metrics else None
         }
     
     def print_summary(self):
@@ -262,6 +391,11 @@ class EvaluationMetrics:
             for flag in self.hallucination_flags:
                 print(f"    - {flag}")
         
+        if self.degraded_stages:
+            print(f"\n⌛ DEGRADED STAGES (deadline reached):")
+            for stage_name, reason in self.degraded_stages.items():
+                print(f"    - {stage_name}: {reason}")
+        
         if self.retrieval_metrics:
             print(f"\n🔍 RETRIEVAL METRICS:")
             print(f"  Similar Ideas Found: {self.retrieval_metrics.similar_ideas_count}")
@@ -275,11 +409,26 @@ class EvaluationMetrics:
             print(f"  Queries Executed: {self.search_metrics.queries_count}")
             print(f"  Results Found: {self.search_metrics.results_found}")
             print(f"  Search Time: {self.search_metrics.search_time_ms:.0f}ms")
+            print(f"  Cache Hits/Misses: {self.search_metrics.cache_hits}/{self.search_metrics.cache_misses}")
+        
+        if self.result_cache_metrics and self.result_cache_metrics.cache_hit:
+            print(f"\n♻️  RESULT CACHE HIT:")
+            print(f"  Stored Report ID: {self.result_cache_metrics.source_id}")
+            print(f"  Similarity: {self.result_cache_metrics.similarity:.1%}")
+            print(f"  Report Age: {self.result_cache_metrics.age_seconds/3600:.1f}h")
+        
+        if self.pipeline_metrics:
+            print(f"\n⏱️  PIPELINE:")
+            print(f"  Critical Path: {' -> '.join(self.pipeline_metrics.critical_path)}")
+            print(f"  Pipeline Time: {self.pipeline_metrics.total_time_ms:.0f}ms")
         
         print(f"\n🤖 AGENT METRICS:")
         for metrics in self.agent_metrics:
             print(f"  {metrics.agent_name}:")
             print(f"    Tokens: {metrics.tokens_used:,} | Time: {metrics.execution_time_ms:.0f}ms | Confidence: {metrics.confidence_score:.1%}")
+            for subcall in self.subcall_metrics:
+                if subcall.agent_name == metrics.agent_name:
+                    print(f"      {subcall.call}: {subcall.execution_time_ms:.0f}ms (at +{subcall.start_offset_ms:.0f}ms)")
         
         print("\n" + "="*80 + "\n")
     
@@ -289,5 +438,41 @@ class EvaluationMetrics:
             json.dump(self.get_summary(), f, indent=2)
 
 
-# Global instance
+# Global instance (fallback when no request-scoped metrics are bound)
 evaluation_tracker = EvaluationMetrics()
+
+_current_metrics: ContextVar[EvaluationMetrics] = ContextVar(
+    "evaluation_metrics", default=evaluation_tracker
+)
+
+
+def get_evaluation_metrics() -> EvaluationMetrics:
+    """
+    Get the metrics tracker bound to the current request
+
+    Falls back to the process-wide ``evaluation_tracker`` outside of an
+    ``evaluation_context`` block (e.g. scripts calling agents directly).
+    """
+    return _current_metrics.get()
+
+
+@contextmanager
+def evaluation_context(metrics: Optional[EvaluationMetrics] = None) -> Iterator[EvaluationMetrics]:
+    """
+    Bind a request-scoped metrics tracker for the duration of the block
+
+    Tasks spawned inside the block (asyncio.gather, create_task) inherit the
+    binding, so concurrent analyses never share a tracker.
+
+    Args:
+        metrics: Tracker to bind; a fresh one is created if omitted
+
+    Yields:
+        The bound EvaluationMetrics instance
+    """
+    metrics = metrics or EvaluationMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
@@ -58,17 +58,7 @@ if (ideaForm) {
         showLoadingModal();
 
         try {
-            const response = await fetch(`${API_BASE_URL}/api/analyze`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(formData)
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const result = await response.json();
+            const result = await analyzeWithProgress(formData);
             hideLoadingModal();
             displayResults(result);
             ideaForm.reset();
@@ -80,15 +70,119 @@ if (ideaForm) {
     });
 }
 
+// ===== STREAMED ANALYSIS =====
+// Progress step index activated by each pipeline event
+const STAGE_PROGRESS = {
+    retrieval: 0,
+    planner: 1,
+    market_intelligence: 1,
+    financial_strategy: 2,
+    go_to_market: 2,
+    success_probability: 2,
+    critic: 3
+};
+
+async function analyzeWithProgress(formData) {
+    const response = await fetch(`${API_BASE_URL}/api/analyze/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+        body: JSON.stringify(formData)
+    });
+
+    // Older backends without the streaming endpoint
+    if (response.status === 404 || !response.body) {
+        return analyzeBlocking(formData);
+    }
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const message = parseSseMessage(raw);
+            if (!message) continue;
+
+            if (message.event === 'error') {
+                throw new Error(message.data.detail || 'Analysis failed');
+            }
+            if (message.event === 'result') {
+                result = message.data;
+            }
+            updateLoadingProgress(message.event, message.data);
+        }
+    }
+
+    if (!result) {
+        throw new Error('Analysis stream ended without a result');
+    }
+    return result;
+}
+
+async function analyzeBlocking(formData) {
+    const response = await fetch(`${API_BASE_URL}/api/analyze`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(formData)
+    });
+
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
+function parseSseMessage(raw) {
+    let event = 'message';
+    const dataLines = [];
+    raw.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+    });
+    // Comment-only messages are heartbeats
+    if (!dataLines.length) return null;
+    return { event, data: JSON.parse(dataLines.join('\n')) };
+}
+
+function updateLoadingProgress(event, data) {
+    const stage = event === 'retrieval' ? 'retrieval' : data.stage;
+    const stepIndex = STAGE_PROGRESS[stage];
+    if (stepIndex !== undefined) {
+        document.querySelectorAll('.progress-step').forEach((step, index) => {
+            if (index <= stepIndex) step.classList.add('active');
+        });
+    }
+
+    const status = document.getElementById('loadingStatus');
+    if (!status) return;
+    if (event === 'stage_completed') {
+        const label = (data.metrics && data.metrics.agent) || data.stage;
+        status.textContent = `${label} finished in ${(data.duration_ms / 1000).toFixed(1)}s`;
+    } else if (event === 'cache_hit') {
+        status.textContent = 'Found a recent analysis of a near-identical idea';
+    } else if (event === 'result') {
+        status.textContent = 'Rendering dashboard...';
+    }
+}
+
 function showLoadingModal() {
     if (!loadingModal) return;
     loadingModal.classList.add('active');
     document.body.style.overflow = 'hidden';
 
     const steps = document.querySelectorAll('.progress-step');
-    steps.forEach((step, index) => {
-        setTimeout(() => step.classList.add('active'), index * 1000);
-    });
+    steps.forEach((step, index) => step.classList.toggle('active', index === 0));
 }
 
 function hideLoadingModal() {
@@ -0,0 +1,14 @@
+"""Jobs package for running analyses in the background"""
+from jobs.store import Job, JobStore, InMemoryJobStore, SQLiteJobStore, create_job_store
+from jobs.manager import JobManager, QueueFullError, job_manager
+
+__all__ = [
+    "Job",
+    "JobStore",
+    "InMemoryJobStore",
+    "SQLiteJobStore",
+    "create_job_store",
+    "JobManager",
+    "QueueFullError",
+    "job_manager"
+]
@@ -0,0 +1,319 @@
+"""
+Background worker pool for analysis jobs
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from jobs.store import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, Job, JobStore, create_job_store
+from runtime.offload import run_io
+
+load_dotenv()
+
+# runner(request, on_event) -> JSON-serialisable result
+JobRunner = Callable[[Dict[str, Any], Callable[[str, Dict[str, Any]], None]], Awaitable[Dict[str, Any]]]
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue is at capacity"""
+
+
+class JobManager:
+    """
+    Runs analysis jobs on a bounded pool of asyncio workers
+
+    ``submit`` returns immediately with a queued job; ``max_workers`` jobs run
+    concurrently and at most ``max_queue`` wait behind them. Progress events
+    from the pipeline update the job's stages and partial sections, which are
+    persisted to the job store as stages complete.
+
+    With a shared store, a job running in another process is cancelled by
+    flagging it in the store; the owning process polls the flag every
+    ``cancel_poll_seconds`` while the job runs.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        max_workers: int = 4,
+        max_queue: int = 100,
+        retention_seconds: float = 24 * 3600,
+        cancel_poll_seconds: float = 1.0,
+    ):
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(1, max_queue)
+        self.retention_seconds = retention_seconds
+        self.cancel_poll_seconds = cancel_poll_seconds
+        self.runner: Optional[JobRunner] = None
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Jobs owned by this process that are queued or running
+        self._active: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: Set[str] = set()
+        self._persist_locks: Dict[str, asyncio.Lock] = {}
+        self._background: Set[asyncio.Task] = set()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.runs_started = 0
+        self.runs_finished = 0
+        self.peak_queue_depth = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        """Build a manager from JOB_* environment variables"""
+        return cls(
+            store=create_job_store(),
+            max_workers=int(os.getenv("JOB_WORKERS", "4")),
+            max_queue=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+            retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600))),
+            cancel_poll_seconds=float(os.getenv("JOB_CANCEL_POLL_SECONDS", "1")),
+        )
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    def start(self, runner: JobRunner):
+        """
+        Start the worker tasks on the running event loop
+
+        Args:
+            runner: Coroutine function executing one job's request
+        """
+        if self.started:
+            return
+        self.runner = runner
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    async def stop(self):
+        """Cancel workers and running jobs; unfinished jobs are marked cancelled"""
+        for task in list(self._tasks.values()) + self._workers:
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), *self._workers, return_exceptions=True)
+        for job in list(self._active.values()):
+            self._finish(job, CANCELLED, error="Server shutting down")
+            await self._persist(job)
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self.store.close()
+
+    async def submit(self, request: Dict[str, Any]) -> Job:
+        """
+        Queue a job
+
+        Args:
+            request: Analysis request (idea, industry, target_market, force_refresh)
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If max_queue jobs are already waiting
+            RuntimeError: If the manager has not been started
+        """
+        if not self.started:
+            raise RuntimeError("Job manager is not running")
+        if self._queue.full():
+            self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queue} waiting)")
+
+        job = Job(request=request)
+        self._active[job.id] = job
+        self._queue.put_nowait(job.id)
+        self.submitted += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._queue.qsize())
+        await self._persist(job)
+
+        if self.submitted % 100 == 0:
+            self._in_background(run_io(self.store.prune, time.time() - self.retention_seconds))
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get a job (live state for jobs owned by this process)"""
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+        return await run_io(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            The job after the cancellation request, or None if unknown.
+            A running job is still "running" with ``cancel_requested`` set
+            until its runner has stopped.
+        """
+        job = self._active.get(job_id)
+        if job is None:
+            job = await run_io(self.store.get, job_id)
+            if job is not None and job.status == QUEUED:
+                # Queued by another process sharing the store: its worker skips it
+                self._finish(job, CANCELLED)
+                await self._persist(job)
+            elif job is not None and job.status == RUNNING:
+                # Running in another process: its cancel watcher stops it
+                await run_io(self.store.request_cancel, job_id)
+                job.cancel_requested = True
+            return job
+
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+            self._active.pop(job_id, None)
+            await self._persist(job)
+        elif job.status == RUNNING:
+            self._cancel_requested.add(job_id)
+            job.cancel_requested = True
+            task = self._tasks.get(job_id)
+            if task is not None:
+                task.cancel()
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._active.get(job_id)
+                if job is None or job.finished:
+                    continue
+                stored = await run_io(self.store.get, job_id)
+                if stored is not None and stored.status == CANCELLED:
+                    self._active.pop(job_id, None)
+                    self.cancelled += 1
+                    continue
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        self.runs_started += 1
+        self.total_wait_ms += (job.started_at - job.created_at) * 1000
+        await self._persist(job)
+
+        task = asyncio.create_task(self.runner(job.request, lambda event, payload: self._on_event(job, event, payload)))
+        self._tasks[job.id] = task
+        watcher = asyncio.create_task(self._watch_cancel(job.id, task)) if self.store.shared else None
+        try:
+            result = await task
+            if job.result is None:
+                job.result = result
+            self._finish(job, SUCCEEDED)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED, error=None if job.id in self._cancel_requested else "Server shutting down")
+            if job.id not in self._cancel_requested:
+                raise
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            self._finish(job, FAILED, error=str(e))
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self._tasks.pop(job.id, None)
+            self._cancel_requested.discard(job.id)
+            self._active.pop(job.id, None)
+            self.runs_finished += 1
+            self.total_run_ms += (job.finished_at - job.started_at) * 1000
+            await asyncio.shield(self._persist(job))
+            self._persist_locks.pop(job.id, None)
+
+    async def _watch_cancel(self, job_id: str, task: asyncio.Task):
+        """Cancel a running job once another process flags it in the shared store"""
+        while not task.done():
+            await asyncio.sleep(self.cancel_poll_seconds)
+            try:
+                requested = await run_io(self.store.cancel_requested, job_id)
+            except Exception as e:
+                print(f"Error polling cancellation of job {job_id}: {e}")
+                continue
+            if requested:
+                self._cancel_requested.add(job_id)
+                task.cancel()
+                return
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if status == SUCCEEDED:
+            self.completed += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+
+    def _on_event(self, job: Job, event: str, payload: Dict[str, Any]):
+        """Fold a pipeline progress event into the job"""
+        if event == "retrieval":
+            job.stages["retrieval"] = {"status": "completed", "duration_ms": payload.get("duration_ms")}
+        elif event == "stage_started":
+            job.stages[payload["stage"]] = {"status": "running"}
+        elif event == "partial":
+            job.partial[payload["key"]] = payload["value"]
+        elif event == "stage_completed":
+            job.stages[payload["stage"]] = {
+                "status": "completed",
+                "duration_ms": round(payload.get("duration_ms", 0.0), 2),
+                "metrics": payload.get("metrics"),
+            }
+            job.partial.update(payload.get("outputs") or {})
+            self._in_background(self._persist(job))
+        elif event == "result":
+            job.result = payload
+            self._in_background(self._persist(job))
+
+    def _in_background(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _persist(self, job: Job):
+        """Save a snapshot of the job; saves of the same job are serialised"""
+        lock = self._persist_locks.setdefault(job.id, asyncio.Lock())
+        async with lock:
+            # Snapshot on the loop so the store never sees a half-updated job
+            snapshot = Job.from_dict(job.to_dict())
+            try:
+                await run_io(self.store.save, snapshot)
+            except Exception as e:
+                print(f"Error saving job {job.id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get worker pool and queue metrics"""
+        return {
+            "workers": self.max_workers,
+            "running": len(self._tasks),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_ms / self.runs_started, 2) if self.runs_started else 0.0,
+            "avg_run_ms": round(self.total_run_ms / self.runs_finished, 2) if self.runs_finished else 0.0,
+        }
+
+
+# Global instance
+job_manager = JobManager.from_env()
@@ -0,0 +1,223 @@
+"""
+Job records and pluggable job stores
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """An analysis job and its progress"""
+    request: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # stage name -> {"status", "duration_ms", "metrics"}
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Report sections available so far (context key -> text)
+    partial: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Set once a cancel was requested for a running job that has not stopped yet
+    cancel_requested: bool = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        return cls(**data)
+
+
+class JobStore:
+    """Interface for job persistence"""
+
+    # Whether other processes read and write the same jobs
+    shared = False
+
+    def save(self, job: Job):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def list_by_status(self, status: str) -> List[Job]:
+        raise NotImplementedError
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished jobs that finished before ``older_than`` (epoch seconds)"""
+        raise NotImplementedError
+
+    def request_cancel(self, job_id: str):
+        """Flag a running job for cancellation by the process that owns it"""
+        raise NotImplementedError
+
+    def cancel_requested(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store for single-worker and local runs"""
+
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cancellations: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def save(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = json.loads(json.dumps(job.to_dict(), default=str))
+            self._jobs.move_to_end(job.id)
+            # Evict the oldest finished jobs first
+            while len(self._jobs) > self.max_jobs:
+                victim = next((k for k, v in self._jobs.items() if v["status"] in FINISHED_STATES), None)
+                if victim is None:
+                    break
+                del self._jobs[victim]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            data = self._jobs.get(job_id)
+        return Job.from_dict(data) if data else None
+
+    def list_by_status(self, status: str) -> List[Job]:
+        with self._lock:
+            return [Job.from_dict(v) for v in self._jobs.values() if v["status"] == status]
+
+    def prune(self, older_than: float) -> int:
+        with self._lock:
+            expired = [
+                k for k, v in self._jobs.items()
+                if v["status"] in FINISHED_STATES and (v["finished_at"] or 0) < older_than
+            ]
+            for key in expired:
+                del self._jobs[key]
+                self._cancellations.discard(key)
+        return len(expired)
+
+    def request_cancel(self, job_id: str):
+        with self._lock:
+            self._cancellations.add(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancellations
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite job store shared by every worker process on the host"""
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, "
+                "created_at REAL NOT NULL, finished_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, created_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_cancellations (id TEXT PRIMARY KEY, requested_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def save(self, job: Job):
+        data = json.dumps(job.to_dict(), default=str)
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO jobs (id, status, data, created_at, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, data, job.created_at, job.finished_at),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_dict(json.loads(row[0])) if row else None
+
+    def list_by_status(self, status: str) -> List[Job]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM jobs WHERE status = ? ORDER BY created_at", (status,)
+            ).fetchall()
+        return [Job.from_dict(json.loads(row[0])) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        with self._lock:
+            cursor = self._connection().execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*FINISHED_STATES, older_than),
+            )
+            self._connection().execute("DELETE FROM job_cancellations WHERE id NOT IN (SELECT id FROM jobs)")
+        return cursor.rowcount
+
+    def request_cancel(self, job_id: str):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO job_cancellations (id, requested_at) VALUES (?, ?)", (job_id, time.time())
+            )
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT 1 FROM job_cancellations WHERE id = ?", (job_id,)).fetchone()
+        return row is not None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_job_store(backend: Optional[str] = None) -> JobStore:
+    """
+    Create the job store selected by JOB_STORE
+
+    Args:
+        backend: "memory" or "sqlite" (defaults to JOB_STORE)
+
+    Returns:
+        A JobStore instance
+    """
+    backend = backend or os.getenv("JOB_STORE", "memory")
+    if backend == "memory":
+        return InMemoryJobStore(max_jobs=int(os.getenv("JOB_STORE_MAX_JOBS", "10000")))
+    if backend == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_STORE_PATH", os.path.join(os.getcwd(), "jobs.sqlite3")))
+    raise ValueError(f"Unknown JOB_STORE '{backend}', expected 'memory' or 'sqlite'")
@@ -1,6 +1,9 @@
 import os
+import json
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -11,6 +14,79 @@ from models.schemas import StartupIdeaRequest, FeasibilityResponse, HealthRespon
 from agents.orchestrator import orchestrator
 from database.vector_db import vector_db
 from database.supabase_client import SupabaseClient
+from database.write_behind import report_writer
+from database.async_client import async_db
+from runtime.offload import run_io, run_cpu, offload_stats, shutdown_offload_pools
+from tools.search_cache import search_cache
+from agents.llm_cache import llm_cache
+from agents.llm_clients import llm_clients
+from agents.rate_limiter import llm_rate_limiter
+from runtime.deadline import llm_call_policy
+from rag.embeddings import embedding_service
+from rag.batcher import embedding_batcher
+from rag.semantic_cache import semantic_cache, without_metadata
+from runtime.readiness import readiness
+from jobs.manager import job_manager, QueueFullError
+
+
+async def _warm_embedding_model():
+    """Load the embedding model and run a dummy batch through it"""
+    await run_cpu(embedding_service.warm_up)
+
+
+async def _warm_llm_clients():
+    """Open a connection on the shared LLM pool so the first analysis skips TLS setup"""
+    if not await llm_clients.warm_up():
+        print("No shared LLM connection pool; the first LLM call opens its own connection")
+
+
+async def _warm_http_clients():
+    """Open the pooled database connection and check the round trip"""
+    if not await vector_db.health_check():
+        raise RuntimeError(f"{vector_db.backend} health check failed")
+
+
+async def _warm_vector_index():
+    """Load the local vector index and catch up with Supabase"""
+    await run_io(vector_db.bootstrap_index)
+
+
+async def _sync_vector_index(interval: float):
+    """Periodically mirror rows inserted by other workers into the local index"""
+    while True:
+        await asyncio.sleep(interval)
+        if not vector_db.index_ready:
+            continue
+        try:
+            await run_io(vector_db.sync_index)
+        except Exception as e:
+            print(f"Vector index sync error: {e}")
+
+
+async def _run_analysis_job(request: dict, on_event) -> dict:
+    """Job runner: run one analysis and return the response as a dict"""
+    response = await orchestrator.analyze_startup_idea(
+        idea=request["idea"],
+        industry=request.get("industry") or "general",
+        target_market=request.get("target_market") or "global",
+        force_refresh=request.get("force_refresh", False),
+        on_event=on_event,
+        deadline_seconds=request.get("deadline_seconds")
+    )
+    return response.model_dump()
+
+
+async def _warm_up():
+    steps = [
+        ("embedding_model", _warm_embedding_model, True),
+        ("llm_clients", _warm_llm_clients, True),
+        ("database", _warm_http_clients, False),
+    ]
+    if vector_db.index is not None:
+        # Optional: retrieval falls back to the RPC until the index is ready
+        steps.append(("vector_index", _warm_vector_index, False))
+    await readiness.run(steps)
+    print("Warm-up complete, ready for traffic" if readiness.ready else "Warm-up finished with failures")
 
 
 @asynccontextmanager
@@ -27,13 +103,37 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Database initialization warning: {e}")
     
-    # Initialize Supabase client
-    try:
-        print("Connecting to Supabase...")
-        supabase_client = SupabaseClient()
-        print("Supabase connected")
-    except Exception as e:
-        print(f"Supabase connection warning: {e}")
+    # Initialize Supabase client (the local vector store needs none)
+    if vector_db.backend == "supabase":
+        try:
+            print("Connecting to Supabase...")
+            supabase_client = SupabaseClient()
+            print("Supabase connected")
+        except Exception as e:
+            print(f"Supabase connection warning: {e}")
+    
+    # Warm up in the background so liveness probes answer immediately;
+    # /ready stays 503 until the model and clients are warm.
+    readiness.reset()
+    warmup_task = None
+    if os.getenv("WARMUP_ENABLED", "true").lower() == "true":
+        warmup_task = asyncio.create_task(_warm_up())
+    else:
+        readiness.mark_ready()
+    
+    index_sync_task = None
+    if vector_db.index is not None:
+        if warmup_task is None:
+            await _warm_vector_index()
+        interval = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", "60"))
+        if interval > 0:
+            index_sync_task = asyncio.create_task(_sync_vector_index(interval))
+    
+    # Background worker pool for /api/jobs
+    job_manager.start(_run_analysis_job)
+    
+    # Reports are persisted in batches after the response is sent
+    report_writer.start(vector_db.ainsert_ideas)
     
     print("Application started successfully!")
     
@@ -41,7 +141,18 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("Shutting down application...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if index_sync_task is not None:
+        index_sync_task.cancel()
+    await job_manager.stop()
+    await report_writer.stop(timeout=float(os.getenv("REPORT_WRITE_SHUTDOWN_SECONDS", "10")))
     vector_db.close()
+    shutdown_offload_pools(wait=False)
+    search_cache.close()
+    llm_cache.close()
+    await llm_clients.aclose()
+    await async_db.aclose()
     print("Application shutdown complete")
 
 
@@ -70,7 +181,8 @@ async def root():
         "message": "AI Startup Feasibility Engine API",
         "version": os.getenv("APP_VERSION", "1.2.0"),
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
 
@@ -78,12 +190,7 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     # Check database connection
-    db_connected = False
-    try:
-        supabase_client = SupabaseClient()
-        db_connected = await supabase_client.health_check()
-    except Exception as e:
-        print(f"Health check error: {e}")
+    db_connected = await vector_db.health_check(timeout=float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2")))
     
     return HealthResponse(
         status="healthy" if db_connected else "degraded",
@@ -92,6 +199,37 @@ async def health_check():
     )
 
 
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness probe: 200 only once warm-up has finished"""
+    summary = readiness.summary()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if summary["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=summary
+    )
+
+
+@app.get("/metrics", tags=["Health"])
+async def runtime_metrics():
+    """Runtime metrics for the worker (offload pools, caches)"""
+    return {
+        "offload": offload_stats(),
+        "search_cache": search_cache.stats(),
+        "embedding_cache": embedding_service.cache_stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_clients": llm_clients.stats(),
+        "llm_rate_limiter": llm_rate_limiter.stats(),
+        "llm_calls": llm_call_policy.stats(),
+        "jobs": job_manager.stats(),
+        "report_writer": report_writer.stats(),
+        "supabase_http": async_db.stats(),
+        "vector_index": vector_db.index.stats() if vector_db.index is not None else None,
+        "vector_store": vector_db.stats()
+    }
+
+
 @app.post(
     "/api/analyze",
     response_model=FeasibilityResponse,
@@ -124,7 +262,9 @@ async def analyze_startup_idea(request: StartupIdeaRequest):
         response = await orchestrator.analyze_startup_idea(
             idea=request.idea,
             industry=request.industry or "general",
-            target_market=request.target_market or "global"
+            target_market=request.target_market or "global",
+            force_refresh=request.force_refresh,
+            deadline_seconds=request.deadline_seconds
         )
         
         return response
@@ -137,6 +277,158 @@ async def analyze_startup_idea(request: StartupIdeaRequest):
         )
 
 
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/analyze/stream", tags=["Analysis"])
+async def analyze_startup_idea_stream(request: StartupIdeaRequest, http_request: Request):
+    """
+    Analyze a startup idea, streaming progress as Server-Sent Events
+    
+    Events: retrieval, cache_hit, stage_started, partial (a finished report
+    section), stage_completed (timings, tokens, confidence, outputs), result
+    (the full FeasibilityResponse), done, and error. Comment heartbeats are
+    sent while agents are busy so proxies do not close an idle connection.
+    
+    Args:
+        request: Startup idea request with idea description and optional metadata
+        http_request: Incoming request, used to detect client disconnects
+        
+    Returns:
+        text/event-stream response
+    """
+    heartbeat_seconds = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def run_analysis():
+        try:
+            await orchestrator.analyze_startup_idea(
+                idea=request.idea,
+                industry=request.industry or "general",
+                target_market=request.target_market or "global",
+                force_refresh=request.force_refresh,
+                deadline_seconds=request.deadline_seconds,
+                on_event=lambda event, payload: events.put_nowait((event, payload))
+            )
+            events.put_nowait(("done", {}))
+        except Exception as e:
+            print(f"Streaming analysis error: {e}")
+            events.put_nowait(("error", {"detail": f"Analysis failed: {str(e)}"}))
+    
+    async def event_stream():
+        task = asyncio.create_task(run_analysis())
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(events.get(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    if await http_request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse_event(event, payload)
+                if event in ("done", "error"):
+                    break
+        finally:
+            # Client went away: stop spending LLM calls on an unread analysis
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/jobs", status_code=status.HTTP_202_ACCEPTED, tags=["Jobs"])
+async def submit_analysis_job(request: StartupIdeaRequest):
+    """
+    Queue an analysis and return its job id immediately
+    
+    Args:
+        request: Startup idea request with idea description and optional metadata
+        
+    Returns:
+        Job id, status and the URL to poll
+        
+    Raises:
+        HTTPException: 503 if the job queue is full
+    """
+    try:
+        job = await job_manager.submit(request.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}"
+    }
+
+
+@app.get("/api/jobs/{job_id}", tags=["Jobs"])
+async def get_analysis_job(job_id: str):
+    """
+    Get a job's status, per-stage progress, partial sections and result
+    
+    Args:
+        job_id: ID returned by POST /api/jobs
+        
+    Returns:
+        The job record
+        
+    Raises:
+        HTTPException: If the job is not found
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return job.to_dict()
+
+
+@app.delete("/api/jobs/{job_id}", tags=["Jobs"])
+async def cancel_analysis_job(job_id: str):
+    """
+    Cancel a queued or running job
+    
+    Args:
+        job_id: ID returned by POST /api/jobs
+        
+    Returns:
+        The job record after the cancellation request (202 while a running
+        job has not stopped yet, e.g. when it runs in another worker process)
+        
+    Raises:
+        HTTPException: If the job is not found or already finished
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    if job.finished:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} already {job.status}"
+        )
+    
+    job = await job_manager.cancel(job_id)
+    if not job.finished:
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.to_dict())
+    return job.to_dict()
+
+
 @app.get("/similar/{idea_id}", tags=["Analysis"])
 async def get_similar_ideas(idea_id: int, top_k: int = 5):
     """
@@ -154,7 +446,7 @@ async def get_similar_ideas(idea_id: int, top_k: int = 5):
     """
     try:
         # Get the idea
-        idea_data = vector_db.get_idea_by_id(idea_id)
+        idea_data = await vector_db.aget_idea_by_id(idea_id, include_embedding=True)
         
         if not idea_data:
             raise HTTPException(
@@ -162,13 +454,18 @@ async def get_similar_ideas(idea_id: int, top_k: int = 5):
                 detail=f"Idea with ID {idea_id} not found"
             )
         
-        # Get similar ideas
+        # Get similar ideas, reusing the stored vector instead of re-encoding
         from rag.retrieval import rag_service
-        similar_ideas = await rag_service.retrieve_similar_ideas(idea_data["idea"])
+        stored_embedding = idea_data.pop("embedding", None)
+        similar_ideas = await rag_service.retrieve_similar_ideas(idea_data["idea"], embedding=stored_embedding)
         
+        # Cache metadata (critique, hallucination checks) stays internal
+        idea_data["report"] = without_metadata(idea_data.get("report"))
         return {
             "idea": idea_data,
-            "similar_ideas": similar_ideas[:top_k]
+            "similar_ideas": [
+                {**item, "report": without_metadata(item.get("report"))} for item in similar_ideas[:top_k]
+            ]
         }
         
     except HTTPException:
@@ -7,6 +7,8 @@ class StartupIdeaRequest(BaseModel):
     idea: str = Field(..., description="The startup idea to analyze", min_length=10)
     industry: Optional[str] = Field(None, description="Industry sector")
     target_market: Optional[str] = Field(None, description="Target market or geography")
+    force_refresh: bool = Field(False, description="Bypass the semantic result cache and re-run the analysis")
+    deadline_seconds: Optional[float] = Field(None, description="Time budget for the analysis in seconds; sections not finished in time are returned as placeholders", gt=0)
 
 
 class FeasibilityReport(BaseModel):
@@ -1,10 +1,16 @@
 """RAG package for embeddings and retrieval"""
 from rag.embeddings import EmbeddingService, embedding_service
+from rag.batcher import EmbeddingBatcher, embedding_batcher
 from rag.retrieval import RAGService, rag_service
+from rag.semantic_cache import SemanticCache, semantic_cache
 
 __all__ = [
     "EmbeddingService",
     "embedding_service",
+    "EmbeddingBatcher",
+    "embedding_batcher",
     "RAGService",
-    "rag_service"
+    "rag_service",
+    "SemanticCache",
+    "semantic_cache"
 ]
@@ -0,0 +1,179 @@
+"""
+Pluggable inference backends for EmbeddingService
+
+Every backend exposes the subset of the SentenceTransformer API that
+EmbeddingService relies on: ``encode(texts, convert_to_numpy=True)`` and
+``get_sentence_embedding_dimension()``.
+"""
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+BACKENDS = ("sentence-transformers", "onnx")
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """
+    Mean-pool token embeddings over the attention mask (sentence-transformers pooling)
+
+    Args:
+        token_embeddings: Array of shape (batch, tokens, hidden)
+        attention_mask: Array of shape (batch, tokens)
+        normalize: L2-normalize the pooled vectors
+
+    Returns:
+        float32 array of shape (batch, hidden)
+    """
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings.astype(np.float32) * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    pooled = summed / counts
+    if normalize:
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        pooled = pooled / np.clip(norms, 1e-12, None)
+    return pooled.astype(np.float32)
+
+
+class OnnxEmbeddingBackend:
+    """
+    ONNX Runtime backend with optional dynamic int8 quantization
+
+    Only ``onnxruntime`` and ``tokenizers`` are needed at serving time. If no
+    exported model exists yet, it is exported once from the HuggingFace
+    checkpoint (this one-off step needs torch + transformers) and cached next
+    to the sentence-transformers cache.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_folder: str,
+        model_path: Optional[str] = None,
+        quantize: bool = False,
+        max_length: int = 256,
+        normalize: bool = True,
+        num_threads: Optional[int] = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.max_length = max_length
+        self.normalize = normalize
+
+        export_dir = os.path.join(cache_folder, "onnx", model_name.replace("/", "__"))
+        self.model_path = model_path or os.path.join(export_dir, "model.onnx")
+        if not os.path.exists(self.model_path):
+            self._export(self.model_path)
+        if quantize:
+            self.model_path = self._quantize(self.model_path)
+
+        self.tokenizer = Tokenizer.from_pretrained(model_name)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension: Optional[int] = None
+
+    def _export(self, path: str):
+        """Export the HuggingFace checkpoint to ONNX (one-off, needs torch)"""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        print(f"Exporting {self.model_name} to ONNX at {path}...")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModel.from_pretrained(self.model_name).eval()
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        dynamic = {0: "batch", 1: "tokens"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                path,
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": dynamic,
+                    "attention_mask": dynamic,
+                    "token_type_ids": dynamic,
+                    "last_hidden_state": dynamic,
+                },
+                opset_version=14,
+            )
+
+    @staticmethod
+    def _quantize(path: str) -> str:
+        """Dynamically quantize weights to int8, caching the result"""
+        root, ext = os.path.splitext(path)
+        quantized_path = f"{root}.int8{ext}"
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            print(f"Quantizing {path} to int8...")
+            quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    def encode(self, texts: Union[str, List[str]], convert_to_numpy: bool = True) -> np.ndarray:
+        """Encode one text (1-D result) or a list of texts (2-D result)"""
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(batch)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        pooled = mean_pool(token_embeddings, attention_mask, normalize=self.normalize)
+        return pooled[0] if single else pooled
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get the embedding dimension"""
+        if self._dimension is None:
+            self._dimension = int(self.encode("dimension probe").shape[-1])
+        return self._dimension
+
+
+def load_backend(backend: str, model_name: str, cache_folder: str):
+    """
+    Create the embedding backend selected by EMBEDDING_BACKEND
+
+    Args:
+        backend: "sentence-transformers" (torch) or "onnx"
+        model_name: HuggingFace model id
+        cache_folder: Local model cache directory
+
+    Returns:
+        Object exposing encode() and get_sentence_embedding_dimension()
+    """
+    if backend == "sentence-transformers":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name, cache_folder=cache_folder)
+
+    if backend == "onnx":
+        threads = os.getenv("EMBEDDING_ONNX_THREADS")
+        return OnnxEmbeddingBackend(
+            model_name,
+            cache_folder,
+            model_path=os.getenv("EMBEDDING_ONNX_PATH") or None,
+            quantize=os.getenv("EMBEDDING_ONNX_QUANTIZE", "false").lower() == "true",
+            max_length=int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "256")),
+            normalize=os.getenv("EMBEDDING_NORMALIZE", "true").lower() == "true",
+            num_threads=int(threads) if threads else None,
+        )
+
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}', expected one of {BACKENDS}")
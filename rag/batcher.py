@@ -0,0 +1,154 @@
+"""
+Cross-request micro-batching for embedding inference
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from rag.embeddings import EmbeddingService, embedding_service
+from runtime.offload import run_cpu
+
+load_dotenv()
+
+# Upper bounds of the batch-size histogram buckets
+_HISTOGRAM_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text encode requests into one model call
+
+    The first request opens a batch window of ``max_wait_ms``; everything that
+    arrives before the window closes (or until ``max_batch_size`` items are
+    queued) is encoded with a single ``encode_batch`` call on the CPU pool and
+    each caller gets its own vector back.
+    """
+
+    def __init__(
+        self,
+        service: EmbeddingService,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        enabled: bool = True,
+    ):
+        self.service = service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.enabled = enabled
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.histogram: Dict[str, int] = {self._bucket_label(b): 0 for b in _HISTOGRAM_BOUNDS}
+        self.histogram[f">{_HISTOGRAM_BOUNDS[-1]}"] = 0
+
+    @classmethod
+    def from_env(cls, service: EmbeddingService) -> "EmbeddingBatcher":
+        """Build a batcher from EMBEDDING_BATCH_* environment variables"""
+        return cls(
+            service,
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32")),
+            max_wait_ms=float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")),
+            enabled=os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def _bucket_label(bound: int) -> str:
+        previous = _HISTOGRAM_BOUNDS[_HISTOGRAM_BOUNDS.index(bound) - 1] if bound > 1 else 0
+        return str(bound) if bound - previous == 1 else f"{previous + 1}-{bound}"
+
+    def _record_batch(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            for bound in _HISTOGRAM_BOUNDS:
+                if size <= bound:
+                    self.histogram[self._bucket_label(bound)] += 1
+                    return
+            self.histogram[f">{_HISTOGRAM_BOUNDS[-1]}"] += 1
+
+    async def encode(self, text: str) -> List[float]:
+        """
+        Encode a single text, sharing a model call with concurrent callers
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        cached = self.service.get_cached(text)
+        if cached is not None:
+            return cached
+
+        if not self.enabled or self.max_batch_size == 1:
+            return await run_cpu(self.service.encode, text)
+
+        loop = asyncio.get_running_loop()
+        if self._pending_loop is not loop:
+            # A new event loop (e.g. after a test or worker restart) starts clean
+            self._pending, self._pending_loop, self._flush_handle = [], loop, None
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            self._flush_handle = self._pending_loop.call_later(self.max_wait_ms / 1000, self._flush)
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        self._record_batch(len(batch))
+        try:
+            vectors = await run_cpu(self.service.encode_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batching counters and the batch-size histogram"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": dict(self.histogram),
+            }
+
+
+# Global instance
+embedding_batcher = EmbeddingBatcher.from_env(embedding_service)
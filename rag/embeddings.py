@@ -1,57 +1,153 @@
+import hashlib
 import os
 import sys
+import threading
 import traceback
-from typing import List
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
+from rag.backends import load_backend
 
 load_dotenv(override=True)
 
 
 class EmbeddingService:
-    """Service for generating embeddings using HuggingFace sentence-transformers"""
+    """Service for generating embeddings with a pluggable backend (sentence-transformers or ONNX)"""
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, backend: str = None):
         self.model_name = model_name or os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.backend = backend or os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
         self.model = None
+        self._model_lock = threading.Lock()
         # Use a local cache directory to avoid permission issues
         self.cache_folder = os.path.join(os.getcwd(), "model_cache")
         os.makedirs(self.cache_folder, exist_ok=True)
+        # Content-hash LRU cache so repeated texts skip inference
+        self.cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+        self._cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def _load_model(self):
-        """Load the sentence transformer model if not already loaded"""
-        if self.model is None:
+        """Load the embedding backend if not already loaded"""
+        if self.model is not None:
+            return
+        with self._model_lock:
+            if self.model is not None:
+                return
             try:
-                print(f"Loading embedding model: {self.model_name}...")
+                print(f"Loading embedding model: {self.model_name} ({self.backend} backend)...")
                 print(f"Cache folder: {self.cache_folder}")
                 
                 # Force download/load from local cache
-                self.model = SentenceTransformer(self.model_name, cache_folder=self.cache_folder)
+                self.model = load_backend(self.backend, self.model_name, self.cache_folder)
                 print("Embedding model loaded successfully.")
             except Exception as e:
                 print(f"Error loading embedding model: {e}")
                 traceback.print_exc()
                 raise RuntimeError(f"Failed to load embedding model: {e}")
     
-    def encode(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.backend}\0{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return list(vector)
+    
+    def _cache_put(self, key: str, vector: List[float]):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = tuple(vector)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def warm_up(self, batch_size: int = 8):
+        """
+        Load the model and run a dummy batch so the first request is not cold
+        
+        Args:
+            batch_size: Number of dummy texts to encode
+        """
         self._load_model()
         
         if not self.model:
             raise RuntimeError("Embedding model not loaded")
         
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        # Bypass the cache: the point is to exercise the inference path
+        self.model.encode(["warm-up"] * max(1, batch_size), convert_to_numpy=True)
     
-    def encode_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+    def get_cached(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a text without running the model"""
+        key = self._cache_key(text)
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return list(vector)
+    
+    def encode(self, text: str) -> List[float]:
+        """Generate embedding for a single text"""
+        key = self._cache_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         self._load_model()
         
         if not self.model:
             raise RuntimeError("Embedding model not loaded")
         
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        embedding = self.model.encode(text, convert_to_numpy=True).tolist()
+        self._cache_put(key, embedding)
+        return embedding
+    
+    def encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for multiple texts, encoding only cache misses"""
+        keys = [self._cache_key(text) for text in texts]
+        results: List[Optional[List[float]]] = [self._cache_get(key) for key in keys]
+        
+        # Encode each distinct uncached text once
+        pending = {}
+        for idx, vector in enumerate(results):
+            if vector is None:
+                pending.setdefault(keys[idx], []).append(idx)
+        
+        if pending:
+            self._load_model()
+            
+            if not self.model:
+                raise RuntimeError("Embedding model not loaded")
+            
+            miss_texts = [texts[indices[0]] for indices in pending.values()]
+            embeddings = self.model.encode(miss_texts, convert_to_numpy=True).tolist()
+            for (key, indices), embedding in zip(pending.items(), embeddings):
+                self._cache_put(key, embedding)
+                for idx in indices:
+                    results[idx] = list(embedding)
+        
+        return results
+    
+    def cache_stats(self) -> dict:
+        """Get embedding cache hit/miss counters"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0
+        }
     
     @property
     def dimension(self) -> int:
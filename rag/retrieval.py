@@ -1,7 +1,10 @@
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 from database.vector_db import vector_db
+from database.write_behind import report_writer
+from rag.batcher import embedding_batcher
 from rag.embeddings import embedding_service
+from rag.semantic_cache import without_metadata
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,40 +16,63 @@ class RAGService:
     def __init__(self):
         self.top_k = int(os.getenv("TOP_K_SIMILAR", "5"))
     
-    async def retrieve_similar_ideas(self, idea: str) -> List[Dict]:
+    async def embed_idea(self, idea: str) -> List[float]:
+        """
+        Generate the embedding for an idea once so it can be reused
+        
+        Args:
+            idea: The startup idea
+            
+        Returns:
+            Embedding vector
+        """
+        # Micro-batched with concurrent requests and run on the CPU pool
+        return await embedding_batcher.encode(idea)
+    
+    async def retrieve_similar_ideas(self, idea: str, embedding: Optional[List[float]] = None) -> List[Dict]:
         """
         Retrieve similar startup ideas from the vector database
         
         Args:
             idea: The startup idea to search for
+            embedding: Precomputed embedding of the idea (encoded if omitted)
             
         Returns:
             List of similar ideas with their reports and similarity scores
         """
-        # Generate embedding for the input idea
-        idea_embedding = embedding_service.encode(idea)
+        idea_embedding = embedding if embedding is not None else await self.embed_idea(idea)
         
         # Search for similar ideas in the vector database
-        similar_ideas = vector_db.search_similar_ideas(idea_embedding, self.top_k)
+        similar_ideas = await vector_db.asearch_similar_ideas(idea_embedding, self.top_k)
         
         return similar_ideas
     
-    async def store_idea_with_report(self, idea: str, report: dict) -> int:
+    async def store_idea_with_report(self, idea: str, report: dict, embedding: Optional[List[float]] = None) -> Optional[int]:
         """
         Store a startup idea with its feasibility report
         
+        While the background report writer is running the row is queued and
+        written in a later batch, so the caller never waits on the database.
+        
         Args:
             idea: The startup idea
             report: The generated feasibility report
+            embedding: Precomputed embedding of the idea (encoded if omitted)
             
         Returns:
-            ID of the stored idea
+            ID of the stored idea, or None if the write was queued
         """
-        # Generate embedding for the idea
-        idea_embedding = embedding_service.encode(idea)
+        idea_embedding = embedding if embedding is not None else await self.embed_idea(idea)
+        
+        # Label the row with the model that embedded it, not the column default
+        if report_writer.running:
+            report_writer.enqueue(idea, idea_embedding, report, embedding_model=embedding_service.model_name)
+            return None
         
         # Store in vector database
-        idea_id = vector_db.insert_idea(idea, idea_embedding, report)
+        idea_id = await vector_db.ainsert_idea(
+            idea, idea_embedding, report, embedding_model=embedding_service.model_name
+        )
         
         return idea_id
     
@@ -68,7 +94,7 @@ class RAGService:
         for idx, item in enumerate(similar_ideas, 1):
             similarity = item.get('similarity', 0)
             idea = item.get('idea', 'N/A')
-            report = item.get('report', {})
+            report = without_metadata(item.get('report'))
             
             context_parts.append(f"\n{idx}. Similar Idea (Similarity: {similarity:.2%}):")
             context_parts.append(f"   Idea: {idea}")
@@ -0,0 +1,143 @@
+"""
+Semantic result cache: reuse a stored report for near-duplicate ideas
+"""
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+METADATA_KEY = "analysis_metadata"
+
+
+def without_metadata(report: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A stored report without its cache metadata
+
+    The metadata carries internal evaluation output (critique, hallucination
+    checks), so it is stripped before a report reaches API clients or prompts.
+    """
+    return {k: v for k, v in (report or {}).items() if k != METADATA_KEY}
+
+
+class SemanticCache:
+    """
+    Short-circuits analysis when a stored report is a near-duplicate
+
+    Works on the rows already returned by retrieve_similar_ideas, so a lookup
+    costs nothing beyond the retrieval the pipeline does anyway. A row matches
+    when its similarity is at least ``threshold``, it was analysed for the
+    same industry and target market, and it is younger than ``ttl_seconds``.
+    Those fields live under ``analysis_metadata`` in the stored report JSON;
+    use ``without_metadata`` before a report leaves the pipeline.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.97,
+        ttl_seconds: float = 7 * 24 * 3600,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        """Build a cache from SEMANTIC_CACHE_* environment variables"""
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97")),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            enabled=os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def _normalize(value: Optional[str]) -> str:
+        return " ".join((value or "").lower().split())
+
+    def build_metadata(self, industry: str, target_market: str, **extra: Any) -> Dict[str, Any]:
+        """
+        Metadata stored alongside a report so it can be served from the cache later
+
+        Args:
+            industry: Industry the idea was analysed for
+            target_market: Target market the idea was analysed for
+            **extra: Response fields to replay on a hit (critique, sources_used, ...)
+
+        Returns:
+            Dictionary for the report's analysis_metadata key
+        """
+        return {
+            "industry": industry,
+            "target_market": target_market,
+            "analyzed_at": self.clock(),
+            **extra,
+        }
+
+    def lookup(
+        self,
+        similar_ideas: List[Dict],
+        industry: str,
+        target_market: str,
+        force_refresh: bool = False,
+    ) -> Optional[Dict]:
+        """
+        Find a stored analysis that can be returned instead of re-running the pipeline
+
+        Args:
+            similar_ideas: Rows from retrieve_similar_ideas (id, idea, report, similarity)
+            industry: Requested industry
+            target_market: Requested target market
+            force_refresh: Skip the cache for this request
+
+        Returns:
+            The matching row, or None
+        """
+        if not self.enabled:
+            return None
+        if force_refresh:
+            self.bypasses += 1
+            return None
+
+        now = self.clock()
+        for row in similar_ideas:
+            if row.get("similarity", 0.0) < self.threshold:
+                continue
+            metadata = (row.get("report") or {}).get(METADATA_KEY)
+            if not metadata:
+                continue
+            if self._normalize(metadata.get("industry")) != self._normalize(industry):
+                continue
+            if self._normalize(metadata.get("target_market")) != self._normalize(target_market):
+                continue
+            if now - float(metadata.get("analyzed_at", 0)) > self.ttl_seconds:
+                continue
+            self.hits += 1
+            return row
+
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache configuration and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Global instance
+semantic_cache = SemanticCache.from_env()
@@ -0,0 +1,20 @@
+"""Runtime package for concurrency helpers shared across services"""
+from runtime.offload import (
+    OffloadPool,
+    io_pool,
+    cpu_pool,
+    run_io,
+    run_cpu,
+    offload_stats,
+    shutdown_offload_pools
+)
+
+__all__ = [
+    "OffloadPool",
+    "io_pool",
+    "cpu_pool",
+    "run_io",
+    "run_cpu",
+    "offload_stats",
+    "shutdown_offload_pools"
+]
@@ -0,0 +1,258 @@
+"""
+Request deadlines, per-call timeouts and hedged calls
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call would run past its timeout or the request deadline"""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Bound everything inside the block (and tasks it spawns) by a deadline
+
+    Nested scopes can only shorten the deadline.
+
+    Args:
+        seconds: Time budget; None or <= 0 leaves the current deadline unchanged
+
+    Yields:
+        The absolute deadline (time.monotonic() based), or None if unbounded
+    """
+    current = _deadline.get()
+    if seconds is None or seconds <= 0:
+        yield current
+        return
+    deadline = time.monotonic() + seconds
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None if unbounded)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def deadline_expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+async def hedged(
+    fn: Callable[[], Awaitable[T]],
+    hedge_after: Optional[float],
+    max_hedges: int = 1,
+    on_event: Optional[Callable[[str], None]] = None,
+    sent: Optional[asyncio.Event] = None,
+) -> T:
+    """
+    Run ``fn`` and, if it is still pending after ``hedge_after`` seconds, race duplicates
+
+    The first attempt to succeed wins and the others are cancelled. A failed
+    attempt only fails the call once no other attempt is pending.
+
+    Args:
+        fn: Zero-argument coroutine function (must be safe to run twice)
+        hedge_after: Seconds before launching a duplicate; None disables hedging
+        max_hedges: Maximum number of duplicates
+        on_event: Called with "hedge" when a duplicate starts and "hedge_won" when one wins
+        sent: Set once the first attempt has actually been sent; the hedge timer
+            only starts then, so a call still queued (e.g. for a rate-limiter slot)
+            is never duplicated
+
+    Returns:
+        The winning attempt's result
+    """
+    first = asyncio.ensure_future(fn())
+    pending = {first}
+    hedges_left = max_hedges if hedge_after is not None else 0
+    last_error: Optional[BaseException] = None
+    try:
+        while pending:
+            if hedges_left > 0 and sent is not None and not sent.is_set():
+                waiter = asyncio.ensure_future(sent.wait())
+                try:
+                    await asyncio.wait(pending | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiter.cancel()
+            timeout = hedge_after if hedges_left > 0 else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedges_left -= 1
+                pending.add(asyncio.ensure_future(fn()))
+                if on_event:
+                    on_event("hedge")
+                continue
+            for task in done:
+                if task.exception() is None:
+                    if task is not first and on_event:
+                        on_event("hedge_won")
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class LLMCallPolicy:
+    """
+    Timeouts and latency-based hedging for LLM calls
+
+    Every call is bounded by ``call_timeout`` and by the request deadline,
+    whichever is sooner. With hedging on, a duplicate request is sent once a
+    call has been in flight longer than the observed ``hedge_percentile``
+    latency for that agent, and the first response wins. Latency is measured
+    around the provider call only, so time spent waiting for a rate-limiter
+    slot or backing off between retries neither inflates the percentile nor
+    triggers a hedge.
+    """
+
+    def __init__(
+        self,
+        call_timeout: float = 45.0,
+        hedging_enabled: bool = False,
+        hedge_percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        self.call_timeout = call_timeout
+        self.hedging_enabled = hedging_enabled
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        self.calls = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMCallPolicy":
+        """Build a policy from LLM_CALL_TIMEOUT_SECONDS / LLM_HEDGING_* environment variables"""
+        return cls(
+            call_timeout=float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "45")),
+            hedging_enabled=os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+            min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+        )
+
+    def record(self, key: str, latency: float):
+        self._latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        """Observed latency percentile for a key, once enough samples exist"""
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        """
+        Time budget for the next call
+
+        Raises:
+            DeadlineExceeded: If the request deadline has already passed
+        """
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return self.call_timeout if left is None else min(self.call_timeout, left)
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        hedge: bool = True,
+        limiter: Optional[Callable[[Callable[[], Awaitable[T]]], Awaitable[T]]] = None,
+    ) -> T:
+        """
+        Run a call under the timeout, hedging it if enabled
+
+        Args:
+            key: Latency bucket (e.g. the agent name)
+            fn: Zero-argument coroutine function making the provider call
+            hedge: Allow duplicates (disable for calls with side effects, e.g. streams)
+            limiter: Wraps each attempt's provider call, e.g. to run it in a
+                rate-limiter slot with retries; only the time inside ``fn`` is recorded
+
+        Returns:
+            The call's result
+
+        Raises:
+            DeadlineExceeded: If the call times out or the request deadline passes
+        """
+        timeout = self.timeout()
+        hedge_after = self.percentile(key, self.hedge_percentile) if hedge and self.hedging_enabled else None
+
+        sent = asyncio.Event()
+
+        async def provider_call() -> T:
+            sent.set()
+            start = time.perf_counter()
+            result = await fn()
+            self.record(key, time.perf_counter() - start)
+            return result
+
+        def attempt() -> Awaitable[T]:
+            return limiter(provider_call) if limiter else provider_call()
+
+        self.calls += 1
+        try:
+            return await asyncio.wait_for(
+                hedged(attempt, hedge_after, on_event=self._on_hedge_event, sent=sent),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DeadlineExceeded(f"LLM call for {key} timed out after {timeout:.1f}s")
+
+    def _on_hedge_event(self, event: str):
+        if event == "hedge":
+            self.hedges += 1
+        else:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get timeout and hedging counters, and per-key p95 latency"""
+        return {
+            "call_timeout_seconds": self.call_timeout,
+            "hedging_enabled": self.hedging_enabled,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p95_ms": {
+                key: round(self.percentile(key, 0.95) * 1000, 1)
+                for key in self._latencies
+                if self.percentile(key, 0.95) is not None
+            },
+        }
+
+
+# Global instance
+llm_call_policy = LLMCallPolicy.from_env()
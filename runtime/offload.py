@@ -0,0 +1,179 @@
+"""
+Bounded thread pools for running blocking calls off the event loop
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+
+class OffloadPool:
+    """
+    Thread pool with a bounded queue and queue-depth metrics
+
+    Blocking work (Supabase REST calls, DuckDuckGo requests, model inference)
+    is submitted with ``await pool.run(func, *args)`` so the event loop keeps
+    serving other requests while the call is in flight.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Admission is bounded per event loop: callers beyond the queue
+        # limit wait on the loop instead of piling up in the executor.
+        self._admission: Dict[int, asyncio.Semaphore] = {}
+
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_in_flight = 0
+        self.total_wait_ms = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Get the underlying executor, creating it on first use"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"offload-{self.name}",
+                    )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted calls still waiting for a worker thread"""
+        with self._lock:
+            return self.submitted - self.active - self.completed - self.failed
+
+    def _admission_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        key = id(loop)
+        semaphore = self._admission.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._admission = {key: semaphore}
+        return semaphore
+
+    def _instrumented(self, func: Callable[..., T], enqueued_at: float) -> Callable[[], T]:
+        def runner() -> T:
+            with self._lock:
+                self.active += 1
+                self.total_wait_ms += (time.perf_counter() - enqueued_at) * 1000
+            try:
+                result = func()
+            except BaseException:
+                with self._lock:
+                    self.active -= 1
+                    self.failed += 1
+                raise
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            return result
+
+        return runner
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking callable in the pool and await its result
+
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+
+        async with self._admission_semaphore():
+            with self._lock:
+                self.submitted += 1
+                in_flight = self.submitted - self.completed - self.failed
+                self.peak_in_flight = max(self.peak_in_flight, in_flight)
+            return await loop.run_in_executor(
+                self.executor, self._instrumented(call, time.perf_counter())
+            )
+
+    def submit(self, func: Callable[..., T], *args: Any, **kwargs: Any):
+        """Fire-and-forget submission from synchronous code"""
+        with self._lock:
+            self.submitted += 1
+        call = functools.partial(func, *args, **kwargs)
+        return self.executor.submit(self._instrumented(call, time.perf_counter()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool utilisation and queue-depth metrics"""
+        with self._lock:
+            finished = self.completed + self.failed
+            waiting = self.submitted - self.active - finished
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queue_depth": waiting,
+                "peak_in_flight": self.peak_in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.total_wait_ms / finished, 2) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the executor; it is recreated lazily if used again"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Global instances: network I/O can oversubscribe threads, CPU-bound
+# embedding work is capped near the core count.
+io_pool = OffloadPool(
+    "io",
+    max_workers=int(os.getenv("OFFLOAD_IO_WORKERS", "32")),
+    max_queue=int(os.getenv("OFFLOAD_IO_QUEUE", "256")),
+)
+cpu_pool = OffloadPool(
+    "cpu",
+    max_workers=int(os.getenv("OFFLOAD_CPU_WORKERS", str(os.cpu_count() or 2))),
+    max_queue=int(os.getenv("OFFLOAD_CPU_QUEUE", "128")),
+)
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking network/database call on the I/O pool"""
+    return await io_pool.run(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-bound call (e.g. embedding inference) on the CPU pool"""
+    return await cpu_pool.run(func, *args, **kwargs)
+
+
+def offload_stats() -> Dict[str, Dict[str, Any]]:
+    """Get metrics for all offload pools"""
+    return {"io": io_pool.stats(), "cpu": cpu_pool.stats()}
+
+
+def shutdown_offload_pools(wait: bool = True):
+    """Shut down all offload pools"""
+    io_pool.shutdown(wait=wait)
+    cpu_pool.shutdown(wait=wait)
@@ -0,0 +1,103 @@
+"""
+Readiness tracking for warm-up steps run at startup
+"""
+import asyncio
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class WarmupStep:
+    """Status of a single warm-up step"""
+    name: str
+    required: bool = True
+    status: str = "pending"
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class ReadinessState:
+    """
+    Tracks warm-up steps so the service only reports ready once they finish
+
+    Required steps must succeed for the pod to be ready; optional steps (e.g.
+    an unreachable database that the pipeline tolerates) are reported but do
+    not block traffic.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, WarmupStep] = {}
+        self.started = False
+        self.finished = False
+
+    def reset(self):
+        """Forget all steps (used when the app restarts in-process)"""
+        self.steps = {}
+        self.started = False
+        self.finished = False
+
+    @property
+    def ready(self) -> bool:
+        """True once warm-up finished and every required step succeeded"""
+        return self.finished and all(
+            step.status == "ready" for step in self.steps.values() if step.required
+        )
+
+    async def run(self, steps: List[tuple]):
+        """
+        Run warm-up steps in order, recording timing and failures
+
+        Args:
+            steps: List of (name, coroutine function, required) tuples
+        """
+        self.started = True
+        for name, _, required in steps:
+            self.steps[name] = WarmupStep(name=name, required=required)
+
+        for name, step_fn, _ in steps:
+            step = self.steps[name]
+            step.status = "running"
+            start = time.perf_counter()
+            try:
+                await step_fn()
+                step.status = "ready"
+            except asyncio.CancelledError:
+                step.status = "cancelled"
+                raise
+            except Exception as e:
+                step.status = "failed"
+                step.error = str(e)
+                print(f"Warm-up step '{name}' failed: {e}")
+                traceback.print_exc()
+            finally:
+                step.duration_ms = (time.perf_counter() - start) * 1000
+                print(f"Warm-up step '{name}': {step.status} ({step.duration_ms:.0f}ms)")
+
+        self.finished = True
+
+    def mark_ready(self):
+        """Mark the service ready without running any steps"""
+        self.started = True
+        self.finished = True
+
+    def summary(self) -> Dict[str, Any]:
+        """Get readiness and per-step status"""
+        return {
+            "ready": self.ready,
+            "warmup_finished": self.finished,
+            "steps": {
+                name: {
+                    "status": step.status,
+                    "required": step.required,
+                    "duration_ms": round(step.duration_ms, 2),
+                    "error": step.error,
+                }
+                for name, step in self.steps.items()
+            },
+        }
+
+
+# Global instance
+readiness = ReadinessState()
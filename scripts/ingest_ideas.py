@@ -0,0 +1,396 @@
+"""
+Bulk ingestion of historical ideas and reports into startup_reports
+
+Streams a JSONL or CSV file, embeds ideas in large batches, and writes them
+with chunked multi-row inserts under bounded concurrency. Progress is
+checkpointed so an interrupted backfill resumes where it stopped, and rows
+are de-duplicated by content hash against a SQLite hash store shared by
+every run, so --restart and overlapping files do not insert twice.
+
+Usage:
+    python scripts/ingest_ideas.py ideas.jsonl --batch-size 512 --chunk-size 500 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from database.vector_db import vector_db
+from rag.embeddings import embedding_service
+from runtime.offload import run_cpu, run_io
+
+load_dotenv()
+
+
+def read_records(path: str, file_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from a JSONL or CSV file
+
+    Each record needs an ``idea``. Its ``report`` is taken from a ``report``
+    field (a JSON string in CSV files) or, if there is none, from the
+    remaining fields.
+
+    Args:
+        path: Input file
+        file_format: "jsonl" or "csv" (defaults to the file extension)
+
+    Yields:
+        Dicts with 'idea' and 'report' (records that cannot be parsed yield None)
+    """
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (line for line in f if line.strip())
+        for raw in rows:
+            try:
+                record = raw if file_format == "csv" else json.loads(raw)
+                idea = (record.get("idea") or "").strip()
+                report = record.get("report")
+                if isinstance(report, str):
+                    report = json.loads(report) if report.strip() else {}
+                if report is None:
+                    report = {k: v for k, v in record.items() if k != "idea"}
+                yield {"idea": idea, "report": report} if idea else None
+            except (ValueError, AttributeError):
+                yield None
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Hash of the whitespace-normalised idea and the canonical report JSON"""
+    idea = " ".join(record["idea"].split())
+    report = json.dumps(record["report"], sort_keys=True, default=str)
+    return hashlib.sha256(f"{idea}\0{report}".encode("utf-8")).hexdigest()
+
+
+class IngestedHashes:
+    """
+    SQLite set of the content hashes of every ingested row
+
+    Lives outside the per-file checkpoint, so it survives --restart and
+    de-duplicates across input files.
+    """
+
+    # Stay under SQLite's bound-parameter limit
+    _LOOKUP_CHUNK = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS ingested_hashes (hash TEXT PRIMARY KEY)")
+        return self._conn
+
+    def existing(self, hashes: List[str]) -> Set[str]:
+        """The subset of ``hashes`` already ingested"""
+        found: Set[str] = set()
+        with self._lock:
+            conn = self._connection()
+            for i in range(0, len(hashes), self._LOOKUP_CHUNK):
+                chunk = hashes[i:i + self._LOOKUP_CHUNK]
+                placeholders = ", ".join("?" for _ in chunk)
+                found.update(
+                    row[0] for row in conn.execute(f"SELECT hash FROM ingested_hashes WHERE hash IN ({placeholders})", chunk)
+                )
+        return found
+
+    def add(self, hashes: List[str]):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR IGNORE INTO ingested_hashes (hash) VALUES (?)", [(h,) for h in hashes])
+            conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM ingested_hashes").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class IngestCheckpoint:
+    """
+    Resumable ingestion state
+
+    ``offset`` is the number of input records fully handled in order;
+    ``in_flight`` holds the content hashes of queued rows not yet recorded in
+    the hash store. Rows ingested earlier live in ``IngestedHashes``, so the
+    checkpoint stays small however large the backfill grows.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.offset = 0
+        self.in_flight: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.offset = data.get("offset", 0)
+            self.in_flight = set(data.get("in_flight", []))
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": self.offset, "in_flight": sorted(self.in_flight)}, f)
+        os.replace(tmp_path, self.path)
+
+
+class IdeaIngestor:
+    """Embeds records in batches and inserts them in concurrent multi-row chunks"""
+
+    def __init__(
+        self,
+        store: Any,
+        encode_batch: Callable[[List[str]], List[List[float]]],
+        checkpoint: IngestCheckpoint,
+        hashes: IngestedHashes,
+        batch_size: int = 256,
+        chunk_size: int = 500,
+        concurrency: int = 4,
+        progress_every: float = 5.0,
+        embedding_model: Optional[str] = None,
+    ):
+        self.store = store
+        self.encode_batch = encode_batch
+        self.checkpoint = checkpoint
+        self.hashes = hashes
+        self.batch_size = max(1, batch_size)
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.progress_every = progress_every
+        self.embedding_model = embedding_model
+
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.embed_seconds = 0.0
+        self.insert_seconds = 0.0
+        self._started = 0.0
+        self._last_progress = 0.0
+        # Batch start offset -> [chunks still in flight, end offset]
+        self._open_batches: Dict[int, List[int]] = {}
+        # Finished batches waiting for earlier ones, for advancing the checkpoint in order
+        self._done: Dict[int, int] = {}
+
+    async def run(self, records: Iterator[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Ingest a stream of records
+
+        Args:
+            records: Output of read_records()
+
+        Returns:
+            Summary counters and throughput
+        """
+        self._started = self._last_progress = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: Set[asyncio.Task] = set()
+        errors: List[BaseException] = []
+        # Rows left in flight by an interrupted run are re-checked against the hash store
+        self.checkpoint.in_flight.clear()
+
+        for start, end, batch in self._batches(records):
+            if errors:
+                break
+            if batch:
+                known = await run_io(self.hashes.existing, [digest for digest, _ in batch])
+                fresh = [(digest, record) for digest, record in batch
+                         if digest not in known and digest not in self.checkpoint.in_flight]
+                self.duplicates += len(batch) - len(fresh)
+                batch = fresh
+            if not batch:
+                self._advance(start, end)
+                continue
+            embed_start = time.perf_counter()
+            embeddings = await run_cpu(self.encode_batch, [record["idea"] for _, record in batch])
+            self.embed_seconds += time.perf_counter() - embed_start
+
+            rows = [
+                {"idea": record["idea"], "embedding": embedding, "report": record["report"], "hash": digest}
+                for (digest, record), embedding in zip(batch, embeddings)
+            ]
+            self.checkpoint.in_flight.update(digest for digest, _ in batch)
+            chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+            self._open_batches[start] = [len(chunks), end]
+            for chunk in chunks:
+                # Bounded concurrency: the next chunk waits for a free slot
+                await slots.acquire()
+                task = asyncio.create_task(self._insert(chunk, start, slots, errors))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        self.checkpoint.save()
+        if errors:
+            raise errors[0]
+        return self.summary()
+
+    def _batches(self, records: Iterator[Optional[Dict[str, Any]]]) -> Iterator[Tuple[int, int, List[Tuple[str, Dict[str, Any]]]]]:
+        """
+        Skip already-handled input, drop invalid records and repeats within a batch, and group the rest
+
+        Yields:
+            (start offset, end offset, [(content hash, record)]) per batch
+        """
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        batch_hashes: Set[str] = set()
+        resume_from = start = position = self.checkpoint.offset
+        for offset, record in enumerate(records):
+            if offset < resume_from:
+                continue
+            self.read += 1
+            position = offset + 1
+            if record is None:
+                self.invalid += 1
+            else:
+                digest = content_hash(record)
+                if digest in batch_hashes:
+                    self.duplicates += 1
+                else:
+                    batch_hashes.add(digest)
+                    batch.append((digest, record))
+            if len(batch) >= self.batch_size:
+                yield start, position, batch
+                batch, batch_hashes, start = [], set(), position
+        if position > start:
+            yield start, position, batch
+
+    async def _insert(self, chunk: List[Dict[str, Any]], start: int, slots: asyncio.Semaphore, errors: List[BaseException]):
+        try:
+            insert_start = time.perf_counter()
+            await self.store.ainsert_ideas(
+                [
+                    {"idea": r["idea"], "embedding": r["embedding"], "report": r["report"], "embedding_model": self.embedding_model}
+                    for r in chunk
+                ]
+            )
+            self.insert_seconds += time.perf_counter() - insert_start
+            self.inserted += len(chunk)
+            digests = [r["hash"] for r in chunk]
+            await run_io(self.hashes.add, digests)
+            self.checkpoint.in_flight.difference_update(digests)
+
+            batch_state = self._open_batches[start]
+            batch_state[0] -= 1
+            if batch_state[0] == 0:
+                del self._open_batches[start]
+                self._advance(start, batch_state[1])
+            self._maybe_report_progress()
+        except Exception as e:
+            # The batch is never marked done, so a re-run retries it (recorded rows are skipped by hash)
+            errors.append(e)
+            print(f"❌ Insert failed: {e}")
+        finally:
+            slots.release()
+
+    def _advance(self, start: int, end: int):
+        """Move the checkpoint offset over every contiguous finished batch"""
+        self._done[start] = end
+        while self.checkpoint.offset in self._done:
+            self.checkpoint.offset = self._done.pop(self.checkpoint.offset)
+        self.checkpoint.save()
+
+    def _maybe_report_progress(self):
+        now = time.perf_counter()
+        if now - self._last_progress >= self.progress_every:
+            self._last_progress = now
+            elapsed = now - self._started
+            print(f"  {self.inserted:,} rows inserted ({self.inserted / elapsed:,.0f} rows/s)")
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(self.inserted / elapsed, 1) if elapsed else 0.0,
+            "embed_seconds": round(self.embed_seconds, 2),
+            "insert_seconds": round(self.insert_seconds, 2),
+            "checkpoint_offset": self.checkpoint.offset,
+        }
+
+
+def main():
+    """Ingest a JSONL/CSV file of ideas and reports"""
+    parser = argparse.ArgumentParser(description="Bulk-load ideas and reports into startup_reports")
+    parser.add_argument("path", help="JSONL or CSV file with an 'idea' column and a 'report' (JSON) column")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the extension)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Ideas per embedding batch")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per insert request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Insert requests in flight")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint.json)")
+    parser.add_argument(
+        "--hash-db",
+        default="ingested_hashes.sqlite3",
+        help="Content hashes of ingested rows, shared across runs and files (default: ingested_hashes.sqlite3)",
+    )
+    parser.add_argument("--restart", action="store_true", help="Read the file from the start (ingested rows are still skipped)")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.path}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = IngestCheckpoint(checkpoint_path)
+    hashes = IngestedHashes(args.hash_db)
+    if checkpoint.offset:
+        print(
+            f"↩️  Resuming after {checkpoint.offset:,} records "
+            f"({len(checkpoint.in_flight):,} in flight at the interruption are re-checked)"
+        )
+
+    ingestor = IdeaIngestor(
+        vector_db,
+        embedding_service.encode_batch,
+        checkpoint,
+        hashes,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        concurrency=args.concurrency,
+        embedding_model=embedding_service.model_name,
+    )
+    print(f"🚀 Ingesting {args.path}...")
+    try:
+        summary = asyncio.run(ingestor.run(read_records(args.path, args.format)))
+    except Exception as e:
+        print(f"❌ Ingestion stopped: {e} (re-run to resume from {checkpoint_path})")
+        sys.exit(1)
+    finally:
+        hashes.close()
+        vector_db.close()
+
+    print("✅ Ingestion complete!")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
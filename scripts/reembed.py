@@ -0,0 +1,284 @@
+"""
+Re-embed startup_reports under a new embedding model
+
+Pages through the table by id (keyset pagination), embeds each page in one
+batch with the new model, and writes the vectors to a shadow column tagged
+with the model name while the live column keeps serving searches. Progress is
+checkpointed, so an interrupted run resumes after the last fully written page.
+With --cutover, the job catches up on rows inserted during the backfill and
+then swaps the shadow column in for every row at once.
+
+Usage:
+    python scripts/reembed.py --model sentence-transformers/all-mpnet-base-v2 --batch-size 512 --cutover
+
+Switch EMBEDDING_MODEL to the new model when deploying right after the
+cutover; queries embedded by the old model no longer match the stored vectors.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from database.vector_db import vector_db
+from rag.embeddings import EmbeddingService
+from runtime.offload import run_cpu, run_io
+
+load_dotenv()
+
+
+class EmbeddingDimensionError(ValueError):
+    """Raised when the new model's vectors do not have the expected dimension"""
+
+
+class ReembedCheckpoint:
+    """
+    Resumable re-embedding state: the target model and the last id whose
+    page (and every page before it) has been written
+    """
+
+    def __init__(self, path: Optional[str], model: str):
+        self.path = path
+        self.model = model
+        self.last_id = 0
+        self.dimension: Optional[int] = None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            # A checkpoint for another model says nothing about this one
+            if data.get("model") == model:
+                self.last_id = data.get("last_id", 0)
+                self.dimension = data.get("dimension")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"model": self.model, "last_id": self.last_id, "dimension": self.dimension}, f)
+        os.replace(tmp_path, self.path)
+
+
+class ReembedJob:
+    """Streams pages of ideas through the new model into the shadow embedding column"""
+
+    def __init__(
+        self,
+        store: Any,
+        encode_batch: Callable[[List[str]], List[List[float]]],
+        checkpoint: ReembedCheckpoint,
+        batch_size: int = 256,
+        concurrency: int = 2,
+        dimension: Optional[int] = None,
+        progress_every: float = 5.0,
+    ):
+        self.store = store
+        self.encode_batch = encode_batch
+        self.checkpoint = checkpoint
+        self.model = checkpoint.model
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.dimension = dimension or checkpoint.dimension
+        self.progress_every = progress_every
+
+        self.total = 0
+        self.embedded = 0
+        self.written = 0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+        self._started = 0.0
+        self._last_progress = 0.0
+        # Page start id -> last id of the page, for pages finished ahead of earlier ones
+        self._done: Dict[int, int] = {}
+
+    async def backfill(self) -> Dict[str, Any]:
+        """
+        Re-embed every row after the checkpoint
+
+        Returns:
+            Summary counters, throughput and the checkpointed id
+        """
+        self._started = self._last_progress = time.perf_counter()
+        self.written = self.embedded = 0
+        self.embed_seconds = self.write_seconds = 0.0
+        self.total = await run_io(self.store.count_ideas, self.checkpoint.last_id)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: Set[asyncio.Task] = set()
+        errors: List[BaseException] = []
+
+        after_id = self.checkpoint.last_id
+        try:
+            while not errors:
+                page = await self.store.afetch_ideas_page(after_id, self.batch_size)
+                if not page:
+                    break
+
+                embed_start = time.perf_counter()
+                embeddings = await run_cpu(self.encode_batch, [row["idea"] for row in page])
+                self.embed_seconds += time.perf_counter() - embed_start
+                self._check_dimension(embeddings)
+                self.embedded += len(page)
+
+                rows = [{"id": row["id"], "embedding": embedding} for row, embedding in zip(page, embeddings)]
+                # The next page is fetched and embedded while this one is written
+                await slots.acquire()
+                task = asyncio.create_task(self._write(rows, after_id, slots, errors))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                after_id = page[-1]["id"]
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks)
+            self.checkpoint.save()
+        if errors:
+            raise errors[0]
+        return self.summary()
+
+    def _check_dimension(self, embeddings: List[List[float]]):
+        dimensions = {len(embedding) for embedding in embeddings}
+        if self.dimension is None and len(dimensions) == 1:
+            self.dimension = dimensions.pop()
+            self.checkpoint.dimension = self.dimension
+            return
+        if dimensions != {self.dimension}:
+            raise EmbeddingDimensionError(
+                f"{self.model} returned {', '.join(map(str, sorted(dimensions)))}-dimensional embeddings "
+                f"but the migration expects {self.dimension}; pass the model's real --dimension or --restart"
+            )
+
+    async def _write(self, rows: List[Dict[str, Any]], page_start: int, slots: asyncio.Semaphore, errors: List[BaseException]):
+        try:
+            write_start = time.perf_counter()
+            await self.store.awrite_shadow_embeddings(rows, self.model)
+            self.write_seconds += time.perf_counter() - write_start
+            self.written += len(rows)
+
+            # Advance the checkpoint over every contiguous written page
+            self._done[page_start] = rows[-1]["id"]
+            while self.checkpoint.last_id in self._done:
+                self.checkpoint.last_id = self._done.pop(self.checkpoint.last_id)
+            self.checkpoint.save()
+            self._maybe_report_progress()
+        except Exception as e:
+            # Writes are idempotent, so a re-run simply repeats this page
+            errors.append(e)
+            print(f"❌ Shadow write failed: {e}")
+        finally:
+            slots.release()
+
+    async def cutover(self, attempts: int = 3) -> int:
+        """
+        Catch up on rows added since the backfill, then swap the embeddings in
+
+        The store refuses the cutover while any row lacks a new embedding, so
+        rows inserted between the catch-up and the swap trigger another round.
+
+        Returns:
+            Number of rows migrated
+        """
+        for attempt in range(1, attempts + 1):
+            await self.backfill()
+            try:
+                return await run_io(self.store.cutover_embeddings, self.model)
+            except Exception as e:
+                if attempt == attempts:
+                    raise
+                print(f"⚠️  Cutover attempt {attempt} failed ({e}); catching up and retrying")
+        return 0
+
+    def _maybe_report_progress(self):
+        now = time.perf_counter()
+        if now - self._last_progress >= self.progress_every:
+            self._last_progress = now
+            summary = self.summary()
+            print(
+                f"  {self.written:,}/{self.total:,} rows re-embedded "
+                f"({summary['rows_per_second']:,.0f} rows/s, ETA {summary['eta_seconds'] or 0:,.0f}s)"
+            )
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started
+        rate = self.written / elapsed if elapsed else 0.0
+        return {
+            "model": self.model,
+            "dimension": self.dimension,
+            "total_rows": self.total,
+            "written": self.written,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(rate, 1),
+            "eta_seconds": round(max(0, self.total - self.written) / rate, 1) if rate else None,
+            "embed_seconds": round(self.embed_seconds, 2),
+            "write_seconds": round(self.write_seconds, 2),
+            "checkpoint_id": self.checkpoint.last_id,
+        }
+
+
+async def _run(job: ReembedJob, cutover: bool) -> Dict[str, Any]:
+    summary = await job.backfill()
+    if cutover:
+        print("🔀 Cutting over to the new embeddings...")
+        migrated = await job.cutover()
+        print(f"✅ Cutover complete: {migrated:,} rows now use {job.model}")
+        print("   Set EMBEDDING_MODEL to the new model and restart the API")
+    return summary
+
+
+def main():
+    """Re-embed startup_reports with a new model and optionally cut over"""
+    parser = argparse.ArgumentParser(description="Re-embed startup_reports under a new embedding model")
+    parser.add_argument("--model", required=True, help="New embedding model name")
+    parser.add_argument("--backend", help="Embedding backend (default: EMBEDDING_BACKEND)")
+    parser.add_argument("--dimension", type=int, help="Expected embedding dimension (checked on every batch)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Rows per page, embedding batch and shadow write")
+    parser.add_argument("--concurrency", type=int, default=2, help="Shadow writes in flight")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: reembed-<model>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--cutover", action="store_true", help="Swap in the new embeddings once every row has one")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"reembed-{re.sub(r'[^A-Za-z0-9_.-]+', '_', args.model)}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = ReembedCheckpoint(checkpoint_path, args.model)
+    if checkpoint.last_id:
+        print(f"↩️  Resuming after id {checkpoint.last_id:,}")
+
+    embedder = EmbeddingService(model_name=args.model, backend=args.backend)
+    job = ReembedJob(
+        vector_db,
+        embedder.encode_batch,
+        checkpoint,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        dimension=args.dimension,
+    )
+    print(f"🚀 Re-embedding startup_reports with {args.model}...")
+    try:
+        summary = asyncio.run(_run(job, args.cutover))
+        if args.cutover and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+    except EmbeddingDimensionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Re-embedding stopped: {e} (re-run to resume from {checkpoint_path})")
+        sys.exit(1)
+    finally:
+        vector_db.close()
+
+    print("✅ Re-embedding complete!")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Stub optional heavy dependencies that are not installed in the test environment"""
+import importlib.util
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+
+def _missing(name: str) -> bool:
+    if name in sys.modules:
+        return False
+    try:
+        return importlib.util.find_spec(name) is None
+    except (ImportError, ValueError):
+        return True
+
+
+def _install_stubs():
+    if _missing("dotenv"):
+        dotenv_mod = types.ModuleType("dotenv")
+        dotenv_mod.load_dotenv = lambda *args, **kwargs: None
+        sys.modules["dotenv"] = dotenv_mod
+
+    if _missing("langchain_groq"):
+        groq_mod = types.ModuleType("langchain_groq")
+
+        class _FakeChatGroq:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            async def ainvoke(self, _prompt: str):
+                return SimpleNamespace(content="")
+
+        groq_mod.ChatGroq = _FakeChatGroq
+        sys.modules["langchain_groq"] = groq_mod
+
+    if _missing("langchain_community"):
+        lc_mod = types.ModuleType("langchain_community")
+        lc_tools = types.ModuleType("langchain_community.tools")
+
+        class _FakeSearch:
+            def run(self, *_a, **_k):
+                return ""
+
+        lc_tools.DuckDuckGoSearchRun = _FakeSearch
+        lc_mod.tools = lc_tools
+        sys.modules["langchain_community"] = lc_mod
+        sys.modules["langchain_community.tools"] = lc_tools
+
+    if _missing("sentence_transformers"):
+        st_mod = types.ModuleType("sentence_transformers")
+
+        class _FakeSentenceTransformer:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def encode(self, texts, **_kwargs):
+                if isinstance(texts, list):
+                    return [[0.0] * 3 for _ in texts]
+                return [0.0] * 3
+
+        st_mod.SentenceTransformer = _FakeSentenceTransformer
+        sys.modules["sentence_transformers"] = st_mod
+
+    if _missing("supabase"):
+        supa = types.ModuleType("supabase")
+        supa.create_client = lambda *args, **kwargs: object()
+        supa.Client = object
+        sys.modules["supabase"] = supa
+
+    os.environ.setdefault("SUPABASE_URL", "http://example.com")
+    os.environ.setdefault("SUPABASE_KEY", "test")
+
+
+_install_stubs()
@@ -46,6 +46,19 @@ class _FakeLLM:
         return SimpleNamespace(content=self._content)
 
 
+class _FakeStreamingLLM:
+    def __init__(self, chunks, events, label):
+        self._chunks = chunks
+        self._events = events
+        self._label = label
+
+    async def astream(self, _prompt: str):
+        for chunk in self._chunks:
+            await asyncio.sleep(0.01)
+            yield SimpleNamespace(content=chunk)
+        self._events.append((self._label, "done"))
+
+
 class AgentRefactorTests(unittest.IsolatedAsyncioTestCase):
     async def test_market_intelligence_agent_parses_sections(self):
         from agents.base_agent import BaseAgent
@@ -76,121 +89,375 @@ class AgentRefactorTests(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(out["cost_structure_summary"], "Infra + payroll")
             self.assertEqual(out["summary"], "Watch CAC")
 
-    async def test_orchestrator_combined_report_flow(self):
-        # Stub heavy optional imports required by planner/rag path
-        if "langchain_community" not in sys.modules:
-            lc_mod = types.ModuleType("langchain_community")
-            lc_tools = types.ModuleType("langchain_community.tools")
-
-            class _FakeSearch:
-                def run(self, *_a, **_k):
-                    return ""
-
-            lc_tools.DuckDuckGoSearchRun = _FakeSearch
-            lc_mod.tools = lc_tools
-            sys.modules["langchain_community"] = lc_mod
-            sys.modules["langchain_community.tools"] = lc_tools
-
-        if "sentence_transformers" not in sys.modules:
-            st_mod = types.ModuleType("sentence_transformers")
-
-            class _FakeSentenceTransformer:
-                def __init__(self, *args, **kwargs):
-                    pass
-
-                def encode(self, texts):
-                    if isinstance(texts, list):
-                        return [[0.0] * 3 for _ in texts]
-                    return [0.0] * 3
+    async def test_fast_planner_saves_a_round_trip_and_overlaps_search(self):
+        _install_pipeline_stubs()
+        from agents.base_agent import BaseAgent
 
-            st_mod.SentenceTransformer = _FakeSentenceTransformer
-            sys.modules["sentence_transformers"] = st_mod
+        class _ScriptedLLM:
+            def __init__(self):
+                self.prompts = []
+
+            async def ainvoke(self, prompt: str):
+                self.prompts.append(prompt)
+                await asyncio.sleep(0.03)
+                if "SEARCH_NEEDED" in prompt:
+                    return SimpleNamespace(content=(
+                        "INDUSTRY: fintech\nLOCATION: Europe\nSEARCH_NEEDED: YES\n"
+                        "REASON: Fast-moving market\nSEARCH_QUERIES: neobank trends, EU payments"
+                    ))
+                if "INDUSTRY:" in prompt:
+                    return SimpleNamespace(content="INDUSTRY: fintech\nLOCATION: Europe")
+                return SimpleNamespace(content="The plan")
+
+        async def fake_search(queries):
+            await asyncio.sleep(0.03)
+            return [{"query": q, "results": f"results for {q}"} for q in queries]
 
-        if "supabase" not in sys.modules:
-            supa = types.ModuleType("supabase")
-            supa.create_client = lambda *args, **kwargs: object()
-            supa.Client = object
-            sys.modules["supabase"] = supa
+        with patch.object(BaseAgent, "_initialize_llm", return_value=_FakeLLM("")):
+            import agents.planner_agent as planner_module
+
+            outputs = {}
+            for mode in ("sequential", "fast"):
+                agent = planner_module.PlannerAgent()
+                agent.mode = mode
+                agent.llm = agent.deterministic_llm = _ScriptedLLM()
+                context = {"idea": "Neobank for freelancers", "industry": "general", "target_market": "global"}
+                with patch.object(planner_module.web_search_tool, "amulti_search", side_effect=fake_search):
+                    start = asyncio.get_running_loop().time()
+                    plan = await agent.execute(context)
+                    elapsed = asyncio.get_running_loop().time() - start
+                outputs[mode] = (plan, len(agent.llm.prompts), elapsed, context)
+
+        seq_plan, seq_calls, seq_elapsed, seq_context = outputs["sequential"]
+        fast_plan, fast_calls, fast_elapsed, fast_context = outputs["fast"]
+        self.assertEqual((seq_calls, fast_calls), (3, 2))
+        self.assertEqual(seq_plan, fast_plan)
+        # Extraction + decision + search + plan vs. combined call + max(search, plan)
+        self.assertLess(fast_elapsed, seq_elapsed - 0.05)
+        for key in ("extracted_industry", "extracted_location", "search_decision", "structured_context",
+                    "market_trends", "industry", "target_market"):
+            self.assertEqual(fast_context[key], seq_context[key], key)
+        self.assertEqual(fast_context["search_decision"]["queries"], ["neobank trends", "EU payments"])
+
+    async def test_critic_reviews_run_concurrently_or_fused(self):
+        from agents.base_agent import BaseAgent
+        from evaluation.metrics import evaluation_context
+
+        revenue = ("UNREALISTIC_ASSUMPTIONS: YES\nSEVERITY: HIGH\nISSUES: pricing, churn\n"
+                   "ADJUSTMENT_NEEDED: 10\nREASONING: Optimistic pricing")
+        competition = ("COMPETITION_LEVEL: HIGH\nMARKET_SATURATION: MEDIUM\nDIFFERENTIATION_STRENGTH: WEAK\n"
+                       "RED_FLAGS: incumbents\nADJUSTMENT_NEEDED: 5\nREASONING: Crowded market")
+
+        class _CriticLLM:
+            def __init__(self):
+                self.calls = 0
+
+            async def ainvoke(self, prompt: str):
+                self.calls += 1
+                await asyncio.sleep(0.05)
+                if "REVENUE_REVIEW:" in prompt:
+                    return SimpleNamespace(content=f"REVENUE_REVIEW:\n{revenue}\nCOMPETITION_REVIEW:\n{competition}")
+                if "UNREALISTIC_ASSUMPTIONS" in prompt:
+                    return SimpleNamespace(content=revenue)
+                if "COMPETITION_LEVEL" in prompt:
+                    return SimpleNamespace(content=competition)
+                return SimpleNamespace(content="Detailed critique")
+
+        report = {"success_probability": 60.0, "revenue_model": "Subscription", "competition_analysis": "Many rivals"}
+        with patch.object(BaseAgent, "_initialize_llm", return_value=_FakeLLM("")):
+            from agents.evaluation_agents import CriticAgent
+
+            for mode, llm_calls, subcalls in (
+                ("concurrent", 3, {"revenue_assumptions", "competition_intensity", "critique"}),
+                ("fused", 2, {"revenue_and_competition", "critique"}),
+            ):
+                agent = CriticAgent()
+                agent.mode = mode
+                agent.llm = _CriticLLM()
+                context = {"idea": "Idea", "full_report": report}
+                with evaluation_context() as metrics:
+                    start = asyncio.get_running_loop().time()
+                    critique = await agent.execute(context)
+                    elapsed = asyncio.get_running_loop().time() - start
+
+                self.assertEqual(agent.llm.calls, llm_calls, mode)
+                # Reviews overlap: two LLM round trips on the critical path, not three
+                self.assertLess(elapsed, 0.13, mode)
+                self.assertEqual(context["probability_adjustment"], 15, mode)
+                self.assertEqual(context["adjusted_success_probability"], 45.0, mode)
+                self.assertIn("Red Flags: incumbents", critique)
+                timings = metrics.get_summary()["subcall_metrics"]
+                self.assertEqual({t["call"] for t in timings}, subcalls)
+                self.assertTrue(all(t["agent"] == "Critic" and t["execution_time_ms"] > 0 for t in timings))
 
-        import os
-        os.environ.setdefault("SUPABASE_URL", "http://example.com")
-        os.environ.setdefault("SUPABASE_KEY", "test")
+    async def test_orchestrator_combined_report_flow(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
 
-        from agents.base_agent import BaseAgent
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
+            response = await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU")
 
-        with patch.object(BaseAgent, "_initialize_llm", return_value=_FakeLLM("")):
-            from agents.orchestrator import AgentOrchestrator
-            import agents.orchestrator as orch_module
-
-            orchestrator = AgentOrchestrator()
-
-            async def fake_market(_context):
-                await asyncio.sleep(0.02)
-                return {
-                    "market_demand": "Demand",
-                    "audience_profile": "Audience",
-                    "competition_landscape": "Competition",
-                    "summary": "Summary",
-                    "full_output": "full market",
-                }
-
-            async def fake_financial(_context):
-                await asyncio.sleep(0.02)
-                return {
-                    "revenue_model_summary": "Revenue",
-                    "cost_structure_summary": "Cost",
-                    "summary": "Financial summary",
-                    "full_output": "full financial",
-                }
-
-            async def fake_gtm(_context):
-                await asyncio.sleep(0.02)
-                return "GTM plan"
-
-            async def fake_success(_context):
-                return {"success_probability": 70.0, "best_location": "Berlin", "reasoning": "Looks viable"}
-
-            async def fake_critic(context):
-                report = context["full_report"]
-                assert all(k in report for k in ["market_intelligence", "financial_strategy", "go_to_market", "critique"])
-                return "Critique output"
-
-            orchestrator.planner.execute = AsyncMock(return_value="Plan")
-            orchestrator.market_intelligence_agent.execute = fake_market
-            orchestrator.financial_strategy_agent.execute = fake_financial
-            orchestrator.gtm_strategist.execute = fake_gtm
-            orchestrator.success_analyst.execute = fake_success
-            orchestrator.critic.execute = fake_critic
-
-            orch_module.rag_service.retrieve_similar_ideas = AsyncMock(return_value=[])
-            orch_module.rag_service.build_context_from_similar_ideas = lambda _x: ""
-            orch_module.rag_service.store_idea_with_report = AsyncMock(return_value=None)
-
-            et = orch_module.evaluation_tracker
-            et.reset = lambda: None
-            et.start_tracking = lambda: None
-            et.set_retrieval_metrics = lambda *_a, **_k: None
-            et.set_search_metrics = lambda *_a, **_k: None
-            et.add_agent_metrics = lambda *_a, **_k: None
-            et.calculate_overall_confidence = lambda: 0.0
-            et.assess_hallucination_risk = lambda: "low"
-            et.end_tracking = lambda: None
-            et.get_summary = lambda: {}
-            et.print_summary = lambda: None
-            et.retrieval_metrics = None
-
-            orch_module.HallucinationDetector.generate_hallucination_report = staticmethod(lambda **_k: {})
-            orch_module.HallucinationDetector.print_hallucination_report = staticmethod(lambda _r: None)
+        self.assertEqual(response.report.market_analysis, "Demand")
+        self.assertEqual(response.report.target_audience, "Audience")
+        self.assertEqual(response.report.competition_analysis, "Competition")
+        self.assertEqual(response.report.revenue_model, "Revenue")
+        self.assertEqual(response.report.cost_structure, "Cost")
+        self.assertEqual(response.report.go_to_market, "GTM plan")
+        self.assertEqual(response.critique, "Critique output")
+
+        # The idea is embedded once and the vector reused for retrieval and storage
+        orch_module.rag_service.embed_idea.assert_awaited_once_with("Idea")
+        self.assertEqual(orch_module.rag_service.retrieve_similar_ideas.await_args.kwargs["embedding"], [0.1, 0.2, 0.3])
+        self.assertEqual(orch_module.rag_service.store_idea_with_report.await_args.kwargs["embedding"], [0.1, 0.2, 0.3])
+
+    async def test_concurrent_analyses_keep_separate_metrics(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
+
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
+            responses = await asyncio.gather(
+                orchestrator.analyze_startup_idea("Idea A", "SaaS", "EU"),
+                orchestrator.analyze_startup_idea("Idea B", "SaaS", "EU"),
+            )
+
+        for response in responses:
+            agents = [m["agent"] for m in response.evaluation_metrics["agent_metrics"]]
+            # Each payload holds exactly one run's agents, not both runs interleaved
+            self.assertEqual(len(agents), len(set(agents)))
+            self.assertIn("Critic", agents)
+
+    async def test_gtm_waits_for_market_and_financial_outputs(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
+        seen = {}
+
+        async def fake_gtm(context):
+            seen["audience"] = context.get("audience_profile")
+            seen["finance"] = context.get("revenue_model")
+            return "GTM plan"
+
+        orchestrator.gtm_strategist.execute = fake_gtm
+
+        async def risk_stage(context):
+            context["risk_notes"] = f"risks for {context['go_to_market']}"
+
+        orchestrator.register_stage(
+            orch_module.Stage("risk", risk_stage, reads=("go_to_market",), writes=("risk_notes",))
+        )
+        with self.assertRaises(ValueError):
+            orchestrator.register_stage(orch_module.Stage("bad", risk_stage, reads=("nope",)))
+
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
+            response = await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU")
 
+        self.assertEqual(seen, {"audience": "Audience", "finance": "Revenue"})
+        pipeline = response.evaluation_metrics["pipeline"]
+        self.assertIn("risk", pipeline["stages"])
+        self.assertEqual(pipeline["critical_path"][0], "planner")
+        self.assertEqual(pipeline["critical_path"][-1], "critic")
+        self.assertIn("go_to_market", pipeline["critical_path"])
+
+    async def test_streamed_sections_start_downstream_stages_early(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
+        events = []
+
+        market_chunks = [
+            "MARKET_DEMAND: Big demand\nAUDIENCE_PRO", "FILE: Devs\nCOMPETITION_LANDSCAPE: Few rivals\n",
+            "SUMMARY: ", "long tail", " of summary",
+        ]
+        finance_chunks = ["REVENUE_MODEL: SaaS\nCOST_STRUCTURE: Cloud\n", "SUMMARY: ", "ok"]
+        orchestrator.market_intelligence_agent.llm = _FakeStreamingLLM(market_chunks, events, "market")
+        orchestrator.financial_strategy_agent.llm = _FakeStreamingLLM(finance_chunks, events, "finance")
+        for agent in (orchestrator.market_intelligence_agent, orchestrator.financial_strategy_agent):
+            agent.streaming = True
+            del agent.execute
+
+        async def fake_gtm(context):
+            events.append(("gtm", context["audience_profile"], context["cost_structure"]))
+            return "GTM plan"
+
+        orchestrator.gtm_strategist.execute = fake_gtm
+
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
             response = await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU")
 
-            self.assertEqual(response.report.market_analysis, "Demand")
-            self.assertEqual(response.report.target_audience, "Audience")
-            self.assertEqual(response.report.competition_analysis, "Competition")
-            self.assertEqual(response.report.revenue_model, "Revenue")
-            self.assertEqual(response.report.cost_structure, "Cost")
-            self.assertEqual(response.report.go_to_market, "GTM plan")
-            self.assertEqual(response.critique, "Critique output")
+        gtm_event = next(e for e in events if e[0] == "gtm")
+        self.assertEqual(gtm_event, ("gtm", "Devs", "Cloud"))
+        # GTM started while market intelligence was still streaming its summary
+        self.assertLess(events.index(gtm_event), events.index(("market", "done")))
+        self.assertEqual(response.report.market_analysis, "Big demand")
+        self.assertEqual(response.report.cost_structure, "Cloud")
+
+    async def test_progress_events_follow_the_pipeline(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
+        events = []
+
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
+            await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU", on_event=lambda e, p: events.append((e, p)))
+
+        names = [e for e, _ in events]
+        self.assertEqual(names[0], "retrieval")
+        self.assertEqual(names[-1], "result")
+        completed = {p["stage"]: p for e, p in events if e == "stage_completed"}
+        self.assertEqual(completed["critic"]["metrics"]["agent"], "Critic")
+        self.assertEqual(completed["go_to_market"]["outputs"], {"go_to_market": "GTM plan"})
+        self.assertLess(names.index("stage_completed"), names.index("result"))
+        # The report is streamed before the database write
+        orch_module.rag_service.store_idea_with_report.assert_awaited_once()
+
+    async def test_near_duplicate_is_served_from_result_cache(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
+
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
+            first = await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU")
+            stored_report = orch_module.rag_service.store_idea_with_report.await_args.args[1]
+            self.assertEqual(stored_report["analysis_metadata"]["industry"], "SaaS")
+            self.assertFalse(first.evaluation_metrics["cache_hit"])
+
+            orch_module.rag_service.retrieve_similar_ideas = AsyncMock(
+                return_value=[{"id": 7, "idea": "Idea", "report": stored_report, "similarity": 0.99}]
+            )
+            orchestrator.planner.execute.reset_mock()
+            cached = await orchestrator.analyze_startup_idea("Idea!", "saas", "EU")
+            self.assertTrue(cached.evaluation_metrics["cache_hit"])
+            self.assertEqual(cached.evaluation_metrics["result_cache"]["source_id"], 7)
+            self.assertEqual(cached.report.market_analysis, "Demand")
+            self.assertEqual(cached.critique, "Critique output")
+            orchestrator.planner.execute.assert_not_awaited()
+
+            # Different target market or an explicit refresh re-runs the pipeline
+            other_market = await orchestrator.analyze_startup_idea("Idea", "SaaS", "US")
+            refreshed = await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU", force_refresh=True)
+            self.assertFalse(other_market.evaluation_metrics["cache_hit"])
+            self.assertFalse(refreshed.evaluation_metrics["cache_hit"])
+            self.assertEqual(orchestrator.planner.execute.await_count, 2)
+
+    async def test_stage_past_the_deadline_degrades_to_partial_results(self):
+        orchestrator, orch_module = _build_stubbed_orchestrator()
+        from agents.base_agent import DEGRADED_TEXT
+
+        class _SlowLLM:
+            async def ainvoke(self, _prompt: str):
+                await asyncio.sleep(5)
+                return SimpleNamespace(content="too late")
+
+        async def slow_critic(_context):
+            return await orchestrator.critic._invoke("review")
+
+        orchestrator.critic.llm = _SlowLLM()
+        orchestrator.critic.execute = slow_critic
+
+        with patch.object(orch_module.EvaluationMetrics, "print_summary", lambda _self: None):
+            start = asyncio.get_running_loop().time()
+            response = await orchestrator.analyze_startup_idea("Idea", "SaaS", "EU", deadline_seconds=0.3)
+            elapsed = asyncio.get_running_loop().time() - start
+
+        self.assertLess(elapsed, 1.0)
+        # Finished sections are kept; only the critic's output is a placeholder
+        self.assertEqual(response.report.market_analysis, "Demand")
+        self.assertEqual(response.report.success_probability, 70.0)
+        self.assertEqual(response.critique, DEGRADED_TEXT)
+        self.assertEqual(list(response.evaluation_metrics["degraded_stages"]), ["critic"])
+        # Partial reports are never stored for reuse
+        orch_module.rag_service.store_idea_with_report.assert_not_awaited()
+
+
+def _install_pipeline_stubs():
+    """Stub heavy optional imports required by planner/rag path"""
+    if "langchain_community" not in sys.modules:
+        lc_mod = types.ModuleType("langchain_community")
+        lc_tools = types.ModuleType("langchain_community.tools")
+
+        class _FakeSearch:
+            def run(self, *_a, **_k):
+                return ""
+
+        lc_tools.DuckDuckGoSearchRun = _FakeSearch
+        lc_mod.tools = lc_tools
+        sys.modules["langchain_community"] = lc_mod
+        sys.modules["langchain_community.tools"] = lc_tools
+
+    if "sentence_transformers" not in sys.modules:
+        st_mod = types.ModuleType("sentence_transformers")
+
+        class _FakeSentenceTransformer:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def encode(self, texts):
+                if isinstance(texts, list):
+                    return [[0.0] * 3 for _ in texts]
+                return [0.0] * 3
+
+        st_mod.SentenceTransformer = _FakeSentenceTransformer
+        sys.modules["sentence_transformers"] = st_mod
+
+    if "supabase" not in sys.modules:
+        supa = types.ModuleType("supabase")
+        supa.create_client = lambda *args, **kwargs: object()
+        supa.Client = object
+        sys.modules["supabase"] = supa
+
+    import os
+    os.environ.setdefault("SUPABASE_URL", "http://example.com")
+    os.environ.setdefault("SUPABASE_KEY", "test")
+
+
+def _build_stubbed_orchestrator():
+    _install_pipeline_stubs()
+
+    from agents.base_agent import BaseAgent
+
+    with patch.object(BaseAgent, "_initialize_llm", return_value=_FakeLLM("")):
+        from agents.orchestrator import AgentOrchestrator
+        import agents.orchestrator as orch_module
+
+        orchestrator = AgentOrchestrator()
+
+    async def fake_market(_context):
+        await asyncio.sleep(0.02)
+        return {
+            "market_demand": "Demand",
+            "audience_profile": "Audience",
+            "competition_landscape": "Competition",
+            "summary": "Summary",
+            "full_output": "full market",
+        }
+
+    async def fake_financial(_context):
+        await asyncio.sleep(0.02)
+        return {
+            "revenue_model_summary": "Revenue",
+            "cost_structure_summary": "Cost",
+            "summary": "Financial summary",
+            "full_output": "full financial",
+        }
+
+    async def fake_gtm(_context):
+        await asyncio.sleep(0.02)
+        return "GTM plan"
+
+    async def fake_success(_context):
+        return {"success_probability": 70.0, "best_location": "Berlin", "reasoning": "Looks viable"}
+
+    async def fake_critic(context):
+        report = context["full_report"]
+        assert all(k in report for k in ["market_intelligence", "financial_strategy", "go_to_market", "critique"])
+        return "Critique output"
+
+    orchestrator.planner.execute = AsyncMock(return_value="Plan")
+    orchestrator.market_intelligence_agent.execute = fake_market
+    orchestrator.financial_strategy_agent.execute = fake_financial
+    orchestrator.gtm_strategist.execute = fake_gtm
+    orchestrator.success_analyst.execute = fake_success
+    orchestrator.critic.execute = fake_critic
+
+    orch_module.rag_service.embed_idea = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    orch_module.rag_service.retrieve_similar_ideas = AsyncMock(return_value=[])
+    orch_module.rag_service.build_context_from_similar_ideas = lambda _x: ""
+    orch_module.rag_service.store_idea_with_report = AsyncMock(return_value=None)
+
+    orch_module.HallucinationDetector.generate_hallucination_report = staticmethod(lambda **_k: {})
+    orch_module.HallucinationDetector.print_hallucination_report = staticmethod(lambda _r: None)
+
+    return orchestrator, orch_module
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from database.ann_index import LocalVectorIndex
+
+
+def _rows(vectors, start_id=1):
+    return [
+        {"id": start_id + i, "idea": f"idea {start_id + i}", "report": {"n": start_id + i}, "embedding": v.tolist()}
+        for i, v in enumerate(vectors)
+    ]
+
+
+class LocalVectorIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def test_exact_scan_matches_brute_force(self):
+        vectors = self.rng.normal(size=(200, 16)).astype(np.float32)
+        index = LocalVectorIndex(dtype="float32")
+        index.add(_rows(vectors))
+
+        query = vectors[17] + 0.01 * self.rng.normal(size=16).astype(np.float32)
+        results = index.search(query.tolist(), top_k=3)
+
+        normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:3] + 1
+        self.assertEqual([r["id"] for r in results], expected.tolist())
+        self.assertEqual(results[0]["idea"], "idea 18")
+        self.assertEqual(results[0]["report"], {"n": 18})
+        self.assertAlmostEqual(results[0]["similarity"], 1.0, places=2)
+
+    def test_ivf_recall_on_clustered_data(self):
+        centers = self.rng.normal(size=(20, 32)).astype(np.float32)
+        labels = self.rng.integers(0, 20, size=3000)
+        vectors = centers[labels] + 0.1 * self.rng.normal(size=(3000, 32)).astype(np.float32)
+        index = LocalVectorIndex(min_train_rows=1000, nprobe=8)
+        index.add(_rows(vectors))
+
+        self.assertGreater(index.stats()["lists"], 1)
+        hits = 0
+        for i in range(0, 3000, 100):
+            hits += index.search(vectors[i].tolist(), top_k=1)[0]["id"] == i + 1
+        self.assertGreaterEqual(hits, 28)
+
+    def test_persist_and_reload_then_append(self):
+        vectors = self.rng.normal(size=(10, 8)).astype(np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            index = LocalVectorIndex(path=tmp)
+            index.add(_rows(vectors))
+            index.save()
+
+            reloaded = LocalVectorIndex(path=tmp)
+            self.assertTrue(reloaded.load())
+            self.assertEqual(len(reloaded), 10)
+            self.assertEqual(reloaded.max_id, 10)
+            self.assertEqual(reloaded.search(vectors[3].tolist(), top_k=1)[0]["id"], 4)
+
+            # Memory-mapped matrix is copied on the first append
+            reloaded.add(_rows(self.rng.normal(size=(2, 8)).astype(np.float32), start_id=11))
+            reloaded.add(_rows(vectors[:1]))  # duplicate id is ignored
+            self.assertEqual(len(reloaded), 12)
+            self.assertEqual(reloaded.max_id, 12)
+
+    def test_reload_reuses_the_trained_quantiser(self):
+        vectors = self.rng.normal(size=(300, 8)).astype(np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            index = LocalVectorIndex(dtype="float32", min_train_rows=100, path=tmp)
+            index.add(_rows(vectors))
+            index.save()
+
+            reloaded = LocalVectorIndex(dtype="float32", min_train_rows=100, path=tmp)
+            reloaded._train = lambda *args, **kwargs: self.fail("load() retrained the quantiser")
+            self.assertTrue(reloaded.load())
+            self.assertFalse(reloaded._vectors.flags.writeable)  # still memory-mapped
+            self.assertEqual(reloaded.stats()["lists"], index.stats()["lists"])
+            np.testing.assert_array_equal(reloaded._assignments[:300], index._assignments[:300])
+            self.assertEqual(
+                reloaded.search(vectors[42].tolist(), top_k=1), index.search(vectors[42].tolist(), top_k=1)
+            )
+
+    def test_searches_and_inserts_proceed_while_the_quantiser_trains(self):
+        vectors = self.rng.normal(size=(300, 8)).astype(np.float32)
+        training, release = threading.Event(), threading.Event()
+
+        class _SlowTrainingIndex(LocalVectorIndex):
+            @staticmethod
+            def _assign(vectors, start, end, centroids, chunk=65_536):
+                if start == 0:
+                    training.set()
+                    release.wait(5)
+                return LocalVectorIndex._assign(vectors, start, end, centroids, chunk)
+
+        index = _SlowTrainingIndex(dtype="float32", min_train_rows=200)
+        index.add(_rows(vectors[:150]))
+        trainer = threading.Thread(target=index.add, args=(_rows(vectors[150:250], start_id=151),))
+        trainer.start()
+        self.assertTrue(training.wait(5))
+
+        # Neither call waits for the training run
+        self.assertEqual(index.search(vectors[7].tolist(), top_k=1)[0]["id"], 8)
+        index.add(_rows(vectors[250:], start_id=251))
+        self.assertEqual(index.stats()["lists"], 0)
+
+        release.set()
+        trainer.join(5)
+        self.assertEqual(index.stats()["lists"], int(np.sqrt(250)))
+        self.assertEqual(index._trained_at_size, 300)
+        self.assertTrue((index._assignments[:300] >= 0).all())
+        self.assertEqual(index.search(vectors[280].tolist(), top_k=1)[0]["id"], 281)
+
+    def test_dimension_mismatch_raises(self):
+        index = LocalVectorIndex()
+        index.add(_rows(self.rng.normal(size=(2, 8)).astype(np.float32)))
+        with self.assertRaises(ValueError):
+            index.search([0.1] * 4)
+
+
+class _FakeTable:
+    """Just enough of the supabase query builder for VectorDB.sync_index"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def table(self, _name):
+        return _FakeQuery(self)
+
+
+class _FakeQuery:
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.columns = None
+        self.max_rows = None
+
+    def select(self, columns):
+        self.columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda r: r[column] > value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda r: r[column] <= value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda r: r[column] in set(values))
+        return self
+
+    def order(self, _column):
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def execute(self):
+        self.table.requests.append(self.columns)
+        rows = sorted((r for r in self.table.rows if all(f(r) for f in self.filters)), key=lambda r: r["id"])
+        return SimpleNamespace(data=[{c: r.get(c) for c in self.columns} for r in rows[:self.max_rows]])
+
+
+class SyncIndexTests(unittest.TestCase):
+    def test_rows_committed_below_the_mirrored_max_id_are_picked_up(self):
+        from database.vector_db import VectorDB
+
+        rng = np.random.default_rng(3)
+        rows = _rows(rng.normal(size=(30, 8)).astype(np.float32))
+        db = VectorDB()
+        db.index = LocalVectorIndex(dtype="float32")
+        db.sync_overlap = 20
+        # Ids 12-14 were allocated by a batch that had not committed yet
+        db.client = _FakeTable([r for r in rows[:25] if not 12 <= r["id"] <= 14])
+        self.assertEqual(db.sync_index(page_size=10), 22)
+
+        db.client.rows = rows
+        self.assertEqual(db.sync_index(page_size=10), 8)
+        self.assertEqual(len(db.index), 30)
+        self.assertIn(13, db.index)
+        # Already-mirrored rows in the overlap are only listed by id, not refetched
+        self.assertEqual(db.sync_index(page_size=10), 0)
+        self.assertEqual(db.client.requests[-3:], [["id"], ["id"], ["id", "idea", "report", "embedding", "embedding_model"]])
+
+
+class AsyncInsertMirrorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_inserted_rows_are_mirrored_in_one_batch_off_the_event_loop(self):
+        from database.vector_db import VectorDB
+
+        rows = [{k: v for k, v in row.items() if k != "id"} for row in _rows(np.eye(3, dtype=np.float32))]
+        db = VectorDB()
+        db.index = LocalVectorIndex(dtype="float32")
+        db.index_ready = True
+        loop_thread = threading.get_ident()
+        batches = []
+        original_add = db.index.add
+
+        def add(batch):
+            batches.append((threading.get_ident(), len(batch)))
+            original_add(batch)
+
+        async def insert_ideas(batch):
+            return [7, 8, 9]
+
+        db.index.add = add
+        db.async_client = SimpleNamespace(insert_ideas=insert_ideas)
+        self.assertEqual(await db.ainsert_ideas(rows), [7, 8, 9])
+        self.assertEqual(len(batches), 1)
+        self.assertNotEqual(batches[0][0], loop_thread)
+        self.assertEqual(batches[0][1], 3)
+        self.assertIn(8, db.index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import math
+import unittest
+
+import httpx
+
+from database.async_client import AsyncPostgrestClient, PostgrestError
+
+
+class _PostgrestStub:
+    """In-memory startup_reports table behind PostgREST-style routes"""
+
+    def __init__(self, latency: float = 0.0):
+        self.rows = []
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("apikey") != "test-key":
+            return httpx.Response(401, json={"message": "Invalid API key"})
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return self._route(request)
+        finally:
+            self.in_flight -= 1
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/rest/v1/startup_reports" and request.method == "POST":
+            inserted = []
+            for row in json.loads(request.content):
+                row = {"id": len(self.rows) + 1, "created_at": "2024-01-01T00:00:00",
+                       "embedding_model": "sentence-transformers/all-MiniLM-L6-v2", **row}
+                # pgvector columns come back as text
+                row["embedding"] = json.dumps(row["embedding"])
+                self.rows.append(row)
+                inserted.append(row)
+            return httpx.Response(201, json=self._select(inserted, request.url.params.get("select")))
+        if path == "/rest/v1/startup_reports" and request.method == "GET":
+            rows = self.rows
+            id_filter = request.url.params.get("id")
+            if id_filter:
+                rows = [r for r in rows if str(r["id"]) == id_filter.split(".", 1)[1]]
+            limit = request.url.params.get("limit")
+            if limit:
+                rows = rows[:int(limit)]
+            return httpx.Response(200, json=self._select(rows, request.url.params.get("select")))
+        if path == "/rest/v1/rpc/search_similar_ideas" and request.method == "POST":
+            args = json.loads(request.content)
+            scored = [
+                {"id": r["id"], "idea": r["idea"], "report": r["report"],
+                 "similarity": _cosine(args["query_embedding"], json.loads(r["embedding"]))}
+                for r in self.rows
+                if args.get("query_model") in (None, r["embedding_model"])
+            ]
+            scored.sort(key=lambda r: r["similarity"], reverse=True)
+            return httpx.Response(200, json=scored[:args["match_count"]])
+        return httpx.Response(404, json={"message": f"Unknown route {path}"})
+
+    @staticmethod
+    def _select(rows, select):
+        if not select or select == "*":
+            return rows
+        columns = select.split(",")
+        return [{c: r.get(c) for c in columns} for r in rows]
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    return dot / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+
+class AsyncPostgrestClientTests(unittest.IsolatedAsyncioTestCase):
+    def _client(self, stub, key="test-key", **kwargs):
+        client = AsyncPostgrestClient(
+            "http://supabase.test", key, transport=httpx.MockTransport(stub.handle), **kwargs
+        )
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def test_insert_search_and_get_round_trip(self):
+        stub = _PostgrestStub()
+        client = self._client(stub)
+
+        ids = await client.insert_ideas([
+            {"idea": "Meal kits", "embedding": [1.0, 0.0], "report": {"p": 1}},
+            {"idea": "Dog walking", "embedding": [0.0, 1.0], "report": {"p": 2}},
+        ])
+        self.assertEqual(ids, [1, 2])
+        self.assertEqual(await client.insert_idea("Cat sitting", [0.1, 0.9], {}), 3)
+
+        similar = await client.search_similar_ideas([0.0, 1.0], top_k=2)
+        self.assertEqual([r["idea"] for r in similar], ["Dog walking", "Cat sitting"])
+        self.assertEqual(set(similar[0]), {"id", "idea", "report", "similarity"})
+
+        row = await client.get_idea_by_id(2)
+        self.assertEqual(row["idea"], "Dog walking")
+        self.assertNotIn("embedding", row)
+        self.assertEqual(json.loads((await client.get_idea_by_id(2, include_embedding=True))["embedding"]), [0.0, 1.0])
+        self.assertIsNone(await client.get_idea_by_id(99))
+        self.assertTrue(await client.health_check())
+        self.assertEqual(stub.requests[0].headers["Prefer"], "return=representation")
+
+    async def test_calls_run_concurrently_on_one_pool(self):
+        stub = _PostgrestStub(latency=0.05)
+        client = self._client(stub)
+
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(client.search_similar_ideas([1.0, 0.0]) for _ in range(10)))
+        elapsed = asyncio.get_running_loop().time() - start
+
+        self.assertEqual(stub.peak_in_flight, 10)
+        self.assertLess(elapsed, 0.3)
+        self.assertEqual(client.stats()["requests"], 10)
+
+    async def test_errors_and_timeouts(self):
+        stub = _PostgrestStub()
+        client = self._client(stub, key="wrong")
+        with self.assertRaises(PostgrestError) as raised:
+            await client.insert_idea("Idea", [1.0], {})
+        self.assertEqual(raised.exception.status_code, 401)
+        # Read paths degrade like the synchronous VectorDB
+        self.assertEqual(await client.search_similar_ideas([1.0]), [])
+        self.assertFalse(await client.health_check())
+
+        # Per-call timeouts override the client default
+        stub = _PostgrestStub()
+        client = self._client(stub, timeout=10.0)
+        await client.health_check(timeout=0.5)
+        await client.get_idea_by_id(1)
+        self.assertEqual(stub.requests[0].extensions["timeout"]["read"], 0.5)
+        self.assertEqual(stub.requests[1].extensions["timeout"]["read"], 10.0)
+
+        with self.assertRaises(ValueError):
+            AsyncPostgrestClient(None, None)._client()
+
+    async def test_vector_db_coroutines_use_the_async_client(self):
+        from database.vector_db import vector_db
+
+        stub = _PostgrestStub()
+        original = vector_db.async_client
+        vector_db.async_client = self._client(stub)
+        self.addCleanup(setattr, vector_db, "async_client", original)
+
+        idea_id = await vector_db.ainsert_idea("Meal kits", [1.0, 0.0], {"p": 1})
+        row = await vector_db.aget_idea_by_id(idea_id, include_embedding=True)
+        self.assertEqual(row["embedding"], [1.0, 0.0])
+        self.assertEqual((await vector_db.asearch_similar_ideas([1.0, 0.0], top_k=1))[0]["id"], idea_id)
+
+    async def test_rows_are_labelled_with_their_embedding_model(self):
+        from database.vector_db import vector_db
+
+        stub = _PostgrestStub()
+        original = vector_db.async_client
+        vector_db.async_client = self._client(stub)
+        self.addCleanup(setattr, vector_db, "async_client", original)
+
+        await vector_db.ainsert_idea("Meal kits", [1.0, 0.0], {})
+        # A late write from a worker still on the previous model keeps its own label
+        await vector_db.ainsert_ideas([
+            {"idea": "Dog walking", "embedding": [0.9, 0.1], "report": {}, "embedding_model": "old-model"}
+        ])
+        inserted = [json.loads(request.content)[0] for request in stub.requests if request.method == "POST"]
+        self.assertEqual(
+            [row["embedding_model"] for row in inserted], [vector_db.embedding_model, "old-model"]
+        )
+        # ...and is never matched by searches made with the current model
+        similar = await vector_db.asearch_similar_ideas([1.0, 0.0], top_k=5)
+        self.assertEqual([r["idea"] for r in similar], ["Meal kits"])
+
+
+if __name__ == "__main__":
+    unittest.main()
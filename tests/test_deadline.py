@@ -0,0 +1,114 @@
+import asyncio
+import time
+import unittest
+
+from runtime.deadline import DeadlineExceeded, LLMCallPolicy, deadline_scope, hedged, remaining
+
+
+class DeadlineScopeTests(unittest.TestCase):
+    def test_nested_scopes_only_shorten_the_deadline(self):
+        self.assertIsNone(remaining())
+        with deadline_scope(10) as outer:
+            with deadline_scope(60) as inner:
+                self.assertEqual(inner, outer)
+            with deadline_scope(1) as inner:
+                self.assertLess(inner, outer)
+            with deadline_scope(None) as inner:
+                self.assertEqual(inner, outer)
+            self.assertGreater(remaining(), 9)
+        self.assertIsNone(remaining())
+
+
+class HedgedCallTests(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_first_attempt_is_overtaken_by_the_hedge(self):
+        delays = [0.5, 0.01]
+        events = []
+
+        async def call():
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return delay
+
+        start = time.perf_counter()
+        result = await hedged(call, hedge_after=0.02, on_event=events.append)
+        self.assertEqual(result, 0.01)
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertEqual(events, ["hedge", "hedge_won"])
+
+    async def test_a_failed_attempt_waits_for_the_other(self):
+        outcomes = [ValueError("boom"), "ok"]
+
+        async def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                await asyncio.sleep(0.05)
+                raise outcome
+            await asyncio.sleep(0.1)
+            return outcome
+
+        self.assertEqual(await hedged(call, hedge_after=0.01), "ok")
+
+    async def test_policy_hedges_only_after_enough_samples(self):
+        policy = LLMCallPolicy(hedging_enabled=True, min_samples=3)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.01 if len(calls) != 4 else 0.5)
+            return len(calls)
+
+        for _ in range(3):
+            await policy.run("Agent", call)
+        self.assertIsNotNone(policy.percentile("Agent", 0.95))
+        self.assertEqual(await policy.run("Agent", call), 5)
+        self.assertEqual((policy.hedges, policy.hedge_wins), (1, 1))
+        # Streams and other side-effecting calls are never duplicated
+        await policy.run("Agent", call, hedge=False)
+        self.assertEqual(policy.hedges, 1)
+
+    async def test_queue_wait_is_neither_recorded_nor_hedged(self):
+        policy = LLMCallPolicy(hedging_enabled=True, min_samples=1)
+        policy.record("Agent", 0.01)
+        sent = []
+
+        async def call():
+            sent.append(1)
+            await asyncio.sleep(0.005)
+            return "ok"
+
+        async def queued(provider_call):
+            # Held for a limiter slot far longer than the p95
+            await asyncio.sleep(0.1)
+            return await provider_call()
+
+        self.assertEqual(await policy.run("Agent", call, limiter=queued), "ok")
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(policy.hedges, 0)
+        self.assertLess(max(policy._latencies["Agent"]), 0.05)
+
+
+class CallTimeoutTests(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_are_bounded_by_the_timeout_and_the_deadline(self):
+        policy = LLMCallPolicy(call_timeout=0.05)
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        with self.assertRaises(DeadlineExceeded):
+            await policy.run("Agent", slow)
+
+        policy.call_timeout = 30
+        start = time.perf_counter()
+        with deadline_scope(0.05):
+            with self.assertRaises(DeadlineExceeded):
+                await policy.run("Agent", slow)
+            await asyncio.sleep(0.06)
+            # Out of time: fail before sending anything
+            with self.assertRaises(DeadlineExceeded):
+                policy.timeout()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(policy.stats()["timeouts"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
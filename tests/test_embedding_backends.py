@@ -0,0 +1,116 @@
+import importlib
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+
+def _installed(name):
+    """True only for real packages, not the stubs installed by conftest"""
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return False
+    return bool(getattr(module, "__file__", None))
+
+
+HAVE_PARITY_DEPS = all(_installed(m) for m in ("sentence_transformers", "onnxruntime", "tokenizers", "torch", "transformers"))
+
+SENTENCES = [
+    "A mobile app that connects freelance designers with small businesses",
+    "AI bookkeeping for independent dental clinics",
+    "Subscription meal kits for people with diabetes",
+]
+
+
+class MeanPoolTests(unittest.TestCase):
+    def test_padding_tokens_are_ignored_and_vectors_normalized(self):
+        from rag.backends import mean_pool
+
+        tokens = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+
+        pooled = mean_pool(tokens, mask, normalize=False)
+        np.testing.assert_allclose(pooled, [[2.0, 0.0]])
+
+        normalized = mean_pool(tokens, mask)
+        np.testing.assert_allclose(np.linalg.norm(normalized, axis=1), [1.0], rtol=1e-6)
+
+
+class OnnxBackendTests(unittest.TestCase):
+    def test_encode_feeds_session_inputs_and_pools(self):
+        from rag.backends import OnnxEmbeddingBackend
+
+        class _Tokenizer:
+            def encode_batch(self, texts):
+                return [SimpleNamespace(ids=[1, 2], attention_mask=[1, 1], type_ids=[0, 0]) for _ in texts]
+
+        class _Session:
+            def __init__(self):
+                self.feeds = None
+
+            def run(self, _outputs, feeds):
+                self.feeds = feeds
+                batch = feeds["input_ids"].shape[0]
+                return [np.tile(np.array([[[3.0, 4.0], [3.0, 4.0]]]), (batch, 1, 1))]
+
+        backend = object.__new__(OnnxEmbeddingBackend)
+        backend.tokenizer = _Tokenizer()
+        backend.session = _Session()
+        backend.normalize = True
+        backend._input_names = {"input_ids", "attention_mask"}
+        backend._dimension = None
+
+        single = backend.encode("one idea")
+        batch = backend.encode(["a", "b"])
+
+        self.assertEqual(set(backend.session.feeds), {"input_ids", "attention_mask"})
+        np.testing.assert_allclose(single, [0.6, 0.8], rtol=1e-6)
+        self.assertEqual(batch.shape, (2, 2))
+        self.assertEqual(backend.get_sentence_embedding_dimension(), 2)
+
+    def test_unknown_backend_is_rejected(self):
+        from rag.backends import load_backend
+
+        with self.assertRaises(ValueError):
+            load_backend("tensorrt", "sentence-transformers/all-MiniLM-L6-v2", tempfile.gettempdir())
+
+
+@unittest.skipUnless(HAVE_PARITY_DEPS, "parity test needs torch, sentence-transformers, onnxruntime and tokenizers")
+class BackendParityTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from rag.backends import OnnxEmbeddingBackend, load_backend
+
+        cls.model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        cls.cache = tempfile.mkdtemp()
+        cls.torch_backend = load_backend("sentence-transformers", cls.model_name, cls.cache)
+        cls.onnx_backend = OnnxEmbeddingBackend(cls.model_name, cls.cache)
+        cls.int8_backend = OnnxEmbeddingBackend(cls.model_name, cls.cache, quantize=True)
+
+    @staticmethod
+    def _cosine(a, b):
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+    def test_onnx_matches_torch(self):
+        expected = self.torch_backend.encode(SENTENCES, convert_to_numpy=True)
+        actual = self.onnx_backend.encode(SENTENCES)
+
+        self.assertEqual(actual.shape, expected.shape)
+        self.assertEqual(self.onnx_backend.get_sentence_embedding_dimension(),
+                         self.torch_backend.get_sentence_embedding_dimension())
+        self.assertTrue((self._cosine(actual, expected) > 0.999).all())
+
+    def test_int8_stays_close_to_torch(self):
+        expected = self.torch_backend.encode(SENTENCES, convert_to_numpy=True)
+        actual = self.int8_backend.encode(SENTENCES)
+
+        self.assertTrue((self._cosine(actual, expected) > 0.98).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
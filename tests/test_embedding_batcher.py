@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+
+class _RecordingService:
+    """EmbeddingService stand-in that records each encode_batch call"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def get_cached(self, _text):
+        return None
+
+    def encode(self, text):
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [[float(len(t))] for t in texts]
+
+
+class EmbeddingBatcherTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_requests_share_one_model_call(self):
+        from rag.batcher import EmbeddingBatcher
+
+        service = _RecordingService()
+        batcher = EmbeddingBatcher(service, max_batch_size=32, max_wait_ms=20)
+
+        texts = [f"idea {'x' * i}" for i in range(10)]
+        vectors = await asyncio.gather(*[batcher.encode(t) for t in texts])
+
+        self.assertEqual(len(service.batches), 1)
+        self.assertEqual(vectors, [[float(len(t))] for t in texts])
+        stats = batcher.stats()
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["batch_size_histogram"]["9-16"], 1)
+
+    async def test_full_batch_flushes_without_waiting(self):
+        from rag.batcher import EmbeddingBatcher
+
+        service = _RecordingService()
+        batcher = EmbeddingBatcher(service, max_batch_size=4, max_wait_ms=10_000)
+
+        vectors = await asyncio.wait_for(
+            asyncio.gather(*[batcher.encode(str(i)) for i in range(8)]), timeout=1
+        )
+
+        self.assertEqual([len(b) for b in service.batches], [4, 4])
+        self.assertEqual(len(vectors), 8)
+
+    async def test_model_failure_reaches_every_caller(self):
+        from rag.batcher import EmbeddingBatcher
+
+        batcher = EmbeddingBatcher(_RecordingService(fail=True), max_batch_size=8, max_wait_ms=5)
+
+        results = await asyncio.gather(batcher.encode("a"), batcher.encode("b"), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+
+class _CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls.append(texts)
+        if isinstance(texts, list):
+            return np.array([[float(len(t)), 1.0] for t in texts])
+        return np.array([float(len(texts)), 1.0])
+
+
+class EmbeddingCacheTests(unittest.TestCase):
+    def _service(self, cache_size=8):
+        from rag.embeddings import EmbeddingService
+
+        service = EmbeddingService()
+        service.model = _CountingModel()
+        service.cache_size = cache_size
+        return service
+
+    def test_repeated_text_is_encoded_once(self):
+        service = self._service()
+
+        first = service.encode("AI bookkeeping for dentists")
+        second = service.encode("AI bookkeeping for dentists")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(service.model.calls), 1)
+        self.assertEqual(service.cache_stats()["hits"], 1)
+
+    def test_batch_encodes_only_distinct_misses(self):
+        service = self._service()
+        service.encode("cached")
+
+        vectors = service.encode_batch(["cached", "new", "new", "other"])
+
+        self.assertEqual(service.model.calls[-1], ["new", "other"])
+        self.assertEqual(vectors[1], vectors[2])
+        self.assertEqual(vectors[0], [6.0, 1.0])
+
+    def test_cache_evicts_least_recently_used(self):
+        service = self._service(cache_size=2)
+        service.encode("a")
+        service.encode("bb")
+        service.encode("a")
+        service.encode("ccc")
+
+        service.encode("a")
+        service.encode("bb")
+
+        # "a" survived as most recently used, "bb" was evicted and re-encoded
+        self.assertEqual(service.model.calls, ["a", "bb", "ccc", "bb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
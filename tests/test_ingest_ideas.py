@@ -0,0 +1,150 @@
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from database.local_store import LocalVectorStore
+from scripts.ingest_ideas import IdeaIngestor, IngestCheckpoint, IngestedHashes, read_records
+
+
+def _encode_batch(texts):
+    return [[float(len(text)), 1.0, float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+class _CountingStore:
+    """Wraps a store to count insert requests and their peak concurrency"""
+
+    def __init__(self, store, fail_after=None):
+        self.store = store
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.fail_after = fail_after
+
+    async def ainsert_ideas(self, rows):
+        self.requests += 1
+        if self.fail_after is not None and self.requests > self.fail_after:
+            raise ConnectionError("database unreachable")
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await self.store.ainsert_ideas(rows)
+        finally:
+            self.in_flight -= 1
+
+
+class IngestIdeasTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.store = LocalVectorStore(os.path.join(self.dir, "store"))
+        self.addCleanup(self.store.close)
+        self.hashes = IngestedHashes(os.path.join(self.dir, "ingested_hashes.sqlite3"))
+        self.addCleanup(self.hashes.close)
+
+    def _write_jsonl(self, records):
+        path = os.path.join(self.dir, "ideas.jsonl")
+        with open(path, "w") as f:
+            for record in records:
+                f.write((record if isinstance(record, str) else json.dumps(record)) + "\n")
+        return path
+
+    async def test_batches_chunks_and_dedupes(self):
+        records = [{"idea": f"Idea number {i}", "report": {"n": i}} for i in range(50)]
+        records += [{"idea": "Idea   number 3", "report": {"n": 3}}, "not json", {"report": {}}]
+        path = self._write_jsonl(records)
+        store = _CountingStore(self.store)
+        ingestor = IdeaIngestor(
+            store, _encode_batch, IngestCheckpoint(path + ".checkpoint.json"), self.hashes,
+            batch_size=20, chunk_size=8, concurrency=3,
+        )
+
+        summary = await ingestor.run(read_records(path))
+
+        self.assertEqual((summary["read"], summary["inserted"]), (53, 50))
+        self.assertEqual((summary["duplicates"], summary["invalid"]), (1, 2))
+        self.assertEqual(summary["checkpoint_offset"], 53)
+        self.assertGreater(summary["rows_per_second"], 0)
+        # 20 + 20 + 10 ideas in chunks of at most 8, several in flight at once
+        self.assertEqual(store.requests, 8)
+        self.assertEqual(store.peak_in_flight, 3)
+        # Chunks may land out of order, but every idea is stored exactly once
+        ideas = [self.store.get_idea_by_id(i)["idea"] for i in range(1, 51)]
+        self.assertEqual(sorted(ideas), sorted(f"Idea number {i}" for i in range(50)))
+
+    async def test_interrupted_ingestion_resumes_without_duplicates(self):
+        path = self._write_jsonl([{"idea": f"Idea number {i}", "report": {"n": i}} for i in range(30)])
+        checkpoint_path = path + ".checkpoint.json"
+
+        failing = _CountingStore(self.store, fail_after=2)
+        with self.assertRaises(ConnectionError):
+            await IdeaIngestor(
+                failing, _encode_batch, IngestCheckpoint(checkpoint_path), self.hashes,
+                batch_size=10, chunk_size=5, concurrency=1,
+            ).run(read_records(path))
+        checkpoint = IngestCheckpoint(checkpoint_path)
+        # Only the failed batch's hashes are checkpointed; inserted rows live in the hash store
+        self.assertEqual((checkpoint.offset, len(checkpoint.in_flight), len(self.hashes)), (10, 10, 10))
+
+        summary = await IdeaIngestor(
+            self.store, _encode_batch, IngestCheckpoint(checkpoint_path), self.hashes, batch_size=10, chunk_size=5
+        ).run(read_records(path))
+        self.assertEqual((summary["read"], summary["inserted"]), (20, 20))
+        self.assertEqual(self.store.stats()["index"]["rows"], 30)
+        self.assertEqual(IngestCheckpoint(checkpoint_path).in_flight, set())
+
+        # Re-running a finished file is a no-op
+        again = await IdeaIngestor(
+            self.store, _encode_batch, IngestCheckpoint(checkpoint_path), self.hashes
+        ).run(read_records(path))
+        self.assertEqual(again["inserted"], 0)
+
+    async def test_restarts_and_overlapping_files_skip_ingested_rows(self):
+        path = self._write_jsonl([{"idea": f"Idea number {i}", "report": {"n": i}} for i in range(20)])
+        await IdeaIngestor(
+            self.store, _encode_batch, IngestCheckpoint(path + ".checkpoint.json"), self.hashes, batch_size=8
+        ).run(read_records(path))
+
+        # --restart drops the checkpoint, and a second file repeats half of the first
+        os.remove(path + ".checkpoint.json")
+        restarted = await IdeaIngestor(
+            self.store, _encode_batch, IngestCheckpoint(path + ".checkpoint.json"), self.hashes, batch_size=8
+        ).run(read_records(path))
+        self.assertEqual((restarted["read"], restarted["inserted"], restarted["duplicates"]), (20, 0, 20))
+
+        other = os.path.join(self.dir, "more.jsonl")
+        with open(other, "w") as f:
+            for i in range(10, 30):
+                f.write(json.dumps({"idea": f"Idea number {i}", "report": {"n": i}}) + "\n")
+        overlap = await IdeaIngestor(
+            self.store, _encode_batch, IngestCheckpoint(other + ".checkpoint.json"), self.hashes, batch_size=8
+        ).run(read_records(other))
+        self.assertEqual((overlap["inserted"], overlap["duplicates"]), (10, 10))
+        self.assertEqual(self.store.stats()["index"]["rows"], 30)
+
+    def test_csv_reports_are_parsed_from_json_or_columns(self):
+        path = os.path.join(self.dir, "ideas.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["idea", "report"])
+            writer.writerow(["Meal kits for students", json.dumps({"success_probability": 61})])
+            writer.writerow(["", "{}"])
+        other = os.path.join(self.dir, "flat.csv")
+        with open(other, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["idea", "industry"])
+            writer.writerow(["Dog walking app", "pets"])
+
+        self.assertEqual(
+            list(read_records(path)),
+            [{"idea": "Meal kits for students", "report": {"success_probability": 61}}, None],
+        )
+        self.assertEqual(list(read_records(other)), [{"idea": "Dog walking app", "report": {"industry": "pets"}}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from jobs.manager import JobManager, QueueFullError
+from jobs.store import CANCELLED, FAILED, SUCCEEDED, InMemoryJobStore, Job, SQLiteJobStore
+
+
+class JobManagerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.release = asyncio.Event()
+        self.running = 0
+        self.peak_running = 0
+        self.manager = JobManager(InMemoryJobStore(), max_workers=2, max_queue=2)
+        self.manager.start(self._runner)
+
+    async def asyncTearDown(self):
+        self.release.set()
+        await self.manager.stop()
+
+    async def _runner(self, request, on_event):
+        self.running += 1
+        self.peak_running = max(self.peak_running, self.running)
+        try:
+            on_event("stage_started", {"stage": "planner", "start_ms": 0.0})
+            on_event("partial", {"stage": "planner", "key": "plan", "value": "draft plan"})
+            await self.release.wait()
+            if request["idea"] == "fail":
+                raise RuntimeError("boom")
+            on_event("stage_completed", {"stage": "planner", "duration_ms": 5.0, "metrics": None, "outputs": {}})
+            return {"idea": request["idea"]}
+        finally:
+            self.running -= 1
+
+    async def _wait_for(self, job_id, statuses):
+        for _ in range(200):
+            job = await self.manager.get(job_id)
+            if job.status in statuses:
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"job {job_id} never reached {statuses}")
+
+    async def test_jobs_run_with_bounded_concurrency_and_partial_results(self):
+        jobs = [await self.manager.submit({"idea": f"idea {i}"}) for i in range(4)]
+        running = await self._wait_for(jobs[0].id, ("running",))
+        await asyncio.sleep(0.02)
+        self.assertEqual(running.partial, {"plan": "draft plan"})
+        self.assertEqual(running.stages["planner"]["status"], "running")
+        self.assertEqual(self.manager.stats()["running"], 2)
+        self.assertEqual(self.manager.stats()["queue_depth"], 2)
+
+        with self.assertRaises(QueueFullError):
+            await self.manager.submit({"idea": "one too many"})
+
+        self.release.set()
+        for job in jobs:
+            done = await self._wait_for(job.id, (SUCCEEDED,))
+            self.assertEqual(done.result, {"idea": job.request["idea"]})
+            self.assertEqual(done.stages["planner"]["status"], "completed")
+        self.assertEqual(self.peak_running, 2)
+
+        stats = self.manager.stats()
+        self.assertEqual((stats["completed"], stats["rejected"]), (4, 1))
+
+    async def test_cancel_queued_and_running_jobs(self):
+        first = await self.manager.submit({"idea": "a"})
+        second = await self.manager.submit({"idea": "b"})
+        queued = await self.manager.submit({"idea": "c"})
+        await self._wait_for(first.id, ("running",))
+
+        await self.manager.cancel(queued.id)
+        await self.manager.cancel(first.id)
+        self.assertEqual((await self._wait_for(first.id, (CANCELLED,))).error, None)
+        self.assertEqual((await self.manager.get(queued.id)).status, CANCELLED)
+
+        self.release.set()
+        await self._wait_for(second.id, (SUCCEEDED,))
+        self.assertEqual(self.manager.stats()["cancelled"], 2)
+
+    async def test_failures_are_recorded(self):
+        job = await self.manager.submit({"idea": "fail"})
+        self.release.set()
+        failed = await self._wait_for(job.id, (FAILED,))
+        self.assertEqual(failed.error, "boom")
+
+
+class SharedStoreCancelTests(unittest.IsolatedAsyncioTestCase):
+    async def test_cancel_reaches_a_job_running_in_another_process(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "jobs.sqlite3")
+        release = asyncio.Event()
+
+        async def runner(request, on_event):
+            await release.wait()
+            return {"idea": request["idea"]}
+
+        owner = JobManager(SQLiteJobStore(path), max_workers=1, cancel_poll_seconds=0.01)
+        other = JobManager(SQLiteJobStore(path), max_workers=1)
+        owner.start(runner)
+        other.start(runner)
+        self.addAsyncCleanup(other.stop)
+        self.addAsyncCleanup(owner.stop)
+        self.addCleanup(release.set)
+
+        job = await owner.submit({"idea": "a"})
+        for _ in range(200):
+            if (await other.get(job.id)).status == "running":
+                break
+            await asyncio.sleep(0.01)
+
+        pending = await other.cancel(job.id)
+        self.assertEqual((pending.status, pending.cancel_requested), ("running", True))
+        for _ in range(200):
+            if (await other.get(job.id)).status == CANCELLED:
+                break
+            await asyncio.sleep(0.01)
+        cancelled = await other.get(job.id)
+        self.assertEqual((cancelled.status, cancelled.error), (CANCELLED, None))
+        self.assertEqual(owner.stats()["cancelled"], 1)
+
+
+class SQLiteJobStoreTests(unittest.TestCase):
+    def test_round_trip_and_prune(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteJobStore(os.path.join(tmp, "jobs.sqlite3"))
+            job = Job(request={"idea": "x"})
+            job.partial["plan"] = "p"
+            store.save(job)
+            self.assertEqual(store.get(job.id).partial, {"plan": "p"})
+            self.assertEqual([j.id for j in store.list_by_status("queued")], [job.id])
+
+            job.status, job.finished_at = SUCCEEDED, time.time() - 100
+            store.save(job)
+            self.assertEqual(store.prune(time.time() - 200), 0)
+            self.assertEqual(store.prune(time.time()), 1)
+            self.assertIsNone(store.get(job.id))
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
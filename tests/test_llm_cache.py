@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from agents.llm_cache import (
+    LLMResponseCache,
+    MemoryLLMCacheBackend,
+    RedisLLMCacheBackend,
+    SQLiteLLMCacheBackend,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _RedisStandIn:
+    """The subset of the redis client the backend uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        return value.encode("utf-8") if value is not None else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+
+class _CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, prompt: str):
+        self.calls += 1
+        return SimpleNamespace(content=f"answer {self.calls} to {prompt}")
+
+
+class LLMCacheBackendTests(unittest.TestCase):
+    def test_memory_backend_expires_and_evicts_lru(self):
+        clock = _Clock()
+        backend = MemoryLLMCacheBackend(max_entries=2, clock=clock)
+        backend.set("a", "A", 10)
+        backend.set("b", "B", 100)
+        self.assertEqual(backend.get("a"), "A")
+        backend.set("c", "C", 100)  # evicts b, the least recently used
+        self.assertIsNone(backend.get("b"))
+        clock.now += 11
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(backend.get("c"), "C")
+
+    def test_sqlite_backend_persists_across_instances(self):
+        clock = _Clock()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm_cache.sqlite3")
+            writer = SQLiteLLMCacheBackend(path, max_entries=2, clock=clock)
+            writer.set("a", "A", 10)
+            writer.set("b", "B", 10)
+            writer.set("c", "C", 10)
+
+            reader = SQLiteLLMCacheBackend(path, clock=clock)
+            self.assertIsNone(reader.get("a"))
+            self.assertEqual(reader.get("c"), "C")
+            clock.now += 11
+            self.assertIsNone(reader.get("c"))
+            writer.close()
+            reader.close()
+
+    def test_redis_backend_uses_prefix_and_ttl(self):
+        client = _RedisStandIn()
+        backend = RedisLLMCacheBackend(client, prefix="t:")
+        backend.set("k", "value", 30.5)
+        self.assertEqual(client.expiry, {"t:k": 30})
+        self.assertEqual(backend.get("k"), "value")
+        self.assertIsNone(backend.get("missing"))
+
+
+class LLMResponseCacheTests(unittest.IsolatedAsyncioTestCase):
+    def test_key_covers_model_temperature_and_prompt(self):
+        key = LLMResponseCache.key("m", 0.7, "prompt")
+        self.assertEqual(key, LLMResponseCache.key("m", 0.7, "prompt"))
+        self.assertNotEqual(key, LLMResponseCache.key("m", 0.2, "prompt"))
+        self.assertNotEqual(key, LLMResponseCache.key("other", 0.7, "prompt"))
+        self.assertNotEqual(key, LLMResponseCache.key("m", 0.7, "prompt "))
+
+    def test_opt_in_defaults_and_overrides(self):
+        cache = LLMResponseCache(MemoryLLMCacheBackend())
+        self.assertTrue(cache.enabled_for("planner", True))
+        self.assertFalse(cache.enabled_for("critic", False))
+        cache.agents = {"critic"}
+        self.assertFalse(cache.enabled_for("planner", True))
+        self.assertTrue(cache.enabled_for("critic", False))
+        cache.agents = {"*"}
+        self.assertTrue(cache.enabled_for("gtm", False))
+        self.assertFalse(LLMResponseCache(None).enabled_for("planner", True))
+
+    async def test_agents_reuse_completions_for_identical_prompts(self):
+        import agents.base_agent as base_module
+
+        cache = LLMResponseCache(MemoryLLMCacheBackend(), agents={"cached"})
+        with patch.object(base_module, "llm_cache", cache), \
+                patch.object(base_module.BaseAgent, "_initialize_llm", side_effect=lambda *args: _CountingLLM()):
+            cached = base_module.BaseAgent("Cached", "role")
+            cached.stage_name = "cached"
+            uncached = base_module.BaseAgent("Uncached", "role")
+            uncached.stage_name = "uncached"
+
+            first = await cached._invoke("same prompt")
+            self.assertEqual(await cached._invoke("same prompt"), first)
+            await cached._invoke("different prompt")
+            self.assertEqual(cached.llm.calls, 2)
+
+            await uncached._invoke("same prompt")
+            await uncached._invoke("same prompt")
+            self.assertEqual(uncached.llm.calls, 2)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["agents"]["Cached"]["hit_rate"], 0.333)
+        self.assertNotIn("Uncached", stats["agents"])
+
+    async def test_deterministic_only_agents_cache_just_temperature_zero_calls(self):
+        import agents.base_agent as base_module
+
+        cache = LLMResponseCache(MemoryLLMCacheBackend(), agents={"planner"})
+        with patch.object(base_module, "llm_cache", cache), \
+                patch.object(base_module.BaseAgent, "_initialize_llm", side_effect=lambda *args: _CountingLLM()):
+            agent = base_module.BaseAgent("Planner", "role")
+            agent.stage_name = "planner"
+            agent.cache_deterministic_only = True
+
+            await agent._invoke("extract", deterministic=True)
+            await agent._invoke("extract", deterministic=True)
+            await agent._invoke("draft the plan")
+            await agent._invoke("draft the plan")
+
+        self.assertEqual((agent.deterministic_llm.calls, agent.llm.calls), (1, 2))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    async def test_backend_failures_fall_through_to_the_llm(self):
+        class _Broken(MemoryLLMCacheBackend):
+            def get(self, key):
+                raise ConnectionError("down")
+
+        cache = LLMResponseCache(_Broken())
+        self.assertIsNone(await cache.get("Planner", "k"))
+        self.assertEqual(cache.stats()["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+import agents.llm_clients as clients_module
+from agents.llm_clients import LLMClientRegistry
+from agents.rate_limiter import LLMRateLimiter
+
+
+class _ChatGroq:
+    """Keeps a preset async_client, like langchain-groq's validator"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.async_client = kwargs.get("async_client") or object()
+
+
+class _ReplacingChatGroq(_ChatGroq):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.async_client = object()
+
+
+class _AsyncGroq:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.chat = SimpleNamespace(completions=SimpleNamespace(sdk=self))
+
+
+class LLMClientRegistryTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        env = patch.dict(os.environ, {"GROQ_API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        groq = patch.dict(sys.modules, {"groq": SimpleNamespace(AsyncGroq=_AsyncGroq)})
+        groq.start()
+        self.addCleanup(groq.stop)
+
+    async def test_clients_are_shared_per_model_and_temperature(self):
+        registry = LLMClientRegistry(max_connections=7, max_keepalive_connections=3)
+        with patch.object(clients_module, "ChatGroq", _ChatGroq):
+            first = registry.get("llama3-70b-8192", 0.7)
+            self.assertIs(registry.get("llama3-70b-8192", 0.7), first)
+            cooler = registry.get("llama3-70b-8192", 0.2)
+            other = registry.get("mixtral-8x7b-32768", 0.7)
+
+        self.assertIsNot(cooler, first)
+        # One connection pool behind every client, passed through the SDK client
+        pool = first.async_client.sdk.kwargs["http_client"]
+        self.assertIs(cooler.async_client.sdk.kwargs["http_client"], pool)
+        self.assertIs(other.async_client.sdk.kwargs["http_client"], pool)
+        self.assertEqual(first.async_client.sdk.kwargs["api_key"], "test-key")
+        self.assertEqual(len(registry.stats()["clients"]), 3)
+        self.assertEqual(registry.stats()["pooled_clients"], 3)
+        self.assertTrue(registry.stats()["shared_http_pool"])
+
+        await registry.aclose()
+        self.assertTrue(pool.is_closed)
+        self.assertEqual(registry.stats()["clients"], [])
+
+    def test_clients_without_the_pool_are_still_shared(self):
+        registry = LLMClientRegistry()
+        with patch.object(clients_module, "ChatGroq", _ReplacingChatGroq):
+            client = registry.get("llama3-70b-8192", 0.7)
+            self.assertIs(registry.get("llama3-70b-8192", 0.7), client)
+        self.assertEqual(registry.stats()["pooled_clients"], 0)
+
+        registry = LLMClientRegistry()
+        with patch.dict(sys.modules, {"groq": None}), patch.object(clients_module, "ChatGroq", _ChatGroq):
+            client = registry.get("llama3-70b-8192", 0.7)
+        self.assertNotIn("async_client", client.kwargs)
+        self.assertFalse(registry.stats()["shared_http_pool"])
+
+    async def test_sdk_retries_are_off_and_success_headers_reach_the_limiter(self):
+        now = [100.0]
+        limiter = LLMRateLimiter(clock=lambda: now[0])
+        transport = httpx.MockTransport(lambda request: httpx.Response(
+            200, json={}, headers={"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2.5s"}
+        ))
+        registry = LLMClientRegistry(rate_limiter=limiter, transport=transport)
+        self.addAsyncCleanup(registry.aclose)
+        with patch.object(clients_module, "ChatGroq", _ChatGroq):
+            client = registry.get("llama3-70b-8192", 0.7)
+
+        self.assertEqual(client.kwargs["max_retries"], 0)
+        self.assertEqual(client.async_client.sdk.kwargs["max_retries"], 0)
+        # A successful response with an exhausted window pauses dispatch until it resets
+        await client.async_client.sdk.kwargs["http_client"].post("https://api.groq.com/openai/v1/chat/completions")
+        self.assertEqual(limiter.blocked_until, 102.5)
+        self.assertEqual(limiter.stats()["header_pauses"], 1)
+
+    async def test_warm_up_opens_an_authenticated_connection_on_the_shared_pool(self):
+        requests = []
+
+        def handle(request):
+            requests.append(request)
+            status = 200 if request.headers["Authorization"] == "Bearer test-key" else 401
+            return httpx.Response(status, json={"data": []})
+
+        registry = LLMClientRegistry(transport=httpx.MockTransport(handle), base_url="https://llm.test/")
+        self.addAsyncCleanup(registry.aclose)
+        self.assertTrue(await registry.warm_up())
+        self.assertEqual(str(requests[0].url), "https://llm.test/openai/v1/models")
+        self.assertTrue(registry.stats()["shared_http_pool"])
+
+        with patch.dict(os.environ, {"GROQ_API_KEY": "revoked"}):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await registry.warm_up()
+
+    def test_missing_api_key_raises(self):
+        registry = LLMClientRegistry()
+        with patch.dict(os.environ, {"GROQ_API_KEY": ""}):
+            with self.assertRaises(ValueError):
+                registry.get("llama3-70b-8192", 0.7)
+
+    def test_agents_reuse_the_registry_client(self):
+        import agents.base_agent as base_module
+
+        registry = LLMClientRegistry()
+        with patch.object(clients_module, "ChatGroq", _ChatGroq), \
+                patch.object(base_module, "llm_clients", registry):
+            first = base_module.BaseAgent("A", "role")
+            second = base_module.BaseAgent("B", "role")
+        self.assertIs(first.llm, second.llm)
+
+
+if __name__ == "__main__":
+    unittest.main()
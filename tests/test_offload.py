@@ -0,0 +1,53 @@
+import asyncio
+import time
+import unittest
+
+
+class OffloadPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def test_blocking_calls_do_not_stall_event_loop(self):
+        from runtime.offload import OffloadPool
+
+        pool = OffloadPool("test", max_workers=4, max_queue=4)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        try:
+            results = await asyncio.gather(*[pool.run(time.sleep, 0.1) for _ in range(4)])
+        finally:
+            tick_task.cancel()
+            pool.shutdown()
+
+        self.assertEqual(results, [None] * 4)
+        # The loop kept ticking while four threads slept
+        self.assertGreater(ticks, 5)
+
+    async def test_stats_track_queue_depth_and_failures(self):
+        from runtime.offload import OffloadPool
+
+        pool = OffloadPool("test", max_workers=1, max_queue=8)
+
+        def boom():
+            raise ValueError("boom")
+
+        try:
+            await asyncio.gather(*[pool.run(time.sleep, 0.02) for _ in range(3)])
+            with self.assertRaises(ValueError):
+                await pool.run(boom)
+        finally:
+            pool.shutdown()
+
+        stats = pool.stats()
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["peak_in_flight"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
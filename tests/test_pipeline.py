@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+
+from agents.pipeline import Stage, StageGraph
+
+
+def _stage(name, reads=(), writes=(), delay=0.0, log=None):
+    async def run(context):
+        if log is not None:
+            log.append(("start", name))
+        await asyncio.sleep(delay)
+        for key in writes:
+            context[key] = name
+        if log is not None:
+            log.append(("end", name))
+
+    return Stage(name=name, run=run, reads=reads, writes=writes)
+
+
+class StageGraphTests(unittest.IsolatedAsyncioTestCase):
+    async def test_stages_start_when_inputs_are_ready(self):
+        log = []
+        graph = StageGraph([
+            _stage("plan", ("idea",), ("plan",), 0.01, log),
+            _stage("market", ("plan",), ("market",), 0.03, log),
+            _stage("finance", ("plan",), ("finance",), 0.01, log),
+            _stage("gtm", ("market", "finance"), ("gtm",), 0.01, log),
+        ])
+
+        context = {"idea": "x"}
+        run = await graph.run(context)
+
+        self.assertEqual(context["gtm"], "gtm")
+        # market and finance overlap; gtm only starts after both finish
+        self.assertLess(log.index(("start", "finance")), log.index(("end", "market")))
+        self.assertGreater(log.index(("start", "gtm")), log.index(("end", "market")))
+        self.assertGreaterEqual(run.timings["gtm"].start_ms, run.timings["market"].end_ms)
+        self.assertEqual(run.critical_path, ["plan", "market", "gtm"])
+
+    async def test_stage_may_overwrite_initial_key(self):
+        graph = StageGraph([
+            _stage("planner", ("industry",), ("industry",)),
+            _stage("finance", ("industry",), ("finance",)),
+        ])
+        self.assertEqual(graph.dependencies(), {"planner": set(), "finance": {"planner"}})
+
+    def test_validation_errors(self):
+        with self.assertRaises(ValueError):
+            StageGraph([_stage("a", writes=("x",)), _stage("b", writes=("x",))])
+        with self.assertRaises(ValueError):
+            StageGraph([_stage("a", reads=("missing",))]).validate([])
+        with self.assertRaises(ValueError):
+            StageGraph([_stage("a", ("y",), ("x",)), _stage("b", ("x",), ("y",))]).validate([])
+
+    async def test_listener_sees_published_sections(self):
+        from agents.pipeline import publish
+
+        async def producer(context):
+            publish("draft", "early")
+            await asyncio.sleep(0.02)
+            context["final"] = "late"
+
+        async def consumer(context):
+            context["used"] = context["draft"]
+
+        events = []
+        graph = StageGraph([
+            Stage("producer", producer, writes=("draft", "final")),
+            Stage("consumer", consumer, reads=("draft",), writes=("used",)),
+        ])
+        run = await graph.run({}, listener=lambda event, name, payload: events.append((event, name)))
+
+        self.assertIn(("section", "producer"), events)
+        # The consumer starts and finishes on the published draft before the producer ends
+        self.assertLess(events.index(("stage_completed", "consumer")), events.index(("stage_completed", "producer")))
+        self.assertLess(run.timings["consumer"].end_ms, run.timings["producer"].end_ms)
+        self.assertFalse(publish("draft", "outside a run"))
+
+    async def test_failure_cancels_running_stages(self):
+        cancelled = asyncio.Event()
+
+        async def slow(_context):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def boom(_context):
+            raise RuntimeError("boom")
+
+        graph = StageGraph([Stage("slow", slow), Stage("boom", boom)])
+        with self.assertRaises(RuntimeError):
+            await graph.run({})
+        self.assertTrue(cancelled.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from agents.rate_limiter import LLMRateLimiter, _parse_duration, analysis_scope, call_priority, is_rate_limited
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("Error code: 429 - rate limit exceeded")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class LLMRateLimiterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_queued_calls_are_served_by_priority(self):
+        limiter = LLMRateLimiter(max_concurrency=1)
+        release = asyncio.Event()
+        order = []
+
+        async def call(label, wait=False):
+            if wait:
+                await release.wait()
+            order.append(label)
+
+        holder = asyncio.create_task(limiter.call(lambda: call("holder", wait=True)))
+        await asyncio.sleep(0)
+        new_planner = asyncio.create_task(limiter.call(lambda: call("planner"), priority=(1, 0.0)))
+        later_analysis = asyncio.create_task(limiter.call(lambda: call("later"), priority=(0, 2.0)))
+        earlier_analysis = asyncio.create_task(limiter.call(lambda: call("earlier"), priority=(0, 1.0)))
+        await asyncio.sleep(0.01)
+        self.assertEqual(limiter.stats()["queued"], 3)
+
+        release.set()
+        await asyncio.gather(holder, new_planner, later_analysis, earlier_analysis)
+        self.assertEqual(order, ["holder", "earlier", "later", "planner"])
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_rate_limits_halve_the_window_and_retry_with_backoff(self):
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+
+        limiter = LLMRateLimiter(max_concurrency=8, sleep=fake_sleep, rng=lambda: 0.5, base_backoff=1.0)
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise _RateLimitError()
+            if len(attempts) == 2:
+                raise _RateLimitError(retry_after="0.001")
+            return "ok"
+
+        self.assertEqual(await limiter.call(flaky), "ok")
+        # Jittered exponential backoff: 0.5 * 1s, then 0.5 * 2s (longer than Retry-After)
+        self.assertEqual(delays, [0.5, 1.0])
+        self.assertEqual(limiter.rate_limited, 2)
+        self.assertEqual(limiter.retries, 2)
+        # 8 -> 4 -> 2, then one additive increase
+        self.assertAlmostEqual(limiter.limit, 2.5)
+
+    async def test_non_transient_errors_are_not_retried(self):
+        limiter = LLMRateLimiter()
+        attempts = []
+
+        async def broken():
+            attempts.append(1)
+            raise ValueError("bad prompt")
+
+        with self.assertRaises(ValueError):
+            await limiter.call(broken)
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(limiter.stats()["failures"], 1)
+
+        async def interrupted_stream():
+            attempts.append(1)
+            raise _RateLimitError()
+
+        with self.assertRaises(_RateLimitError):
+            await limiter.call(interrupted_stream, retryable=lambda _e: False)
+        self.assertEqual(len(attempts), 2)
+
+    async def test_token_bucket_paces_calls(self):
+        limiter = LLMRateLimiter(requests_per_minute=1200, burst=1)  # 20 calls/s after the first
+
+        async def noop():
+            return None
+
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(limiter.call(noop) for _ in range(4)))
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.14)
+
+    async def test_cancelled_waiters_do_not_leak_slots(self):
+        limiter = LLMRateLimiter(max_concurrency=1)
+        release = asyncio.Event()
+
+        holder = asyncio.create_task(limiter.call(release.wait))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(limiter.call(release.wait))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await holder
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(await limiter.call(lambda: asyncio.sleep(0, result="free")), "free")
+
+    def test_headers_pause_dispatch(self):
+        now = [100.0]
+        limiter = LLMRateLimiter(clock=lambda: now[0])
+        wait = limiter.observe_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2m0.5s"})
+        self.assertEqual(wait, 120.5)
+        self.assertEqual(limiter.blocked_until, 220.5)
+        self.assertEqual(_parse_duration("120ms"), 0.12)
+        self.assertEqual(_parse_duration("7.66s"), 7.66)
+        self.assertIsNone(_parse_duration("soon"))
+
+    def test_analysis_scope_orders_by_start_time(self):
+        with analysis_scope():
+            first = call_priority(0)
+        with analysis_scope():
+            second = call_priority(0)
+            planner = call_priority(1)
+        self.assertLess(first, second)
+        self.assertLess(second, planner)
+
+    def test_rate_limits_are_detected_by_status_or_type_not_text(self):
+        class RateLimitError(Exception):
+            pass
+
+        self.assertTrue(is_rate_limited(_RateLimitError()))
+        self.assertTrue(is_rate_limited(RateLimitError("slow down")))
+        self.assertFalse(is_rate_limited(ValueError("request req_4291 failed: rate limit unknown")))
+        self.assertFalse(is_rate_limited(RuntimeError("used 1429 tokens")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+
+class ReadinessStateTests(unittest.IsolatedAsyncioTestCase):
+    async def test_ready_only_after_required_steps_succeed(self):
+        from runtime.readiness import ReadinessState
+
+        state = ReadinessState()
+        self.assertFalse(state.ready)
+
+        async def ok():
+            return None
+
+        async def down():
+            raise RuntimeError("database unreachable")
+
+        await state.run([("embedding_model", ok, True), ("database", down, False)])
+
+        summary = state.summary()
+        self.assertTrue(state.ready)
+        self.assertEqual(summary["steps"]["database"]["status"], "failed")
+        self.assertEqual(summary["steps"]["database"]["error"], "database unreachable")
+
+    async def test_failed_required_step_keeps_service_unready(self):
+        from runtime.readiness import ReadinessState
+
+        state = ReadinessState()
+
+        async def broken_model():
+            raise RuntimeError("model download failed")
+
+        await state.run([("embedding_model", broken_model, True)])
+
+        self.assertTrue(state.finished)
+        self.assertFalse(state.ready)
+
+
+if __name__ == "__main__":
+    unittest.main()
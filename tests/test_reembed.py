@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+from database.local_store import LocalVectorStore
+from scripts.reembed import EmbeddingDimensionError, ReembedCheckpoint, ReembedJob
+
+
+def _encode_new(texts):
+    return [[float(len(text)), 1.0, 0.5, float(i % 3), 2.0] for i, text in enumerate(texts)]
+
+
+class _FlakyStore:
+    """Delegates to a store and fails shadow writes after the first ``fail_after``"""
+
+    def __init__(self, store, fail_after=None):
+        self.store = store
+        self.fail_after = fail_after
+        self.writes = 0
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    async def awrite_shadow_embeddings(self, rows, model):
+        self.writes += 1
+        if self.fail_after is not None and self.writes > self.fail_after:
+            raise ConnectionError("database unreachable")
+        return await self.store.awrite_shadow_embeddings(rows, model)
+
+
+class ReembedTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.store = self._open_store()
+        self.store.insert_ideas([
+            {"idea": f"Idea number {i}", "embedding": [1.0, float(i), 0.0], "report": {"n": i}} for i in range(25)
+        ])
+
+    def _open_store(self):
+        store = LocalVectorStore(os.path.join(self.dir, "store"))
+        self.addCleanup(store.close)
+        return store
+
+    def _models(self):
+        return {row[0] for row in self.store._connection().execute("SELECT embedding_model FROM startup_reports")}
+
+    async def test_backfill_keeps_serving_then_cuts_over(self):
+        checkpoint = ReembedCheckpoint(os.path.join(self.dir, "reembed.json"), "new-model")
+        job = ReembedJob(self.store, _encode_new, checkpoint, batch_size=10, concurrency=2)
+
+        summary = await job.backfill()
+        self.assertEqual((summary["total_rows"], summary["written"], summary["dimension"]), (25, 25, 5))
+        self.assertEqual(summary["checkpoint_id"], 25)
+        self.assertEqual(summary["eta_seconds"], 0.0)
+        # Live search still uses the old 3-dimensional vectors
+        self.assertEqual(len(self.store.search_similar_ideas([1.0, 3.0, 0.0], top_k=1)), 1)
+        self.assertNotIn("new-model", self._models())
+
+        # A row added during the backfill is caught up before the cutover
+        self.store.insert_ideas([{"idea": "Late idea", "embedding": [1.0, 0.0, 0.0], "report": {}}])
+        self.assertEqual(await job.cutover(), 26)
+
+        self.assertEqual(self._models(), {"new-model"})
+        self.assertEqual(len(self.store.get_idea_by_id(26, include_embedding=True)["embedding"]), 5)
+        self.assertEqual(self.store.search_similar_ideas(_encode_new(["Late idea"])[0], top_k=1)[0]["id"], 26)
+        # New inserts are tagged with the live model, and the rebuilt matrix survives a reopen
+        self.store.insert_ideas([{"idea": "After", "embedding": [0.0] * 5, "report": {}}])
+        self.assertEqual(self._models(), {"new-model"})
+        self.store.close()
+        reopened = self._open_store()
+        self.assertEqual(reopened.search_similar_ideas(_encode_new(["Late idea"])[0], top_k=1)[0]["id"], 26)
+        self.assertEqual(reopened.stats()["index"]["rows"], 27)
+
+    async def test_interrupted_backfill_resumes_after_last_written_page(self):
+        path = os.path.join(self.dir, "reembed.json")
+        flaky = _FlakyStore(self.store, fail_after=1)
+        with self.assertRaises(ConnectionError):
+            await ReembedJob(flaky, _encode_new, ReembedCheckpoint(path, "new-model"), batch_size=10, concurrency=1).backfill()
+        self.assertEqual(ReembedCheckpoint(path, "new-model").last_id, 10)
+        # A checkpoint for another model starts over
+        self.assertEqual(ReembedCheckpoint(path, "other-model").last_id, 0)
+
+        resumed = _FlakyStore(self.store)
+        summary = await ReembedJob(resumed, _encode_new, ReembedCheckpoint(path, "new-model"), batch_size=10).backfill()
+        self.assertEqual((summary["total_rows"], summary["written"], resumed.writes), (15, 15, 2))
+        self.assertEqual(await ReembedJob(self.store, _encode_new, ReembedCheckpoint(path, "new-model")).cutover(), 25)
+
+    async def test_dimension_mismatch_and_incomplete_cutover_fail_cleanly(self):
+        checkpoint = ReembedCheckpoint(None, "new-model")
+        with self.assertRaisesRegex(EmbeddingDimensionError, "5-dimensional embeddings but the migration expects 768"):
+            await ReembedJob(self.store, _encode_new, checkpoint, batch_size=10, dimension=768).backfill()
+
+        with self.assertRaisesRegex(ValueError, "25 row\\(s\\) have no new-model embedding yet"):
+            self.store.cutover_embeddings("new-model")
+        self.assertEqual(self.store.stats()["index"]["dimension"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from tools.search_cache import SearchCache
+
+
+class SearchCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.now = [1000.0]
+        self.cache = SearchCache(
+            os.path.join(self._tmp.name, "cache.sqlite3"),
+            ttl_seconds=60,
+            stale_seconds=120,
+            max_entries=2,
+            clock=lambda: self.now[0],
+        )
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_ttl_and_stale_window(self):
+        self.cache.set("Fintech market trends 2026", ["a"])
+
+        self.assertTrue(self.cache.get("fintech  market trends 2026?").fresh)
+        self.now[0] += 90
+        self.assertFalse(self.cache.get("fintech market trends 2026").fresh)
+        self.now[0] += 200
+        self.assertIsNone(self.cache.get("fintech market trends 2026"))
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["stale_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_lru_eviction_keeps_recently_used(self):
+        self.cache.set("q1", ["1"])
+        self.now[0] += 1
+        self.cache.set("q2", ["2"])
+        self.now[0] += 1
+        self.cache.get("q1")
+        self.now[0] += 1
+        self.cache.set("q3", ["3"])
+
+        self.assertIsNotNone(self.cache.get("q1"))
+        self.assertIsNone(self.cache.get("q2"))
+        self.assertIsNotNone(self.cache.get("q3"))
+
+    def test_entries_survive_reopen(self):
+        self.cache.set("q1", ["persisted"])
+        self.cache.close()
+
+        reopened = SearchCache(self.cache.path, clock=lambda: self.now[0])
+        try:
+            self.assertEqual(reopened.get("q1").value, ["persisted"])
+        finally:
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from rag.semantic_cache import METADATA_KEY, SemanticCache, without_metadata
+
+
+class SemanticCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = [10_000.0]
+        self.cache = SemanticCache(threshold=0.97, ttl_seconds=3600, clock=lambda: self.now[0])
+
+    def _row(self, similarity, industry="Fintech", target_market="EU", age=0.0):
+        metadata = self.cache.build_metadata(industry, target_market)
+        metadata["analyzed_at"] -= age
+        return {"id": 1, "idea": "idea", "similarity": similarity, "report": {"analysis_metadata": metadata}}
+
+    def test_hit_requires_similarity_context_and_freshness(self):
+        self.assertIsNotNone(self.cache.lookup([self._row(0.98)], " fintech", "eu"))
+        self.assertIsNone(self.cache.lookup([self._row(0.95)], "Fintech", "EU"))
+        self.assertIsNone(self.cache.lookup([self._row(0.99, industry="Health")], "Fintech", "EU"))
+        self.assertIsNone(self.cache.lookup([self._row(0.99, age=7200)], "Fintech", "EU"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    def test_reports_without_metadata_never_match(self):
+        legacy = {"id": 2, "idea": "idea", "similarity": 1.0, "report": {"market_analysis": "..."}}
+        self.assertIsNone(self.cache.lookup([legacy], "Fintech", "EU"))
+
+    def test_metadata_is_stripped_from_returned_reports(self):
+        row = self._row(0.99)
+        row["report"].update(success_probability=60)
+        row["report"][METADATA_KEY]["critique"] = {"verdict": "internal"}
+        self.assertEqual(without_metadata(row["report"]), {"success_probability": 60})
+        self.assertEqual(without_metadata(None), {})
+        # The cached row itself keeps its metadata for lookups
+        self.assertIsNotNone(self.cache.lookup([row], "Fintech", "EU"))
+
+    def test_force_refresh_and_disabled_bypass(self):
+        self.assertIsNone(self.cache.lookup([self._row(0.99)], "Fintech", "EU", force_refresh=True))
+        self.assertEqual(self.cache.stats()["bypasses"], 1)
+        self.cache.enabled = False
+        self.assertIsNone(self.cache.lookup([self._row(0.99)], "Fintech", "EU"))
+
+
+if __name__ == "__main__":
+    unittest.main()
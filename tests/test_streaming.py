@@ -0,0 +1,33 @@
+import unittest
+
+from agents.streaming import SectionStreamParser
+
+
+class SectionStreamParserTests(unittest.TestCase):
+    def test_sections_complete_when_next_header_arrives(self):
+        parser = SectionStreamParser(["MARKET_DEMAND", "AUDIENCE_PROFILE", "SUMMARY"])
+
+        self.assertEqual(parser.feed("1) MARKET_DEMAND: growing fast\n2) AUDIENCE_"), [])
+        self.assertEqual(parser.feed("PROFILE: founders"), [("MARKET_DEMAND", "growing fast\n2)")])
+        self.assertEqual(parser.feed(" and SMBs\nSUMM"), [])
+        self.assertEqual(parser.feed("ARY: done"), [("AUDIENCE_PROFILE", "founders and SMBs")])
+        self.assertEqual(parser.close(), [("SUMMARY", "done")])
+        self.assertEqual(parser.text, "1) MARKET_DEMAND: growing fast\n2) AUDIENCE_PROFILE: founders and SMBs\nSUMMARY: done")
+
+    def test_matches_extract_section_for_single_chunk(self):
+        from agents.financial_strategy import FinancialStrategyAgent
+
+        content = "intro\nREVENUE_MODEL: subs\nCOST_STRUCTURE: infra\nSUMMARY: fine"
+        parser = SectionStreamParser(["REVENUE_MODEL", "COST_STRUCTURE", "SUMMARY"])
+        sections = dict(parser.feed(content) + parser.close())
+        for header, text in sections.items():
+            self.assertEqual(text, FinancialStrategyAgent._extract_section(content, header))
+
+    def test_text_without_headers_yields_nothing(self):
+        parser = SectionStreamParser(["SUMMARY"])
+        self.assertEqual(parser.feed("no sections here"), [])
+        self.assertEqual(parser.close(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
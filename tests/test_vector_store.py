@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from database.local_store import LocalVectorStore
+
+
+class LocalVectorStoreTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = tmp.name
+        self.rng = np.random.default_rng(7)
+
+    def _rows(self, vectors):
+        return [{"idea": f"idea {i}", "embedding": v.tolist(), "report": {"n": i}} for i, v in enumerate(vectors)]
+
+    def test_search_matches_brute_force_with_the_rpc_result_shape(self):
+        vectors = self.rng.normal(size=(300, 16)).astype(np.float32)
+        store = LocalVectorStore(self.path)
+        ids = store.insert_ideas(self._rows(vectors))
+        self.assertEqual(ids, list(range(1, 301)))
+
+        query = vectors[42] + 0.01 * self.rng.normal(size=16).astype(np.float32)
+        results = store.search_similar_ideas(query.tolist(), top_k=4)
+
+        normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:4] + 1
+        self.assertEqual([r["id"] for r in results], expected.tolist())
+        self.assertEqual(set(results[0]), {"id", "idea", "report", "similarity"})
+        self.assertEqual(results[0]["report"], {"n": 42})
+        # A query from a different embedding model finds nothing instead of raising
+        self.assertEqual(store.search_similar_ideas([0.1] * 8), [])
+        store.close()
+
+    def test_rows_and_matrix_persist_across_restarts(self):
+        vectors = self.rng.normal(size=(20, 8)).astype(np.float32)
+        store = LocalVectorStore(self.path)
+        store.insert_ideas(self._rows(vectors[:10]))
+        store.close()
+
+        # Rows written after the matrix was saved are picked up from SQLite
+        writer = LocalVectorStore(self.path)
+        writer.insert_ideas(self._rows(vectors[10:]))
+        writer._conn.close()
+        writer._conn = None
+
+        reopened = LocalVectorStore(self.path)
+        self.assertEqual(reopened.search_similar_ideas(vectors[15].tolist(), top_k=1)[0]["id"], 16)
+        self.assertEqual(reopened.stats()["index"]["rows"], 20)
+
+        row = reopened.get_idea_by_id(3, include_embedding=True)
+        self.assertEqual(row["idea"], "idea 2")
+        self.assertEqual(row["report"], {"n": 2})
+        np.testing.assert_allclose(row["embedding"], vectors[2], rtol=1e-6)
+        self.assertIn("created_at", row)
+        self.assertNotIn("embedding", reopened.get_idea_by_id(3))
+        self.assertIsNone(reopened.get_idea_by_id(99))
+        reopened.close()
+
+    async def test_async_methods_and_backend_selection(self):
+        from database.vector_db import VectorDB, create_vector_store
+
+        with patch.dict(os.environ, {"VECTOR_STORE": "local", "LOCAL_STORE_PATH": self.path}):
+            store = create_vector_store()
+        self.assertIsInstance(store, LocalVectorStore)
+        self.assertEqual(store.path, self.path)
+        self.assertIsInstance(create_vector_store("supabase"), VectorDB)
+        with self.assertRaises(ValueError):
+            create_vector_store("pinecone")
+
+        idea_id = await store.ainsert_idea("Meal kits", [1.0, 0.0], {"p": 1})
+        with self.assertRaises(ValueError):
+            await store.ainsert_idea("Dog walking", [0.0, 1.0], {}, embedding_model="some-other-model")
+        await store.ainsert_ideas([{"idea": "Dog walking", "embedding": [0.0, 1.0], "report": {}}])
+        self.assertEqual((await store.asearch_similar_ideas([0.9, 0.1], top_k=1))[0]["id"], idea_id)
+        self.assertEqual((await store.aget_idea_by_id(idea_id))["idea"], "Meal kits")
+        self.assertTrue(await store.health_check())
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
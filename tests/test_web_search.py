@@ -0,0 +1,129 @@
+import asyncio
+import os
+import tempfile
+import time
+import types
+import unittest
+from unittest.mock import patch
+
+
+class _SlowWrapper:
+    """Stand-in for DuckDuckGoSearchAPIWrapper with canned snippets per query"""
+
+    def __init__(self, snippets, delays):
+        self._snippets = snippets
+        self._delays = delays
+
+    def results(self, query, max_results):
+        time.sleep(self._delays.get(query, 0.1))
+        return [{"snippet": s, "title": "", "link": ""} for s in self._snippets[query]]
+
+
+class WebSearchToolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        from tools.search_cache import SearchCache
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = SearchCache(os.path.join(self._tmp.name, "cache.sqlite3"))
+        self._cache_patch = patch("tools.web_search.search_cache", self.cache)
+        self._cache_patch.start()
+
+    def tearDown(self):
+        self._cache_patch.stop()
+        self.cache.close()
+        self._tmp.cleanup()
+
+    async def test_amulti_search_fans_out_dedupes_and_embeds_once(self):
+        from tools.web_search import WebSearchTool
+
+        tool = WebSearchTool()
+        tool.search = types.SimpleNamespace(api_wrapper=_SlowWrapper(
+            {
+                "fintech trends": ["Payments grow 20%", "Neobanks consolidate"],
+                "fintech market size": ["payments  grow 20%", "Market hits $300B"],
+                "fintech regulation": ["PSD3 draft published"],
+            },
+            {"fintech trends": 0.1, "fintech market size": 0.1, "fintech regulation": 0.1},
+        ))
+
+        batches = []
+
+        def fake_encode_batch(texts):
+            batches.append(list(texts))
+            return [[float(i)] for i in range(len(texts))]
+
+        with patch("tools.web_search.embedding_service.encode_batch", side_effect=fake_encode_batch):
+            start = time.perf_counter()
+            results = await tool.amulti_search(["fintech trends", "fintech market size", "fintech regulation"])
+            elapsed = time.perf_counter() - start
+
+        # Three 100ms searches ran side by side rather than back to back
+        self.assertLess(elapsed, 0.25)
+        self.assertEqual([r["query"] for r in results], ["fintech trends", "fintech market size", "fintech regulation"])
+        self.assertEqual(results[1]["results"], "Market hits $300B")
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([r["embedding"] for r in results], [[0.0], [1.0], [2.0]])
+
+    async def test_amulti_search_returns_what_finished_before_deadline(self):
+        from tools.web_search import WebSearchTool
+
+        tool = WebSearchTool()
+        tool.search = types.SimpleNamespace(api_wrapper=_SlowWrapper(
+            {"fast": ["quick result"], "slow": ["late result"]},
+            {"fast": 0.01, "slow": 0.5},
+        ))
+
+        with patch("tools.web_search.embedding_service.encode_batch", side_effect=lambda texts: [[0.0] for _ in texts]):
+            results = await tool.amulti_search(["fast", "slow"], deadline=0.2)
+
+        self.assertEqual([r["query"] for r in results], ["fast"])
+
+    async def test_amulti_search_serves_repeat_queries_from_cache(self):
+        from tools.web_search import WebSearchTool
+
+        wrapper = _SlowWrapper({"fintech trends": ["Payments grow 20%"]}, {"fintech trends": 0.05})
+        calls = []
+        original_results = wrapper.results
+        wrapper.results = lambda query, max_results: calls.append(query) or original_results(query, max_results)
+
+        tool = WebSearchTool()
+        tool.search = types.SimpleNamespace(api_wrapper=wrapper)
+
+        with patch("tools.web_search.embedding_service.encode_batch", side_effect=lambda texts: [[0.0] for _ in texts]):
+            first = await tool.amulti_search(["fintech trends"])
+            second = await tool.amulti_search(["  Fintech   TRENDS "])
+
+        self.assertEqual(calls, ["fintech trends"])
+        self.assertEqual(first[0]["cache"], "miss")
+        self.assertEqual(second[0]["cache"], "hit")
+        self.assertEqual(second[0]["results"], "Payments grow 20%")
+
+    async def test_stale_entry_is_served_and_refreshed_in_background(self):
+        from tools.web_search import WebSearchTool
+
+        now = [1000.0]
+        self.cache._clock = lambda: now[0]
+        self.cache.ttl_seconds = 10
+        self.cache.stale_seconds = 100
+        self.cache.set("fintech trends", ["old snippet"])
+        now[0] += 50
+
+        tool = WebSearchTool()
+        tool.search = types.SimpleNamespace(api_wrapper=_SlowWrapper(
+            {"fintech trends": ["new snippet"]}, {"fintech trends": 0.0}
+        ))
+
+        snippets, status = await asyncio.to_thread(tool.cached_search, "fintech trends")
+        self.assertEqual((snippets, status), (["old snippet"], "stale"))
+
+        for _ in range(100):
+            if not tool._refreshing:
+                break
+            await asyncio.sleep(0.01)
+        entry = self.cache.get("fintech trends")
+        self.assertEqual(entry.value, ["new snippet"])
+        self.assertTrue(entry.fresh)
+
+
+if __name__ == "__main__":
+    unittest.main()
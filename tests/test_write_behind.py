@@ -0,0 +1,192 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database.write_behind import ReportJournal, ReportWriteBehind
+
+
+class _FlakyDB:
+    """Multi-row insert that fails while ``down`` is set"""
+
+    def __init__(self):
+        self.down = False
+        self.batches = []
+        self.models = []
+        self.next_id = 1
+
+    def insert_ideas(self, rows):
+        if self.down:
+            raise ConnectionError("database unreachable")
+        self.batches.append([row["idea"] for row in rows])
+        self.models.extend(row.get("embedding_model") for row in rows)
+        ids = list(range(self.next_id, self.next_id + len(rows)))
+        self.next_id += len(rows)
+        return ids
+
+
+class ReportWriteBehindTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.journal_path = os.path.join(tmp.name, "report_journal.sqlite3")
+
+    def _writer(self, **kwargs):
+        options = {"batch_size": 5, "flush_interval": 0.02, "max_retries": 1, "base_backoff": 0.001,
+                   "replay_interval": 0.05}
+        options.update(kwargs)
+        return ReportWriteBehind(ReportJournal(self.journal_path), **options)
+
+    async def test_concurrent_reports_are_written_in_batches(self):
+        db = _FlakyDB()
+        writer = self._writer()
+        writer.start(db.insert_ideas)
+        for i in range(7):
+            writer.enqueue(f"idea {i}", [0.1, 0.2], {"n": i})
+        await writer.stop()
+
+        self.assertEqual(db.batches, [[f"idea {i}" for i in range(5)], ["idea 5", "idea 6"]])
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["batches"], stats["journal_pending"]), (7, 2, 0))
+
+    async def test_outage_spills_to_the_journal_and_replays(self):
+        db = _FlakyDB()
+        db.down = True
+        writer = self._writer()
+        writer.start(db.insert_ideas)
+        writer.enqueue("idea during outage", [0.1], {"n": 1})
+        await asyncio.sleep(0.1)
+        self.assertEqual(len(writer.journal), 1)
+        self.assertGreaterEqual(writer.retries, 1)
+
+        db.down = False
+        await asyncio.sleep(0.15)  # idle replay picks the row back up
+        self.assertEqual(db.batches, [["idea during outage"]])
+        self.assertEqual(len(writer.journal), 0)
+        await writer.stop()
+
+    async def test_journal_errors_do_not_kill_the_worker(self):
+        db = _FlakyDB()
+        db.down = True
+        writer = self._writer()
+        append = writer.journal.append
+        failures = [sqlite3.OperationalError("database is locked")]
+
+        def flaky_append(rows):
+            if failures:
+                raise failures.pop()
+            append(rows)
+
+        writer.journal.append = flaky_append
+        writer.start(db.insert_ideas)
+        writer.enqueue("idea", [0.1], {})
+        await asyncio.sleep(0.1)
+        self.assertTrue(writer.running)
+        self.assertEqual(writer.stats()["worker_errors"], 1)
+        # The row went back on the queue and reached the journal on the next attempt
+        self.assertEqual(len(writer.journal), 1)
+
+        db.down = False
+        await asyncio.sleep(0.1)  # idle replay
+        await writer.stop()
+        self.assertEqual(db.batches, [["idea"]])
+
+    async def test_a_dead_worker_is_not_reported_as_running(self):
+        writer = self._writer()
+
+        async def crashed():
+            raise RuntimeError("worker crashed")
+
+        writer._task = asyncio.create_task(crashed())
+        await asyncio.sleep(0)
+        self.assertFalse(writer.running)
+        with self.assertRaises(RuntimeError):
+            writer.enqueue("idea", [0.1], {})
+
+    async def test_unwritten_reports_survive_a_restart(self):
+        db = _FlakyDB()
+        db.down = True
+        writer = self._writer()
+        writer.start(db.insert_ideas)
+        writer.enqueue("idea a", [0.1], {}, embedding_model="old-model")
+        writer.enqueue("idea b", [0.1], {})
+        await writer.stop()
+        stats = writer.stats()
+        self.assertEqual((stats["spilled"], stats["journal_pending"]), (2, 2))
+        # Stats come from memory: the closed journal is not reopened
+        self.assertIsNone(writer.journal._conn)
+
+        db.down = False
+        restarted = self._writer()
+        restarted.start(db.insert_ideas)
+        await restarted.stop()
+        self.assertEqual(db.batches, [["idea a", "idea b"]])
+        # The journaled row keeps the model that embedded it
+        self.assertEqual(db.models, ["old-model", None])
+        self.assertEqual((restarted.stats()["replayed"], restarted.stats()["journal_pending"]), (2, 0))
+
+    async def test_workers_sharing_a_journal_replay_each_row_once(self):
+        journal = ReportJournal(self.journal_path)
+        journal.append([{"idea": f"idea {i}", "embedding": [0.1], "report": {}} for i in range(12)])
+        journal.close()
+
+        db = _FlakyDB()
+
+        async def slow_insert(rows):
+            await asyncio.sleep(0.01)
+            return db.insert_ideas(rows)
+
+        writers = [self._writer(batch_size=3), self._writer(batch_size=3)]
+        for writer in writers:
+            writer.writer = slow_insert
+        replayed = await asyncio.gather(*(writer.replay() for writer in writers))
+        self.assertEqual(sum(replayed), 12)
+        self.assertEqual(sorted(sum(db.batches, [])), sorted(f"idea {i}" for i in range(12)))
+        self.assertEqual(len(writers[0].journal), 0)
+
+    async def test_written_rows_are_not_replayed_again_when_the_delete_fails(self):
+        db = _FlakyDB()
+        writer = self._writer()
+        writer.journal.append([{"idea": "journaled", "embedding": [0.1], "report": {}}])
+        writer.writer = db.insert_ideas
+        delete = writer.journal.delete
+        writer.journal.delete = lambda ids: (_ for _ in ()).throw(sqlite3.OperationalError("disk I/O error"))
+        with self.assertRaises(sqlite3.OperationalError):
+            await writer.replay()
+
+        writer.journal.delete = delete
+        self.assertEqual(await writer.replay(), 0)
+        self.assertEqual(db.batches, [["journaled"]])
+        self.assertEqual(len(writer.journal), 0)
+
+    async def test_a_full_queue_spills_instead_of_blocking(self):
+        writer = self._writer(max_pending=1, flush_interval=0.5)
+        db = _FlakyDB()
+        writer.start(db.insert_ideas)
+        writer.enqueue("first", [0.1], {})
+        writer.enqueue("second", [0.1], {})
+        await asyncio.sleep(0.05)  # the overflow is journaled off the event loop
+        self.assertEqual(writer.stats()["spilled"], 1)
+        await writer.stop()
+        self.assertEqual(sorted(sum(db.batches, [])), ["first", "second"])
+
+    async def test_stored_reports_are_queued_while_the_writer_runs(self):
+        import rag.retrieval as retrieval_module
+
+        db = _FlakyDB()
+        writer = self._writer()
+        original = retrieval_module.report_writer
+        retrieval_module.report_writer = writer
+        self.addCleanup(setattr, retrieval_module, "report_writer", original)
+
+        writer.start(db.insert_ideas)
+        stored = await retrieval_module.RAGService().store_idea_with_report("idea", {"x": 1}, embedding=[0.1])
+        self.assertIsNone(stored)
+        self.assertEqual(db.batches, [])
+        await writer.stop()
+        self.assertEqual(db.batches, [["idea"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
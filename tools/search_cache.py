@@ -0,0 +1,185 @@
+"""
+Disk-backed TTL cache for web search results
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass
+class CacheEntry:
+    """A cached search result and whether it is still within its TTL"""
+    value: List[str]
+    fresh: bool
+    age_seconds: float
+
+
+class SearchCache:
+    """
+    SQLite-backed search cache keyed by normalized query
+
+    Entries younger than ``ttl_seconds`` are fresh. Entries older than that but
+    within ``stale_seconds`` more are served stale while the caller refreshes
+    them in the background. The table is bounded to ``max_entries`` rows with
+    least-recently-used eviction, so it survives restarts and is shared by all
+    workers on the host.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 6 * 3600,
+        stale_seconds: float = 24 * 3600,
+        max_entries: int = 5000,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SearchCache":
+        """Build a cache from SEARCH_CACHE_* environment variables"""
+        return cls(
+            path=os.getenv("SEARCH_CACHE_PATH", os.path.join(os.getcwd(), "search_cache.sqlite3")),
+            ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(6 * 3600))),
+            stale_seconds=float(os.getenv("SEARCH_CACHE_STALE_SECONDS", str(24 * 3600))),
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+            enabled=os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize a query so trivially different spellings share an entry"""
+        query = re.sub(r"[^\w\s$%.-]", " ", (query or "").lower())
+        return re.sub(r"\s+", " ", query).strip()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS search_cache_accessed_idx ON search_cache (accessed_at)"
+            )
+        return self._conn
+
+    def get(self, query: str) -> Optional[CacheEntry]:
+        """
+        Look up a query
+
+        Args:
+            query: Raw search query
+
+        Returns:
+            CacheEntry (fresh or stale), or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        key = self.normalize_query(query)
+        now = self._clock()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            age = now - row[1]
+            if age > self.ttl_seconds + self.stale_seconds:
+                conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            fresh = age <= self.ttl_seconds
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return CacheEntry(value=json.loads(row[0]), fresh=fresh, age_seconds=age)
+
+    def set(self, query: str, value: List[str]):
+        """
+        Store results for a query, evicting least-recently-used rows if full
+
+        Args:
+            query: Raw search query
+            value: Result snippets
+        """
+        if not self.enabled:
+            return
+
+        key = self.normalize_query(query)
+        now = self._clock()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            count = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM search_cache WHERE key IN "
+                    "(SELECT key FROM search_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for this process"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global instance
+search_cache = SearchCache.from_env()
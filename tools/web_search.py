@@ -1,6 +1,15 @@
-from typing import List, Dict
+import asyncio
+import os
+import re
+import threading
+from typing import List, Dict, Optional, Tuple
 from langchain_community.tools import DuckDuckGoSearchRun
 from rag.embeddings import embedding_service
+from runtime.offload import io_pool, run_cpu, run_io
+from tools.search_cache import search_cache
+from dotenv import load_dotenv
+
+load_dotenv()
 
 
 class WebSearchTool:
@@ -8,6 +17,10 @@ class WebSearchTool:
     
     def __init__(self):
         self.search = DuckDuckGoSearchRun()
+        self.query_timeout = float(os.getenv("WEB_SEARCH_QUERY_TIMEOUT_SECONDS", "8"))
+        self.deadline = float(os.getenv("WEB_SEARCH_DEADLINE_SECONDS", "12"))
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
     
     def search_market_trends(self, query: str, max_results: int = 5) -> str:
         """
@@ -21,11 +34,79 @@ class WebSearchTool:
             Formatted search results
         """
         try:
-            results = self.search.run(query)
-            return results
+            snippets, _ = self.cached_search(query, max_results)
+            return " ".join(snippets)
         except Exception as e:
             return f"Search failed: {str(e)}"
     
+    def cached_search(self, query: str, max_results: int = 5) -> Tuple[List[str], str]:
+        """
+        Search through the persistent cache
+        
+        Fresh entries are returned directly. Stale entries are returned
+        immediately while a background refresh runs on the I/O pool
+        (stale-while-revalidate). Misses hit DuckDuckGo and populate the cache.
+        
+        Args:
+            query: Search query
+            max_results: Maximum number of results to return
+            
+        Returns:
+            Tuple of (snippets, cache status: "hit", "stale" or "miss")
+        """
+        entry = search_cache.get(query)
+        if entry is not None:
+            if not entry.fresh:
+                self._schedule_refresh(query, max_results)
+                return entry.value, "stale"
+            return entry.value, "hit"
+        
+        snippets = self.search_snippets(query, max_results)
+        if snippets:
+            search_cache.set(query, snippets)
+        return snippets, "miss"
+    
+    def _schedule_refresh(self, query: str, max_results: int):
+        """Refresh a stale cache entry in the background, once per query"""
+        key = search_cache.normalize_query(query)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                snippets = self.search_snippets(query, max_results)
+                if snippets:
+                    search_cache.set(query, snippets)
+            except Exception as e:
+                print(f"Background search refresh failed for '{query}': {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        io_pool.submit(refresh)
+    
+    def search_snippets(self, query: str, max_results: int = 5) -> List[str]:
+        """
+        Search and return individual result snippets
+        
+        Args:
+            query: Search query
+            max_results: Maximum number of results to return
+            
+        Returns:
+            List of snippet strings (raises on search failure)
+        """
+        api_wrapper = getattr(self.search, "api_wrapper", None)
+        if api_wrapper is not None and hasattr(api_wrapper, "results"):
+            results = api_wrapper.results(query, max_results)
+            return [r.get("snippet", "") for r in results if r.get("snippet")]
+        
+        # Fall back to the flattened run() output as a single snippet
+        text = self.search.run(query)
+        return [text] if text else []
+    
     def search_and_embed(self, query: str) -> Dict[str, any]:
         """
         Search for information and generate embeddings
@@ -70,6 +151,89 @@ class WebSearchTool:
             results.append(result)
         
         return results
+    
+    async def amulti_search(
+        self,
+        queries: List[str],
+        query_timeout: Optional[float] = None,
+        deadline: Optional[float] = None
+    ) -> List[Dict[str, any]]:
+        """
+        Run searches concurrently, dedupe overlapping snippets and embed once
+        
+        Every query goes through the search cache and is fanned out to the I/O
+        pool with its own timeout. Whatever
+        has finished when the overall deadline expires is merged: snippets seen
+        under an earlier query are dropped, and all surviving result texts are
+        embedded with a single encode_batch call on the CPU pool.
+        
+        Args:
+            queries: List of search queries
+            query_timeout: Per-query timeout in seconds
+            deadline: Overall deadline in seconds for the whole fan-out
+            
+        Returns:
+            List of search results with embeddings, in query order, for the
+            queries that completed in time
+        """
+        query_timeout = query_timeout or self.query_timeout
+        deadline = deadline or self.deadline
+        
+        unique_queries = []
+        seen_queries = set()
+        for query in queries:
+            key = self._normalize(query)
+            if key and key not in seen_queries:
+                seen_queries.add(key)
+                unique_queries.append(query)
+        
+        if not unique_queries:
+            return []
+        
+        tasks = [
+            asyncio.create_task(asyncio.wait_for(run_io(self.cached_search, query), query_timeout))
+            for query in unique_queries
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        
+        results = []
+        seen_snippets = set()
+        for query, task in zip(unique_queries, tasks):
+            if task not in done:
+                print(f"  Search deadline reached before '{query}' finished")
+                continue
+            if task.exception() is not None:
+                print(f"  Search failed for '{query}': {task.exception()!r}")
+                continue
+            
+            found, cache_status = task.result()
+            snippets = []
+            for snippet in found:
+                key = self._normalize(snippet)
+                if key and key not in seen_snippets:
+                    seen_snippets.add(key)
+                    snippets.append(snippet.strip())
+            if snippets:
+                results.append({
+                    "query": query,
+                    "results": " ".join(snippets),
+                    "embedding": None,
+                    "cache": cache_status
+                })
+        
+        if results:
+            embeddings = await run_cpu(embedding_service.encode_batch, [r["results"] for r in results])
+            for result, embedding in zip(results, embeddings):
+                result["embedding"] = embedding
+        
+        return results
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize text for duplicate detection"""
+        return re.sub(r"\s+", " ", text or "").strip().lower()
 
 
 # Global instance